@@ -41,33 +41,21 @@ def get_custom_inputs_mdd(mdd_path,export = False):
             7:"boolean"
         }
 
-        variables_names = []
-        variables_datatype =[]
-        variables_min_values = []
-        varibales_max_values = []
-        variables_labels = []
-        categorical_values = []
-        only_categories = []
-
-
-        for var_name in my_mdd._list_of_all_var_names():
-            variables_names.append(var_name)
-            variables_datatype.append(my_mdd._get_variable_datatype(var_name))
-            variables_min_values.append(my_mdd._get_variable_min_value(var_name))
-            varibales_max_values.append(my_mdd._get_variable_max_value(var_name))
-            variables_labels.append(my_mdd._get_variable_label(var_name))
-            categorical_values.append(my_mdd.get_category_dict(var_name))
-            only_categories.append(my_mdd.get_only_category(var_name))
+        # One pass over the variable instances instead of one lookup per variable and attribute
+        catalog = my_mdd.variable_catalog()
 
+        # min/max as whole numbers like before, missing when the mdd value is not an integer
+        for column in ["min_value", "max_value"]:
+            catalog[column] = catalog[column].where(catalog[column] % 1 == 0).astype("Int64")
 
         data = {
-            "variables_names": variables_names,
-            "variables_datatype": variables_datatype,
-            "variables_min_values": variables_min_values,
-            "variables_max_values": varibales_max_values,
-            "variables_labels": variables_labels,
-            "categorical_values": categorical_values,
-            "only_categories":only_categories,                     
+            "variables_names": catalog["name"],
+            "variables_datatype": catalog["datatype"],
+            "variables_min_values": catalog["min_value"],
+            "variables_max_values": catalog["max_value"],
+            "variables_labels": catalog["label"],
+            "categorical_values": catalog["category_labels"],
+            "only_categories": catalog["category_names"],
             }
         
 
@@ -1,5 +1,6 @@
 import ipsos.logs
 import sqlite3
+from ipsos.dimensions.schema import DDFSchema
 
 
 class GOOGLE:
@@ -80,21 +81,19 @@ class GOOGLE:
         Returns:
             None
         """
+        # Tables, columns and the Levels tree of the ddf
+        schema = DDFSchema.load( path_to_ddf )
+
         # Open the ddf
         conn = sqlite3.connect( path_to_ddf )
         c = conn.cursor()
 
-        # Get a list of non-L1 tables along with it's parent table and it's mdd name
-        c.execute( "SELECT TableName, ParentName, DSCTableName FROM Levels WHERE TableName <> 'L1';" )
-        tables = c.fetchall()
-
         # Write out results to a file
         with open( path_to_output_csv, 'w', encoding='utf-8' ) as f:
             f.write( "Serial\tVariableId\tResponse\n" )
 
             # Get all of the columns in the L1 table except for the index (:P0)
-            c.execute( "SELECT name FROM PRAGMA_TABLE_INFO('L1') WHERE name NOT Like '%:P%';" )
-            cols = c.fetchall()
+            cols = [ ( col.Name, ) for col in schema.Tables[ 'L1' ].ResponseColumns ]
 
             # Cycle through the columns
             for col in cols:
@@ -107,63 +106,60 @@ class GOOGLE:
                 self._export_csv( col, rows, f )
 
             # Cycle through all non-L1 tables
-            table_dict = {}
-            for table in tables:
-                # Dictionary key = table name, value = table row
-                table_dict[ table[ 0 ] ] = table
+            for table in schema.Levels.values():
+                if ( table.Name == 'L1' ):
+                    continue
 
                 # Get the response columns, not indexes or level ids
-                c.execute( "SELECT name FROM PRAGMA_TABLE_INFO('" + table[0] + "') WHERE name NOT Like '%:P%' AND name NOT Like 'LevelId%';" )
-                cols = c.fetchall()
-
-                self.log.logs.info( table[0] )
-
-                # Find the entire tree for this table
-                parent = table[1]
-                table_tree_list = []
-                table_tree_list.insert( 0, table )
-                while parent != 'L1':
-                    parent_data = table_dict.get( parent )
-                    table_tree_list.insert( 0, parent_data )
-                    parent = parent_data[1]
-
-                # Cycle through the columns if there are any
-                for col in cols:
-                    dscname_text = ""
-                    join_text = ""
-                    letter = ""
-                    where_text = ""
-                    for i in range( 0, len( table_tree_list ) ):
-                        parent_info = table_tree_list[i]
-
-                        # Letter for join table reference
-                        letter = chr( 65 + i )
-
-                        # Find the LevelId column, could be C1 or L
-                        c.execute( "SELECT name FROM PRAGMA_TABLE_INFO('" + parent_info[0] + "') WHERE name Like 'LevelId%';" )
-                        levelID = c.fetchall()
-                        # Build the question
-                        dscname_text += parent_info[2] + "[{' || " + letter + ".[" + levelID[0][0] + "] || '}]."
-
-                        # Join with the parent table(s) to align indexes
-                        if ( i > 0 ):
-                            join_text += " JOIN "
-
-                        join_text += parent_info[0] + " as " + letter
-
-                        # Match all indexes
-                        if ( i < len( table_tree_list ) -1 ):
-                            for j in range( i + 1, -1, -1 ):
-                                where_text += " AND " + letter + ".[:P" + str( j ) + "] = " + chr( 65 + i + 1 ) + ".[:P" + str( j + 1 ) + "]"
-
-                    # Get Respondent.Serial, build the full question name and get the responses
-                    sql = "SELECT " + chr( len( table_tree_list ) + 65 ) + ".[Respondent.Serial:L], '" + dscname_text + col[0][:col[0].find(':')] + "', " + letter + ".[" + col[0] + "] FROM " + join_text + " JOIN L1 as " + chr( len( table_tree_list ) + 65 ) + " WHERE " + chr( len( table_tree_list ) + 65 ) + ".[:P0] = A.[:P1]" + where_text + " AND " + letter + ".[" + col[0] + "] IS NOT NULL;"
-                    self.log.logs.info( sql )
-                    c.execute( sql )
-                    rows = c.fetchall()
-
-                    # Export the data to the csv file
-                    self._export_csv( col, rows, f )
+                cols = [ ( col.Name, ) for col in table.ResponseColumns ]
+
+                self.log.logs.info( table.Name )
+
+                if ( len( cols ) == 0 ):
+                    continue
+
+                # Join the table with its parent tables once
+                table_tree_list = schema.chain( table.Name )
+                path_text = ""
+                join_text = ""
+                letter = ""
+                where_text = ""
+                for i in range( 0, len( table_tree_list ) ):
+                    parent_info = table_tree_list[i]
+
+                    # Letter for join table reference
+                    letter = chr( 65 + i )
+                    path_text += letter + ".[" + parent_info.LevelId + "], "
+
+                    # Join with the parent table(s) to align indexes
+                    if ( i > 0 ):
+                        join_text += " JOIN "
+
+                    join_text += parent_info.Name + " as " + letter
+
+                    # Match all indexes
+                    if ( i < len( table_tree_list ) -1 ):
+                        for j in range( i + 1, -1, -1 ):
+                            where_text += " AND " + letter + ".[:P" + str( j ) + "] = " + chr( 65 + i + 1 ) + ".[:P" + str( j + 1 ) + "]"
+
+                # Get Respondent.Serial, the LevelId of every loop level and the responses of every column in one scan
+                l1 = chr( len( table_tree_list ) + 65 )
+                sql = "SELECT " + l1 + ".[Respondent.Serial:L], " + path_text + ", ".join( letter + ".[" + col[0] + "]" for col in cols ) + " FROM " + join_text + " JOIN L1 as " + l1 + " WHERE " + l1 + ".[:P0] = A.[:P1]" + where_text + " ORDER BY " + l1 + ".[:P0];"
+                self.log.logs.info( sql )
+                c.execute( sql )
+                rows = c.fetchall()
+
+                # Build the full question name once per LevelId path
+                depth = len( table_tree_list )
+                names = {}
+                for row in rows:
+                    if ( row[ 1:depth + 1 ] not in names ):
+                        names[ row[ 1:depth + 1 ] ] = "".join( table_tree_list[i].DSCName + "[{" + str( row[ i + 1 ] ) + "}]." for i in range( 0, depth ) )
+
+                # Export the data to the csv file, column by column
+                for k, col in enumerate( cols ):
+                    col_rows = [ ( row[0], names[ row[ 1:depth + 1 ] ] + col[0][:col[0].find(':')], row[ depth + 1 + k ] ) for row in rows if row[ depth + 1 + k ] is not None ]
+                    self._export_csv( col, col_rows, f )
 
         # Close the cursor and connection
         c.close()
@@ -1,5 +1,4 @@
-import csv, datetime, itertools, ntpath, os, pandas, shutil, sqlite3, sys, re
-import functools as ft
+import bz2, contextlib, csv, datetime, gzip, io, itertools, lzma, multiprocessing, ntpath, numpy, os, pandas, pathlib, shutil, sqlite3, sys, re, zipfile
 from collections import defaultdict, OrderedDict
 from time import time, strftime, gmtime
 # from slugify import slugify
@@ -8,7 +7,10 @@ import json, uuid, hashlib
 
 import ipsos.dimensions.mdd
 from ipsos.models.Document import Document
+from ipsos.models.MetadataCache import MetadataCache
 from ipsos.models.metadata_model.Variable import Variable
+from ipsos.dimensions.schema import DDFSchema
+from ipsos.util import memoized
 
 sys.path.append(os.path.dirname(ipsos.__file__))
 
@@ -31,6 +33,12 @@ class DDF:
         path_to_mdd (str): The path to the mdd file. 
         path_to_ddf (str): The path to the ddf file.
         verbose (boolean): When True - generates extensive logging of the process (default = False)
+        use_cache (boolean): When True - the parsed metadata is stored in / restored from a disk cache keyed on the mdd content (default = False).
+            The snapshots are pickles, only point cache_dir at a folder that no other user can write to.
+        cache_dir (str): The folder used for the metadata cache, created private to the user (default = ~/.ipsos/mdd_cache)
+        cache_size (int): The maximum size of the metadata cache folder in bytes (default = 2GB)
+        streaming (boolean): When True - the metadata model is built in a single incremental pass over the mdd, bounding peak memory (default = False)
+        lazy (boolean): When True - questions and their variable instances are only built when first accessed, the metadata is then not stored in the cache (default = False)
 
     Attributes: 
         _metadata_tables (list): List of the standard metadata tables in a ddf file
@@ -46,22 +54,26 @@ class DDF:
         split( n, output_dir, split_into_folders = True ): Split a ddf file into n number of new ddf files.
         split_on_variable( variable_fullname, output_folder = ".\\" ): Split a ddf file into 1 file per response from a categorical variable.
         to_txt( txt_file = None, message = '' ): Write a string to a text file.
-        to_csv( csv_file = None, use_category_names = 1, sep = ',', na_rep = '', float_format = None, columns = None, header = True, mode = 'w', encoding = None, compression = 'infer', quoting = csv.QUOTE_MINIMAL, quotechar = "\"", line_terminator = None, chunksize = None, date_format = None, doublequote = True, escapechar = None, decimal = "." ): Export VDATA to csv file.
+        to_csv( csv_file = None, use_category_names = 1, sep = ',', na_rep = '', float_format = None, columns = None, header = True, mode = 'w', encoding = None, compression = 'infer', quoting = csv.QUOTE_MINIMAL, quotechar = "\"", line_terminator = None, chunksize = None, date_format = None, doublequote = True, escapechar = None, decimal = ".", where = None ): Export VDATA to csv file, streamed chunksize respondents at a time.
         to_dataset( use_category_names = 1 ): Generate a .Net dataset from VDATA.
-        to_df( use_category_names = 1 ): Generate a Pandas DataFrame from VDATA.
-        to_excel( xlsx_file = None, use_category_names = 1, sheet_name = 'VDATA', na_rep = '', float_format = None, columns = None, header = True, startrow = 0, startcol = 0, engine = None, merge_cells = True, encoding = None, inf_rep = 'inf', verbose = True, freeze_panes = None ): Export VDATA to an Excel file.
-        to_feather( feather_file = None, use_category_names = 1 ): Export VDATA to a feather file.
+        to_df( use_category_names = 1, columns = None, multi_punch = 'string', categorical = False, workers = 1, where = None ): Generate a Pandas DataFrame from VDATA.
+        to_excel( xlsx_file = None, use_category_names = 1, sheet_name = 'VDATA', na_rep = '', float_format = None, columns = None, header = True, startrow = 0, startcol = 0, engine = None, merge_cells = True, encoding = None, inf_rep = 'inf', verbose = True, freeze_panes = None, where = None, constant_memory = False, labels_sheet = None, batch_size = None ): Export VDATA to an Excel file.
+        to_feather( feather_file = None, use_category_names = 1, where = None ): Export VDATA to a feather file.
+        to_parquet( parquet_file = None, columns = None, where = None, batch_size = None, use_category_labels = True, compression = 'snappy' ): Export VDATA to a parquet file.
+        to_sav( sav_file = None, columns = None, where = None, batch_size = None, file_label = '' ): Export VDATA to an SPSS sav file.
+        to_level_dfs( use_category_names = 1, columns = None, multi_punch = 'string', where = None ): Generate one Pandas DataFrame per Levels table.
+        to_level_parquet( output_dir = ".", use_category_names = 1, columns = None, where = None ): Export one parquet file per Levels table.
+        multi_punch_matrix( variable_fullname ): Return the responses of a multi-punch variable as a sparse indicator matrix.
+        iter_batches( batch_size = None, columns = None, where = None, use_category_names = 1, multi_punch = 'string', records = False ): Walk VDATA a batch of respondents at a time.
         extract_category_name( source_column_name, new_column_name, new_column_label = None, function = None )
         merge_csv(self, path_to_csv, ddf_join_column, csv_join_column, csv_column_name, ddf_variable_fullname, create_new_text_field=False, overwrite=False, new_text_field_label=None, sep=',', encoding='utf-8')
         set_of_variable_names(self, *patterns, collapse=False)
+        variable_catalog( include_system = False ): Return a DataFrame describing every variable (datatype, min/max, label, categories, properties).
     """
 
-    _metadata_tables = ["DataVersion", "Levels", "SchemaVersion"]
+    _metadata_tables = DDFSchema.METADATA_TABLES
     _metadata_tables_matches = ["Levels"]
 
-    # Holds the list of cached functions returning Data or Metadata
-    _cached_methods = set()
-
     # Regex Patterns
     SIMPLE_VAR = r"([A-Z_][A-Z0-9_\.])*$"
     GRID = r"([A-Z_][A-Z0-9_\.]*[A-Z0-9_]+\[{?([A-Z_][A-Z0-9_]*)}?\]\.)[A-Z_][A-Z0-9_\.]*[A-Z0-9_]+$"
@@ -75,17 +87,20 @@ class DDF:
     # holds the EXPLICIT DATA CACHE
     _data_cache = {}
 
-    def __init__(self, path_to_mdd, path_to_ddf = None, verbose=False):
-        self.ddf = ""
+    def __init__(self, path_to_mdd, path_to_ddf = None, verbose=False, use_cache=False, cache_dir=None, cache_size=None, streaming=False, lazy=False):
+        self.ddf = path_to_ddf or ""
         self.mdd = path_to_mdd
         self.verbose = verbose
 
         self.mdm = Document( )
-        self.mdm.Open( self.mdd )
+        if (use_cache):
+            # Re-use the parsed metadata of an identical mdd instead of re-parsing the XML
+            self.mdm.Open( self.mdd, cache=MetadataCache(cache_dir, cache_size), key=self._file_hash(self.mdd), streaming=streaming, lazy=lazy )
+        else:
+            self.mdm.Open( self.mdd, streaming=streaming, lazy=lazy )
 
         # Set up the logger
         self.log = ipsos.logs.Logs(name='ddf', verbose=verbose)
-        self._register_cache()
         return
 
     @property
@@ -106,6 +121,13 @@ class DDF:
         self.__mdd = path_to_mdd
         self._clear_cache()
 
+    @property
+    def schema(self):
+        """
+        The DDFSchema (tables, columns, Levels tree) of the ddf file, read once per version of the file.
+        """
+        return DDFSchema.load(self.ddf)
+
     def _file_hash(self, path_to_file):
         BLOCKSIZE = 1048576  # 1MB
         hasher = hashlib.sha1()
@@ -116,27 +138,10 @@ class DDF:
                 buf = f.read(BLOCKSIZE)
         return hasher.hexdigest()
 
-    def _register_cache(self):
-        """
-        This method stores in the _cached_methods set at class level the names of the methods 
-        decorated with LRU_cache
-
-        Args:
-            None
-
-        Returns:
-            None
-        """
-        lst = dir(self)
-        for method in lst:
-            if hasattr(getattr(self, method), "cache_info"):
-                self._cached_methods.add(method)
-        return
-
     def _clear_cache(self):
         """
-        This method calls <method>.cache_clear() for all class methods 
-        decorated with LRU_cache
+        This method drops the memoised results ( @memoized methods ) of this instance,
+        other DDF objects keep theirs.
 
         Args:
             None
@@ -144,8 +149,7 @@ class DDF:
         Returns:
             None
         """
-        for method in self._cached_methods:
-            getattr(self, method).cache_clear()
+        memoized.clear(self)
         return
 
     def _resp_pk_minmax(self):
@@ -214,7 +218,7 @@ class DDF:
 
         if (new_pk_value > 0):
             # Potential primary key violation, update the primary key
-            pkcol = ddf._get_pk_col(cur, table)
+            pkcol = ddf._get_pk_col(table)
             cur.execute("update db." + table + " set [" + str(pkcol) + "] = [" + str(pkcol) + "] + " + str(new_pk_value))
 
         cur.execute("insert into " + table + " select * from db." + table)
@@ -280,8 +284,7 @@ class DDF:
             conn = sqlite3.connect(self.ddf)
             cur = conn.cursor()
             cur.execute('PRAGMA cache_size = 30000')
-            cur.execute("select name, sql from sqlite_master where type = 'table' and name not in (" + ", ".join("'{0}'".format(t) for t in self._metadata_tables) + ")")
-            tables = cur.fetchall()
+            tables = [(name, self.schema.Tables[name].Sql) for name in self.schema.CaseDataTables]
 
             cur.execute("attach database ? as db", [path])
             cur.execute('PRAGMA db.synchronous = OFF')
@@ -335,16 +338,12 @@ class DDF:
 
         # Determine which ids to use in the query
         ids_string = ", ".join(str(id) for id in ids)
-        mdt_string = ", ".join("'{0}'".format(t) for t in self._metadata_tables)
-
-        sql_get_create = f"select name, sql from sqlite_master where type = 'table' and name not in ( {mdt_string} )"
 
         try:
             conn = sqlite3.connect(self.ddf)
             cur = conn.cursor()
             cur.execute('PRAGMA cache_size = 30000')
-            cur.execute(sql_get_create)
-            tables = cur.fetchall()
+            tables = [(name, self.schema.Tables[name].Sql) for name in self.schema.CaseDataTables]
 
             cur.execute("attach database ? as db", [path])
             cur.execute('PRAGMA db.synchronous = OFF')
@@ -407,8 +406,7 @@ class DDF:
         self.log.logs.info("Copying metadata tables")
         conn = sqlite3.connect(self.ddf)
         cur = conn.cursor()
-        cur.execute("select name, sql from sqlite_master where type = 'table'")
-        tables = cur.fetchall()
+        tables = [(table.Name, table.Sql) for table in self.schema.Tables.values()]
         cur.execute("attach database ? as db", [path])
 
         for table in tables:
@@ -441,13 +439,7 @@ class DDF:
         """
         conn = sqlite3.connect(self.ddf)
         cur = conn.cursor()
-        sql = "select count( a.[:P0] ) from L1 a"
-
-        if (where is not None):
-            if ( where.lower().find( 'where' ) > -1 ):
-                sql += where
-            else:
-                sql += " where " + where
+        sql = "select count( a.[:P0] ) from L1 a" + self._where_clause(where)
 
         cur.execute(sql)
         rows = cur.fetchall()
@@ -457,6 +449,82 @@ class DDF:
 
         return rows[0][0]
 
+    def _where_clause(self, where):
+        # The WHERE clause of a query on L1 ( as a ) for a count / respondent filter, '' when there is no filter
+        if (where is None):
+            return ""
+        if ( where.lower().find( 'where' ) > -1 ):
+            return " " + where
+        return " where " + where
+
+    def _respondent_keys(self, where):
+        """
+        This method resolves a respondent filter to the set of respondent keys (:P0) it selects.
+
+        Usage:
+            keys = ddf._respondent_keys( '[D1a:C1] = 2' )                # a WHERE clause on L1, see count
+            keys = ddf._respondent_keys( [ 1001, 1002 ] )               # Respondent.Serial values
+            keys = ddf._respondent_keys( { 'd1a': 'fr', 'q9[{brand_a}].inn1': [ 'yes' ] } )    # category membership
+
+        Args:
+            where (str, list or dict): A WHERE clause on the L1 table, a list of Respondent.Serial values or a
+                dict of variable full name -> category name(s). A respondent is selected when the response to
+                each variable of the dict contains any of its categories.
+
+        Returns:
+            The respondent keys (set of :P0 values), None when where is None.
+        """
+        if where is None:
+            return None
+
+        if isinstance(where, dict):
+            keys = None
+            for variable_fullname, categories in where.items():
+                table_filters = self._get_table_filters(variable_fullname)
+                if len(table_filters) == 0:
+                    raise ValueError("Unknown variable in respondent filter: " + variable_fullname)
+
+                if isinstance(categories, str):
+                    categories = [categories]
+                elif not isinstance(categories, (list, tuple)) or not all(isinstance(category, str) for category in categories):
+                    raise ValueError("The categories of " + variable_fullname + " in a respondent filter must be a category name or a list of category names, not " + repr(categories))
+
+                # An unknown category would select nobody, the CategoryMap only knows the names of the whole mdd
+                valid = set(name.lower() for name in table_filters[-1][3].values())
+                for category in categories:
+                    if category.lower() not in valid:
+                        raise ValueError("Unknown category in respondent filter: " + variable_fullname + " has no category " + category)
+
+                split_ids = self._get_split_ids(table_filters)
+                selected = set()
+                for category in categories:
+                    selected.update(split_ids.get(self.mdm.CategoryMap[category], []))
+                keys = selected if keys is None else keys & selected
+            return keys
+
+        if not isinstance(where, (str, list, tuple, set)):
+            raise ValueError("A respondent filter must be a WHERE clause, a list of Respondent.Serial values or a dict, not " + repr(where))
+
+        conn = sqlite3.connect(self.ddf)
+        cur = conn.cursor()
+        try:
+            if isinstance(where, str):
+                cur.execute("select a.[:P0] from L1 a" + self._where_clause(where))
+            else:
+                serial = next((col.Name for col in self.schema.Tables['L1'].Columns if col.Variable is not None and col.Variable.lower() == 'respondent.serial'), None)
+                if serial is None:
+                    raise ValueError("The L1 table has no Respondent.Serial column to filter the respondents on")
+
+                # The serials go to a temp table so sqlite does the lookup instead of a scan of L1 in python
+                cur.execute("CREATE TEMP TABLE respondent_serials ( serial PRIMARY KEY )")
+                cur.executemany("INSERT OR IGNORE INTO temp.respondent_serials VALUES ( ? )", ((value,) for value in where))
+                cur.execute("select [:P0] from L1 where [" + serial + "] IN temp.respondent_serials")
+            keys = set(row[0] for row in cur.fetchall())
+        finally:
+            cur.close()
+            conn.close()
+        return keys
+
     def _get_casedata_tables(self):
         """
         This method gets a list of the case data tables in a ddf.
@@ -467,15 +535,22 @@ class DDF:
         Returns:
             A list of the case data table names.
         """
-        conn = sqlite3.connect(self.ddf)
-        cur = conn.cursor()
-        cur.execute("select name from sqlite_master where type = 'table' and name not in (" + ", ".join("'{0}'".format(t) for t in self._metadata_tables) + ")")
-        tables = cur.fetchall()
+        return list(self.schema.CaseDataTables)
 
-        cur.close()
-        conn.close()
+    def _variable_instance(self, variable_fullname):
+        """
+        This method resolves any spelling of a variable name (exact or case insensitive) to its VariableInstance.
+
+        Args:
+            variable_fullname (str): The variable full name, e.g. "Q9[{_5}].inn1".
 
-        return([name for tple in tables for name in tple])
+        Returns:
+            The VariableInstance, raises KeyError when the variable is not in the mdd.
+        """
+        v = self.mdm.NameIndex.VariableInstance(variable_fullname)
+        if v is None:
+            raise KeyError(variable_fullname)
+        return v
 
     def get_category_dict(self, variable_fullname):
         """
@@ -494,7 +569,7 @@ class DDF:
         self.log.logs.info("Retrieving category names and labels for " + variable_fullname)
         d = {}
 
-        v = self.mdm.VariableInstances[variable_fullname]
+        v = self._variable_instance(variable_fullname)
 
         # Create the category name/label dictionary
         for _, c in v.Categories.items():
@@ -523,7 +598,7 @@ class DDF:
         self.log.logs.info("Retrieving category names and labels for " + variable_fullname)
         d = []
 
-        v = self.mdm.VariableInstances[variable_fullname]
+        v = self._variable_instance(variable_fullname)
 
         # Create the category name/label dictionary
         for _, c in v.Categories.items():
@@ -534,7 +609,52 @@ class DDF:
 
 
 
-    @ft.lru_cache(maxsize=256)
+    def _category_names(self, variable_fullname, values=()):
+        """
+        The lower case category names of a variable in mdd order, followed by any other name in values.
+        """
+        names = OrderedDict()
+        v = self.mdm.NameIndex.VariableInstance(variable_fullname)
+        for _, c in (v.Categories.items() if v is not None else []):
+            names[c.Name.lower()] = None
+        for value in pandas.unique(pandas.Series(values, dtype=object).dropna()):
+            names[value] = None
+        return list(names)
+
+    def multi_punch_matrix(self, variable_fullname):
+        """
+        This method gets the responses of a multi-punch variable as a sparse respondent x category indicator matrix.
+
+        Usage:
+            matrix, respondents, categories = ddf.multi_punch_matrix( variable_fullname = "Q2" )
+            counts = pandas.Series( numpy.asarray( matrix.sum( axis = 0 ) ).ravel(), index = categories )
+
+        Args:
+            variable_fullname (str): The multi-punch variable (as it is in the mdd).
+
+        Returns:
+            ( scipy.sparse.csr_matrix, pandas.Index, list ): The 0/1 matrix, the respondents (:P0) of its rows and the category names of its columns.
+        """
+        import scipy.sparse
+
+        v = self._variable_instance(variable_fullname)
+        column = self.to_df(use_category_names=0, columns=[v.FullName]).iloc[:, 0]
+        valid, rows, codes = self._parse_multi_punch(column.values)
+
+        # Columns in mdd category order, values that are not categories of the variable go last
+        values = OrderedDict()
+        for _, c in v.Categories.items():
+            values[self.mdm.CategoryMap[c.Name]] = c.Name.lower()
+        for code in pandas.unique(codes).tolist():
+            if code not in values:
+                values[code] = self.mdm.CategoryMap.ValueToName(code) or str(code)
+        positions = {code: pos for pos, code in enumerate(values)}
+
+        cols = numpy.array([positions[code] for code in codes.tolist()], dtype=numpy.int64)
+        matrix = scipy.sparse.csr_matrix((numpy.ones(len(rows), dtype=numpy.int8), (rows, cols)), shape=(len(column), len(values)))
+        return matrix, column.index, list(values.values())
+
+    @memoized(maxsize=256)
     def _get_value_part_dict(self, variable_fullname):
         """
         This method gets a dictionary of a variables category value/part names.
@@ -554,7 +674,7 @@ class DDF:
             self.log.logs.info("Retrieving value/part names for " + variable_fullname)
             d = {}
 
-            v = self.mdm.VariableInstances[variable_fullname]
+            v = self._variable_instance(variable_fullname)
 
             # Create the category value/part dictionary
             for _, c in v.Categories.items():
@@ -606,8 +726,11 @@ class DDF:
         """
 
         # Check that the variable name is present in the MDD. Exit with an empty result if not.
-        if variable_fullname.lower() not in self._list_of_all_var_names():
+        v = self.mdm.NameIndex.VariableInstance(variable_fullname)
+        if v is None:
             return []
+        # Continue with the spelling used in the mdd, the Levels table matching is case sensitive
+        variable_fullname = v.FullName
 
         # Connect to the DDF with SQLite
         conn = sqlite3.connect(self.ddf)
@@ -623,7 +746,7 @@ class DDF:
         tableName = "L1"
         fieldName = ""
 
-        data_type = self.mdm.VariableInstances[variable_fullname].DataType
+        data_type = v.DataType
 
         # Loop through the components starting from the left, excluding the last one
         for component in lst[:-1]:
@@ -638,7 +761,7 @@ class DDF:
             else:
                 fieldName += component
 
-            d = { c.Name: c.Value for _, c in self.mdm.Fields[fieldName].Categories.items() }
+            d = { c.Name: c.Value for _, c in self.mdm.NameIndex.Field(fieldName).Categories.items() }
             filterValue = d.get(filterName)
 
             result_lst.append(("FILTER", tableName, DSCTableName, filterName, filterValue))
@@ -650,8 +773,8 @@ class DDF:
 
         # Finally, we just add the last component as the SPLIT variable. Rather than the filter
         # name and value, we store the max_effective_val for the variable and the list of category items.
-        value_name_dict = { c.Value: c.Name for _, c in self.mdm.VariableInstances[variable_fullname].Categories.items() }
-        result_lst.append(("SPLIT", tableName, lst[-1], value_name_dict, int( self.mdm.VariableInstances[variable_fullname].MaxValue ) if data_type == self._DATATYPE_CATEGORY else 1))
+        value_name_dict = { c.Value: c.Name for _, c in v.Categories.items() }
+        result_lst.append(("SPLIT", tableName, lst[-1], value_name_dict, int( v.MaxValue ) if data_type == self._DATATYPE_CATEGORY else 1))
 
         # Clean up
         conn.close()
@@ -705,7 +828,7 @@ class DDF:
         """
         self.log.logs.info("Retrieving effective max value for " + variable_fullname)
         try:
-            v = self.mdm.VariableInstances[variable_fullname]
+            v = self._variable_instance(variable_fullname)
 
             max_val = int( v.MaxValue )
 
@@ -730,7 +853,7 @@ class DDF:
         """
 
         try:
-            v = self.mdm.VariableInstances[variable_fullname]
+            v = self._variable_instance(variable_fullname)
 
             min_val = int( v.MinValue )
 
@@ -757,7 +880,7 @@ class DDF:
 
         try:
         
-            return self.mdm.VariableInstances[variable_fullname].Label
+            return self._variable_instance(variable_fullname).Label
         except Exception as e:
             return None
         
@@ -781,7 +904,7 @@ class DDF:
         """
         self.log.logs.info("Retrieving datatype for " + variable_fullname)
         try:
-            dt = self.mdm.VariableInstances[variable_fullname].DataType
+            dt = self._variable_instance(variable_fullname).DataType
             return int( dt )
         except Exception as e:
             return None
@@ -839,34 +962,17 @@ class DDF:
 
         return s
 
-    def _get_pk_col(self, cur, table_name):
+    def _get_pk_col(self, table_name):
         """
         This method gets a primary key for the table specified.
 
         Args:
-            cur (sqlite connection): SQLite connection to a ddf.
             table_name (str): Name of the table we are searching for the primary key.
 
         Returns:
             The highest index primary key of the table which holds the respondent index.
         """
-        sql = "select * from " + table_name + " limit 1"
-        cur.execute(sql)
-        col_names = [column[0] for column in cur.description]
-        idx = -1
-        pkcol = None
-
-        for column in col_names:
-
-            # Find the larges :P variable, this refers to table L1
-            if (column[0:2] == ":P"):
-                pkidx = int(''.join(c for c in column if c.isdigit()))
-
-                if (pkidx > idx):
-                    idx = pkidx
-                    pkcol = column
-
-        return pkcol
+        return self.schema.primary_key(table_name)
 
     def _get_primary_key_group(self):
         """
@@ -917,15 +1023,7 @@ class DDF:
         Returns:
             A list of column names from the specified table.
         """
-        conn = sqlite3.connect(self.ddf)
-        cur = conn.cursor()
-        cur.execute("select * from " + table + " limit 1")
-        names = list(map(lambda x: x[0], cur.description))
-
-        cur.close()
-        conn.close()
-
-        return names
+        return self.schema.columns(table)
 
     def _initialize_sqlite_db(self, path):
         """
@@ -1143,21 +1241,7 @@ class DDF:
         Returns:
             Dictionary as described above
         """
-        pk_dict = {}
-        conn = sqlite3.connect(self.ddf)
-        cur = conn.cursor()
-        cur.execute("select name, sql from sqlite_master where type = 'table' and name not in (" + ", ".join("'{0}'".format(t) for t in self._metadata_tables) + ")")
-        tables = cur.fetchall()
-
-        # Create a dictionary of each table and its primary key.
-        for table in tables:
-            pkcol = self._get_pk_col(cur, table[0])
-            pk_dict[table[0]] = pkcol
-
-        cur.close()
-        conn.close()
-
-        return pk_dict
+        return self.schema.pk_dict()
 
     def _get_split_ids(self, table_filters):
         """
@@ -1180,7 +1264,7 @@ class DDF:
         if (len(table_filters) > 1):
             prevTable = ""
             for f in table_filters[:-1]:
-                col1 = self._get_pk_col(cur, f[1])
+                col1 = self._get_pk_col(f[1])
                 col2 = ":P" + str(int(col1[2])-1)
                 if prevTable:
                     sql = f"CREATE TEMP TABLE {f[1]} AS SELECT * "
@@ -1204,8 +1288,7 @@ class DDF:
             ids = [(r[0], r[1]) for r in cur.execute(sql)]  # , (pcol1, prevTable))
         # Simple questions, just look in L1
         else:
-            sql = f"SELECT * FROM L1 LIMIT 1"
-            for col_name in [cn[0] for cn in cur.execute(sql).description]:
+            for col_name in self.schema.columns('L1'):
                 if col_name.lower().startswith(table_filters[0][2].lower() + ":"):
                     break
             sql = f"SELECT DISTINCT [:P0] as resp, [{col_name}] as answer FROM L1 WHERE [{col_name}] IS NOT NULL"
@@ -1386,7 +1469,7 @@ class DDF:
         elapsed = end - start
         self.log.logs.info("Elapsed time for to_txt operation: " + str(elapsed))
 
-    def to_csv(self, csv_file=None, use_category_names=1, columns=None, sep=',', na_rep='', float_format=None, header=True, mode='w', encoding=None, compression='infer', quoting=csv.QUOTE_MINIMAL, quotechar="\"", line_terminator=None, chunksize=None, date_format=None, doublequote=True, escapechar=None, decimal="."):
+    def to_csv(self, csv_file=None, use_category_names=1, columns=None, sep=',', na_rep='', float_format=None, header=True, mode='w', encoding=None, compression='infer', quoting=csv.QUOTE_MINIMAL, quotechar="\"", line_terminator=None, chunksize=None, date_format=None, doublequote=True, escapechar=None, decimal=".", where=None):
         """
         This method will export VDATA to a csv file.
 
@@ -1397,7 +1480,8 @@ class DDF:
         Args:
             csv_file (str - optional): The path and name of the csv file.
             use_category_names (int - optional): 1 = use category names, 0 = use category values.
-            columns ( list - optional): The columns to export. Defaults to the exportable columns in the DDF.
+            columns ( list - optional): The columns to export, names, generic names or patterns (see to_df). Defaults to the exportable columns in the DDF.
+            where (str/list/dict - optional): The respondents to export (see to_df). Defaults to all respondents.
 
             See pandas.DataFrame.to_csv for additional information about each arg below.
 
@@ -1411,12 +1495,14 @@ class DDF:
             quoting (constant - optional): 
             quotechar (str - optional): Character used in quote fields.
             line_terminator (str - optional): Newline character to use in output file.
-            chunksize (int - optional): Number of rows to write at a time.
+            chunksize (int - optional): Number of respondents decoded and written at a time (default 10000).
             date_format (str - optional): Format string for dates.
             doublequote (boolean - optional): Control quoting of quotechar inside a field.
             escapechar (str - optional): Character used to escape sep and quotechar when appropriate.
             decimal (str - optional): Character recognized as decimal separator.
 
+        The respondents are decoded and written a batch (chunksize) at a time, memory does not grow with the number of respondents.
+
         Outputs:
             csv file.
 
@@ -1431,14 +1517,55 @@ class DDF:
             original_filename_without_extension = os.path.splitext(original_filename)[0]
             csv_file = os.path.normpath(original_filename_without_extension + ".csv")
 
-        df = self.to_df(use_category_names, columns=columns)
         self.log.logs.info("Writing " + csv_file)
-        df.to_csv(csv_file, sep=sep, na_rep=na_rep, float_format=float_format, columns=columns, header=header, index=False, mode=mode, encoding=encoding, compression=compression, quoting=quoting, quotechar=quotechar, line_terminator=line_terminator, chunksize=chunksize, date_format=date_format, doublequote=doublequote, escapechar=escapechar, decimal=decimal)
+        with self._open_text(csv_file, mode=mode, encoding=encoding, compression=compression) as f:
+            first = True
+            for df in self._casedata_batches(columns, use_category_names, where=where, batch_size=chunksize):
+                # Only the first batch writes the header
+                df.to_csv(f, sep=sep, na_rep=na_rep, float_format=float_format, header=header if first else False, index=False, quoting=quoting, quotechar=quotechar, line_terminator=line_terminator, date_format=date_format, doublequote=doublequote, escapechar=escapechar, decimal=decimal)
+                first = False
         end = datetime.datetime.now()
         elapsed = end - start
         self.log.logs.info("Elapsed time for to_csv operation: " + str(elapsed))
 
-    @ft.lru_cache(maxsize=1)
+    # File extension -> compression, for compression='infer'
+    _COMPRESSION_EXTENSIONS = {'.gz': 'gzip', '.bz2': 'bz2', '.zip': 'zip', '.xz': 'xz'}
+
+    @contextlib.contextmanager
+    def _open_text(self, path, mode='w', encoding=None, compression='infer'):
+        """
+        This method opens a text file to write an export to, compressed like pandas does it.
+
+        Usage:
+            with ddf._open_text( "test.csv.gz" ) as f:
+                f.write( ... )
+
+        Args:
+            path (str): The path of the file.
+            mode (str - optional): Python write mode.
+            encoding (str - optional): encoding to use - default is utf-8.
+            compression (str - optional): 'infer' (from the file extension), 'gzip', 'bz2', 'zip', 'xz' or None.
+
+        Returns:
+            A text file object.
+        """
+        encoding = encoding or 'utf-8'
+        if compression == 'infer':
+            compression = self._COMPRESSION_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+        if compression == 'zip':
+            # One file in the archive, named after the archive
+            name = ntpath.basename(path)
+            name = name[:-4] if name.lower().endswith('.zip') else name
+            with zipfile.ZipFile(path, mode, compression=zipfile.ZIP_DEFLATED) as archive:
+                with io.TextIOWrapper(archive.open(name, 'w'), encoding=encoding, newline='') as f:
+                    yield f
+        else:
+            opener = {None: open, 'gzip': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}[compression]
+            with opener(path, mode if compression is None else mode + 't', encoding=encoding, newline='') as f:
+                yield f
+
+    @memoized
     def _list_of_all_var_names(self):
         """
         This function will query the .MDD and return a set of all variable names.
@@ -1462,7 +1589,7 @@ class DDF:
         # var_lst = [var.FullName for var in self.mdm.VariableInstances if var.IsSystem == True ]
         return var_lst
 
-    @ft.lru_cache(maxsize=1)
+    @memoized
     def _list_of_exportable_var_names(self):
         """
         This function will query the .MDD and return a set of names of 
@@ -1480,47 +1607,102 @@ class DDF:
         Returns:
             set of var names (set of strings)
         """
+        # Variables that are a CORTEX question or a shell question or a question flagged not exportable,
+        #   these are not uploaded to the database. One lookup in the property index instead of a scan of every field.
+        excluded = set()
+        for entry in self.mdm.find_by_property('IIS_StandardShellTranslated') + self.mdm.find_by_property('IIS_CortexQuestionDescription') + self.mdm.find_by_property('IIS_ExcludeFromDataExport'):
+            if ( entry.Kind == 'variable' and entry.Property in ['IIS_StandardShellTranslated', 'IIS_CortexQuestionDescription'] ):
+                excluded.add(entry.Id)
+            elif ( entry.Kind == 'variable' and entry.Property == 'IIS_ExcludeFromDataExport' and entry.Value ):
+                excluded.add(entry.Id)
+
         var_lst = []
         for var in self.mdm.VariableInstances:
-            skip_q = False
-            # Check the properties to see if it is a CORTEX question or a shell question or a question flagged not exportable.
-            #   if so, do not upload to the database.
-            if (var.FullName not in ['resp_age', 'resp_gender']):
-                use_name = var.FullName
-                if ( var.FullName.find( '[' ) > -1 ):
-                    use_name = ''
-                    parts = var.FullName.split( '.' )
-                    for part in parts:
-                        if ( part.find( '[' ) > -1 ):
-                            use_name += part[:part.find( '[' )] + '[..].'
-                        else:
-                            use_name += part + '.'
-                    use_name = use_name[:-1]
-
-                for prop in self.mdm.Fields[use_name].Properties._items:
-                    if ( prop.Name in ['IIS_StandardShellTranslated', 'IIS_CortexQuestionDescription'] ):
-                        skip_q = True
-                        break
-                    elif ( ( prop.Name == 'IIS_ExcludeFromDataExport') and prop.Value ):
-                        skip_q = True
-                        break
+            skip_q = var.UUID in excluded and var.FullName not in ['resp_age', 'resp_gender']
 
             if ( not ( skip_q ) and var.HasCaseData ):
                 var_lst.append( var.FullName.lower() )
 
         return var_lst
 
-    def to_df(self, use_category_names=1, columns=None):
+    def variable_catalog(self, include_system=False):
+        """
+        This method walks the variable instances once and returns the catalog of the mdd variables.
+
+        Usage:
+            catalog = ddf.variable_catalog()
+            grids = catalog[catalog['name'] != catalog['generic_name']]
+
+        Args:
+            include_system (boolean - optional): When True - the system variables (Respondent.Serial, DataCollection.*, ...) are included. Defaults to False.
+
+        Returns:
+            A Pandas DataFrame with one row per variable instance and the columns:
+                name (str): The full name, e.g. Q9[{_5}].inn1
+                generic_name (str): The name with the iterations collapsed, e.g. Q9[..].inn1
+                datatype (int): see _DATATYPE_* constants
+                min_value, max_value (numeric): NaN when the mdd value is not a number
+                label (str)
+                category_names (list): The category names, empty for non categorical variables
+                category_labels (dict): category name -> label
+                has_case_data (bool)
+                is_system (bool)
+                properties (dict): property name -> value of the field the variable belongs to
+            Grid iterations of a question share the same category_names/category_labels/properties objects.
+        """
+        self.log.logs.info("Building the variable catalog")
+        rows = []
+        categories_cache = {}
+        properties_cache = {}
+        name_index = self.mdm.NameIndex
+
+        for v in self.mdm.VariableInstances:
+            if v.IsSystem and not include_system:
+                continue
+
+            categories = categories_cache.get(id(v.Categories))
+            if categories is None:
+                categories = categories_cache[id(v.Categories)] = (
+                    [c.Name for c in v.Categories.values()],
+                    {c.Name: c.Label for c in v.Categories.values()},
+                    v.Categories
+                )
+
+            generic_name = name_index.Generic(v.FullName)
+            properties = properties_cache.get(generic_name)
+            if properties is None:
+                field = name_index.Field(generic_name)
+                properties = properties_cache[generic_name] = {p.Name: p.Value for p in field.Properties} if field is not None else {}
+
+            rows.append((v.FullName, generic_name, v.DataType, v.MinValue, v.MaxValue, v.Label, categories[0], categories[1], v.HasCaseData, v.IsSystem, properties))
+
+        catalog = pandas.DataFrame.from_records(rows, columns=['name', 'generic_name', 'datatype', 'min_value', 'max_value', 'label', 'category_names', 'category_labels', 'has_case_data', 'is_system', 'properties'])
+        catalog['datatype'] = catalog['datatype'].astype(int)
+        catalog['min_value'] = pandas.to_numeric(catalog['min_value'], errors='coerce')
+        catalog['max_value'] = pandas.to_numeric(catalog['max_value'], errors='coerce')
+        catalog['has_case_data'] = catalog['has_case_data'].astype(bool)
+        catalog['is_system'] = catalog['is_system'].astype(bool)
+        return catalog
+
+    def to_df(self, use_category_names=1, columns=None, multi_punch='string', categorical=False, workers=1, where=None):
         """
         This method will create a Pandas DataFrame from VDATA.
 
         Usage:
             df = ddf.to_df( )
             df = ddf.to_df( use_category_names = 0 )
+            df = ddf.to_df( multi_punch = 'list', categorical = True )
+            df = ddf.to_df( columns = [ 'respondent.serial', 'q9[..].inn1', DDF.GRID ] )
+            df = ddf.to_df( where = { 'd1a': [ 'uk', 'fr' ] } )
 
         Args:
             use_category_names (int - optional): 1 = use category names, 0 = use category values.
-            columns: (list - optional): list of columns to export. Defaults to the list of exportable columns in the DDF
+            columns: (list - optional): list of columns to export, see _resolve_columns. Defaults to the list of exportable columns in the DDF
+            multi_punch (str - optional): 'string' = multi-punch responses as "name;name;" (default), 'list' = as a list of names/values.
+            categorical (boolean - optional): When True - single-punch columns are exported as pandas Categorical (category names only).
+            workers (int - optional): The number of processes used to read the Levels tables (and groups of L1 columns) in parallel. Defaults to 1.
+            where (str/list/dict - optional): Only export these respondents, a WHERE clause on L1, a list of Respondent.Serial values or
+                a dict of variable -> category names (see _respondent_keys). Defaults to all respondents.
 
         Returns:
             Pandas DataFrame.
@@ -1529,15 +1711,18 @@ class DDF:
         self.log.logs.info("Extracting Dimensions VDATA to Pandas Data Frame")
         self.log.logs.info("Retrieving Dimensions VDATA.")
 
-        if columns:
-            var_string = ', '.join(columns)
-        else:
-            var_string = ', '.join(self._list_of_exportable_var_names())
+        var_string = ', '.join(self._resolve_columns(columns))
 
-        self._get_casedata( var_string.lower(), use_category_names )
+        resp_index, case_columns, kinds = self._get_casedata( var_string.lower(), use_category_names, multi_punch, workers, where )
 
-        self.log.logs.info("Final Count : " + str( len( self.resp_dict ) ) )
-        df = pandas.DataFrame.from_dict( self.resp_dict ).transpose()
+        self.log.logs.info("Final Count : " + str( len( resp_index ) ) )
+        df = pandas.DataFrame( case_columns, index = resp_index, dtype = object, copy = False )
+        del case_columns
+
+        if categorical and use_category_names == 1:
+            for name, kind in kinds.items():
+                if kind == 'single':
+                    df[name] = pandas.Categorical(df[name], categories=self._category_names(name, df[name]))
 
         end = datetime.datetime.now()
         elapsed = end - start
@@ -1545,24 +1730,132 @@ class DDF:
         
         return df
 
-    def to_excel(self, xlsx_file=None, use_category_names=1, sheet_name='VDATA', na_rep='', float_format=None, columns=None, header=True, startrow=0, startcol=0, engine=None, merge_cells=True, encoding=None, inf_rep='inf', verbose=True, freeze_panes=None):
+    def iter_batches(self, batch_size=None, columns=None, where=None, use_category_names=1, multi_punch='string', records=False):
+        """
+        This method walks VDATA a batch of respondents at a time, memory is bounded by the batch size and the first
+        batch is available as soon as it is decoded.
+
+        Usage:
+            for df in ddf.iter_batches( 5000 ):
+                upload( df )
+            for rows in ddf.iter_batches( 1000, columns = [ 'respondent.serial', 'q9[..].inn1' ], where = '[D1a:C1] = 2', records = True ):
+                post( rows )
+
+        Args:
+            batch_size (int - optional): Number of respondents per batch (default 10000).
+            columns (list - optional): The columns to export, names, generic names or patterns (see to_df). Defaults to the exportable columns in the DDF.
+            where (str/list/dict - optional): The respondents to export (see to_df). Defaults to all respondents.
+            use_category_names (int - optional): 1 = use category names, 0 = use category values.
+            multi_punch (str - optional): 'string' = multi-punch responses as "name;name;" (default), 'list' = as a list of names/values.
+            records (boolean - optional): When True - each batch is a list of dicts (column -> value), one per respondent.
+
+        Returns:
+            A generator of Pandas DataFrames (indexed by the respondent key :P0, the same columns as to_df) or lists of records.
+            Each batch reads only its :P0 range from L1 and the loop tables.
+        """
+        for df in self._casedata_batches(columns, use_category_names, multi_punch=multi_punch, where=where, batch_size=batch_size):
+            if len(df) == 0:
+                continue
+            if records:
+                yield [dict(zip(df.columns, row)) for row in df.itertuples(index=False, name=None)]
+            else:
+                yield df
+
+    def to_level_dfs(self, use_category_names=1, columns=None, multi_punch='string', where=None):
+        """
+        This method will create one Pandas DataFrame per Levels table, loops keep their natural long shape.
+
+        Usage:
+            dfs = ddf.to_level_dfs( )
+            q10b = dfs[ 'Q10[..].Q10b' ]     # one row per respondent, Q10 iteration and Q10b iteration
+            dfs = ddf.to_level_dfs( columns = [ 'q10[..].q10b[..].val' ], where = '[D1a:C1] = 2' )
+
+        Args:
+            use_category_names (int - optional): 1 = use category names, 0 = use category values (also for the loop iterations).
+            columns (list - optional): The columns to export, names, generic names or patterns (see to_df). Defaults to the exportable columns in the DDF.
+            multi_punch (str - optional): 'string' = multi-punch responses as "name;name;" (default), 'list' = as a list of names/values.
+            where (str/list/dict - optional): The respondents to export (see to_df). Defaults to all respondents.
+
+        Returns:
+            OrderedDict: HDATA (the respondent table) / generic loop name -> Pandas DataFrame. The columns of a DataFrame are the
+            keys of its table (:Pn ... :P0, the respondent key first), the iteration of each loop level, named after the loop,
+            and the variables of the table. Tables without exported variables are left out.
+        """
+        start = datetime.datetime.now()
+        self.log.logs.info("Extracting Dimensions VDATA to one Pandas Data Frame per level")
+
+        dfs = OrderedDict(self._level_frames(self._resolve_columns(columns), use_category_names, multi_punch, where))
+
+        end = datetime.datetime.now()
+        elapsed = end - start
+        self.log.logs.info("Elapsed time for to_level_dfs operation: " + str(elapsed))
+
+        return dfs
+
+    def to_level_parquet(self, output_dir=".", use_category_names=1, columns=None, where=None):
+        """
+        This method will create one Apache Parquet file per Levels table, loops keep their natural long shape (see to_level_dfs).
+
+        Usage:
+            files = ddf.to_level_parquet( output_dir = "./levels" )     # [ './levels/HDATA.parquet', ..., './levels/Q10.Q10b.parquet' ]
+
+        Args:
+            output_dir (str - optional): The folder to write the files to.
+            use_category_names (int - optional): 1 = use category names, 0 = use category values.
+            columns (list - optional): The columns to export, names, generic names or patterns (see to_df). Defaults to the exportable columns in the DDF.
+            where (str/list/dict - optional): The respondents to export (see to_df). Defaults to all respondents.
+
+        Multi-punch variables are written as lists. Requires pyarrow.
+
+        Outputs:
+            Parquet files, named after the loops.
+
+        Returns:
+            The list of files written.
+        """
+        import pyarrow, pyarrow.parquet
+
+        start = datetime.datetime.now()
+        self.log.logs.info("Converting Dimensions VDATA to one parquet file per level")
+
+        files = []
+        for name, df in self._level_frames(self._resolve_columns(columns), use_category_names, 'list', where):
+            parquet_file = os.path.join(output_dir, name.replace('[..]', '') + ".parquet")
+            self.log.logs.info("Writing " + parquet_file)
+            pyarrow.parquet.write_table(pyarrow.Table.from_pandas(df, preserve_index=False), parquet_file)
+            files.append(parquet_file)
+
+        end = datetime.datetime.now()
+        elapsed = end - start
+        self.log.logs.info("Elapsed time for to_level_parquet operation: " + str(elapsed))
+
+        return files
+
+    def to_excel(self, xlsx_file=None, use_category_names=1, sheet_name='VDATA', na_rep='', float_format=None, columns=None, header=True, startrow=0, startcol=0, engine=None, merge_cells=True, encoding=None, inf_rep='inf', verbose=True, freeze_panes=None, where=None, constant_memory=False, labels_sheet=None, batch_size=None):
         """
         This method will create an Excel file from VDATA.
 
         Usage:
             ddf.to_excel( xlsx_file = "test.xlsx" )
             ddf.to_excel( xlsx_file = "test.xlsx", sheet_name = 'ProjectData' )
+            ddf.to_excel( xlsx_file = "test.xlsx", constant_memory = True, labels_sheet = 'Labels' )
 
         Args:
             xlsx_file(str - optional): Path and name of Excel file.
             use_category_names (int - optional): 1 = use category names, 0 = use category values.
+            where (str/list/dict - optional): The respondents to export (see to_df). Defaults to all respondents.
+            constant_memory (boolean - optional): When True - the respondents are decoded a batch at a time and streamed row by row
+                with xlsxwriter's constant memory mode, see _to_excel_constant_memory. Only sheet_name, na_rep, columns, header and
+                freeze_panes apply in this mode.
+            labels_sheet (str - optional): constant_memory only - the name of a sheet listing the label and categories of each variable.
+            batch_size (int - optional): constant_memory only - number of respondents decoded at a time (default 10000).
 
             See pandas.DataFrame.to_excel for additional information about each arg below.
 
             sheet_name (str - optional): Name of the excel sheet to store VDATA in.
             na_rep (str - optional): The value to use for missing data.
             float_format (str - optional): The format to use for real numbers.
-            columns (str - optional): The columns to export.
+            columns (list - optional): The columns to export, names, generic names or patterns (see to_df).
             header (bool/str - optional): Write out column headers or a list with column header aliases. 
             startrow (int - optional): The upper left cell row to dump the data.
             startcol (int - optional): The upper left cell column to dump the data.
@@ -1587,14 +1880,95 @@ class DDF:
             original_filename_without_extension = os.path.splitext(original_filename)[0]
             xlsx_file = os.path.normpath(original_filename_without_extension + ".xlsx")
 
-        df = self.to_df(use_category_names)
+        if constant_memory:
+            self._to_excel_constant_memory(xlsx_file, use_category_names, sheet_name=sheet_name, na_rep=na_rep, columns=columns, header=header, freeze_panes=freeze_panes, where=where, labels_sheet=labels_sheet, batch_size=batch_size)
+            end = datetime.datetime.now()
+            self.log.logs.info("Elapsed time for to_excel operation: " + str(end - start))
+            return
+
+        df = self.to_df(use_category_names, columns=columns, where=where)
         self.log.logs.info("Writing " + xlsx_file)
-        df.to_excel(xlsx_file, sheet_name=sheet_name, na_rep=na_rep, float_format=float_format, columns=columns, header=header, index=False, startrow=startrow, startcol=startcol, engine=engine, merge_cells=merge_cells, encoding=encoding, inf_rep=inf_rep, verbose=verbose, freeze_panes=freeze_panes)
+        df.to_excel(xlsx_file, sheet_name=sheet_name, na_rep=na_rep, float_format=float_format, header=header, index=False, startrow=startrow, startcol=startcol, engine=engine, merge_cells=merge_cells, encoding=encoding, inf_rep=inf_rep, verbose=verbose, freeze_panes=freeze_panes)
         end = datetime.datetime.now()
         elapsed = end - start
         self.log.logs.info("Elapsed time for to_excel operation: " + str(elapsed))
 
-    def to_feather(self, feather_file=None, use_category_names=1):
+    # The size of an Excel worksheet
+    _EXCEL_MAX_ROWS = 1048576
+    _EXCEL_MAX_COLUMNS = 16384
+
+    def _to_excel_constant_memory(self, xlsx_file, use_category_names=1, sheet_name='VDATA', na_rep='', columns=None, header=True, freeze_panes=None, where=None, labels_sheet=None, batch_size=None):
+        """
+        This method streams VDATA into an Excel file with xlsxwriter's constant memory mode, each row is written to disk
+        as soon as the next one starts so memory is bounded by the respondent batch.
+
+        Sheets roll over past the Excel limits: the columns are split into groups of 16384 and the respondents into
+        groups of 1048576 rows (less the header), the extra sheets are named sheet_name_2, sheet_name_3, ...
+
+        Args:
+            See to_excel.
+
+        Outputs:
+            Excel file.
+
+        Returns:
+            None
+        """
+        questions = self._resolve_columns(columns)
+        names = list(header) if isinstance(header, (list, tuple)) else questions
+        header_rows = 0 if header is False else 1
+        rows_per_sheet = self._EXCEL_MAX_ROWS - header_rows
+        column_groups = [(g, g + self._EXCEL_MAX_COLUMNS) for g in range(0, max(len(questions), 1), self._EXCEL_MAX_COLUMNS)]
+
+        import xlsxwriter
+
+        self.log.logs.info("Writing " + xlsx_file)
+        workbook = xlsxwriter.Workbook(xlsx_file, {'constant_memory': True})
+        worksheets = {}
+
+        def worksheet(part, group):
+            # The sheet of a ( row part, column group ), created with its header the first time it is used
+            if (part, group) not in worksheets:
+                index = part * len(column_groups) + group
+                ws = workbook.add_worksheet(sheet_name if index == 0 else sheet_name[:27] + "_" + str(index + 1))
+                if header_rows > 0:
+                    ws.write_row(0, 0, names[column_groups[group][0]:column_groups[group][1]])
+                if freeze_panes is not None:
+                    ws.freeze_panes(*freeze_panes)
+                worksheets[(part, group)] = ws
+            return worksheets[(part, group)]
+
+        row = 0
+        for df in self._casedata_batches(questions, use_category_names, where=where, batch_size=batch_size, resolved=True):
+            for values in df.itertuples(index=False, name=None):
+                part, sheet_row = divmod(row, rows_per_sheet)
+                for group, (first, last) in enumerate(column_groups):
+                    worksheet(part, group).write_row(header_rows + sheet_row, 0, [na_rep if value is None else value for value in values[first:last]])
+                row += 1
+
+        # The header only sheets of an export without respondents
+        for group in range(len(column_groups)):
+            worksheet(0, group)
+
+        if labels_sheet is not None:
+            self._write_labels_sheet(workbook.add_worksheet(labels_sheet), questions)
+
+        workbook.close()
+
+    def _write_labels_sheet(self, ws, questions):
+        # One row per category ( one row for a variable without categories ): name, label, category name, value and label
+        ws.write_row(0, 0, ['Variable', 'Label', 'Category', 'Value', 'Category Label'])
+        row = 1
+        for name in questions:
+            v = self.mdm.NameIndex.VariableInstance(name)
+            if v is None:
+                continue
+            categories = list(v.Categories.values())
+            for c in (categories if len(categories) > 0 else [None]):
+                ws.write_row(row, 0, [v.FullName, v.Label or ''] + ([c.Name, c.Value, c.Label or ''] if c is not None else []))
+                row += 1
+
+    def to_feather(self, feather_file=None, use_category_names=1, where=None):
         """
         This method will create an Apache Arrow-based Feather file from VDATA.
 
@@ -1605,6 +1979,7 @@ class DDF:
         Args:
             feather_file (str - optional): Path and name of feather file.
             use_category_names (int - optional): 1 = use category names, 0 = use category values.
+            where (str/list/dict - optional): The respondents to export (see to_df). Defaults to all respondents.
 
         Outputs:
             Feather file.
@@ -1620,13 +1995,282 @@ class DDF:
             original_filename_without_extension = os.path.splitext(original_filename)[0]
             feather_file = os.path.normpath(original_filename_without_extension + ".feather")
 
-        df = self.to_df(use_category_names)
+        df = self.to_df(use_category_names, where=where)
         self.log.logs.info("Writing " + feather_file)
         df.reset_index().to_feather(feather_file)
         end = datetime.datetime.now()
         elapsed = end - start
         self.log.logs.info("Elapsed time for to_feather operation: " + str(elapsed))
 
+    def to_parquet(self, parquet_file=None, columns=None, where=None, batch_size=None, use_category_labels=True, compression='snappy'):
+        """
+        This method will create an Apache Parquet file from VDATA, the respondents are streamed into one row group per batch.
+
+        Usage:
+            ddf.to_parquet( parquet_file = "test.parquet" )
+            ddf.to_parquet( parquet_file = "test.parquet", columns = [ 'respondent.serial', 'q9[..].inn1' ], where = '[D1a:C1] = 2' )
+
+        Args:
+            parquet_file (str - optional): Path and name of parquet file.
+            columns (list - optional): The columns to export, names, generic names or patterns (see to_df). Defaults to the exportable columns in the DDF.
+            where (str/list/dict - optional): The respondents to export (see to_df). Defaults to all respondents.
+            batch_size (int - optional): Number of respondents decoded and written at a time, one row group each (default 10000).
+            use_category_labels (boolean - optional): When True - categories are exported as their labels, as their names otherwise.
+            compression (str - optional): The parquet compression codec.
+
+        Single-punch variables are dictionary encoded with the categories of the variable as the dictionary, multi-punch
+        variables are lists. The mdd name, label, datatype and categories of each variable are stored in the schema metadata
+        ( key 'mdd', a JSON object keyed on column name ) and in the metadata of its field. A category value that is not
+        one of the categories of its variable raises a KeyError. Requires pyarrow.
+
+        Outputs:
+            Parquet file.
+
+        Returns:
+            None
+        """
+        import pyarrow, pyarrow.parquet
+
+        start = datetime.datetime.now()
+        self.log.logs.info("Converting Dimensions VDATA to parquet file")
+
+        if (parquet_file is None):
+            original_filename = ntpath.basename(self.ddf)
+            original_filename_without_extension = os.path.splitext(original_filename)[0]
+            parquet_file = os.path.normpath(original_filename_without_extension + ".parquet")
+
+        questions = self._resolve_columns(columns)
+        arrow_columns = self._arrow_columns(questions, use_category_labels)
+
+        # The field metadata of every column again at schema level, where most readers look for it
+        variables = OrderedDict()
+        for name, (field, _) in arrow_columns.items():
+            variables[name] = {key.decode(): value.decode() for key, value in field.metadata.items()}
+            if 'categories' in variables[name]:
+                variables[name]['categories'] = json.loads(variables[name]['categories'])
+        schema = pyarrow.schema([field for field, _ in arrow_columns.values()], metadata={'mdd': json.dumps(variables)})
+
+        self.log.logs.info("Writing " + parquet_file)
+        writer = pyarrow.parquet.ParquetWriter(parquet_file, schema, compression=compression)
+        try:
+            for df in self._casedata_batches(questions, 0, multi_punch='list', where=where, batch_size=batch_size, resolved=True):
+                arrays = [encode(df[name].values) for name, (_, encode) in arrow_columns.items()]
+                writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+        finally:
+            writer.close()
+
+        end = datetime.datetime.now()
+        elapsed = end - start
+        self.log.logs.info("Elapsed time for to_parquet operation: " + str(elapsed))
+
+    def _arrow_columns(self, questions, use_category_labels=True):
+        """
+        This method builds the Arrow field of each exported variable and the function that encodes its case data.
+
+        Args:
+            questions (list of str): The lower case variable names, as returned by _resolve_columns.
+            use_category_labels (boolean - optional): When True - categories are encoded as their labels, as their names otherwise.
+
+        Returns:
+            OrderedDict: variable name -> ( pyarrow.Field, encode ), encode maps the values of a case data batch
+                ( category values, see _casedata_batches ) to a pyarrow Array of the field type.
+        """
+        import pyarrow
+
+        arrow_columns = OrderedDict()
+        for name, kind in self._question_kinds(questions).items():
+            v = self.mdm.NameIndex.VariableInstance(name)
+            metadata = {'name': name, 'label': '', 'datatype': ''}
+            categories = []
+            if v is not None:
+                metadata = {'name': v.FullName, 'label': v.Label or '', 'datatype': str(v.DataType)}
+                categories = list(v.Categories.values())
+                if len(categories) > 0:
+                    metadata['categories'] = json.dumps([{'name': c.Name, 'label': c.Label, 'value': c.Value} for c in categories])
+
+            # Category value -> the name or label it is exported as, names when the labels are not unique
+            display = [c.Name for c in categories]
+            if use_category_labels and len(set(c.Label or c.Name for c in categories)) == len(categories):
+                display = [c.Label or c.Name for c in categories]
+            values = {c.Value: i for i, c in enumerate(categories)}
+
+            if kind == 'single':
+                dictionary = pyarrow.array(display, type=pyarrow.string())
+                arrow_type = pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+                encode = lambda column, name=name, values=values, dictionary=dictionary: pyarrow.DictionaryArray.from_arrays(
+                    pyarrow.array(self._category_positions(name, [None if value == -1 else value for value in column], values), type=pyarrow.int32()), dictionary)
+            elif kind == 'multi':
+                arrow_type = pyarrow.list_(pyarrow.string())
+                encode = lambda column, name=name, values=values, display=display, arrow_type=arrow_type: pyarrow.array(
+                    [None if value is None else [display[i] for i in self._category_positions(name, value, values)] for value in column], type=arrow_type)
+            elif kind == 'date':
+                arrow_type = pyarrow.timestamp('s')
+                encode = lambda column, arrow_type=arrow_type: pyarrow.array(
+                    [None if pandas.isnull(value) else value.to_pydatetime() for value in pandas.to_datetime(pandas.Series(column, dtype=object), errors='coerce')], type=arrow_type)
+            elif kind == 'boolean':
+                arrow_type = pyarrow.bool_()
+                encode = lambda column, arrow_type=arrow_type: pyarrow.array([None if value is None else bool(value) for value in column], type=arrow_type)
+            elif kind == 'numeric' and metadata['datatype'] == '1':
+                arrow_type = pyarrow.int64()
+                encode = lambda column, arrow_type=arrow_type: pyarrow.array([None if value is None else int(value) for value in column], type=arrow_type)
+            elif kind == 'numeric':
+                arrow_type = pyarrow.float64()
+                encode = lambda column, arrow_type=arrow_type: pyarrow.array([None if value is None else float(value) for value in column], type=arrow_type)
+            else:
+                arrow_type = pyarrow.string()
+                encode = lambda column, arrow_type=arrow_type: pyarrow.array([None if value is None else str(value) for value in column], type=arrow_type)
+
+            arrow_columns[name] = (pyarrow.field(name, arrow_type, metadata=metadata), encode)
+
+        return arrow_columns
+
+    def _category_positions(self, name, codes, positions):
+        # The position of each category value in positions ( category value -> position ), None stays None, unknown values raise
+        result = [None if code is None else positions.get(code, -1) for code in codes]
+        if -1 in result:
+            unknown = sorted(set(code for code, position in zip(codes, result) if position == -1))
+            self.log.logs.error("Unknown category value in " + name + ": " + str(unknown))
+            raise KeyError("Unknown category value in " + name + ": " + str(unknown))
+        return result
+
+    def to_sav(self, sav_file=None, columns=None, where=None, batch_size=None, file_label=''):
+        """
+        This method will create an SPSS .sav file from VDATA with the variable labels, value labels and measurement levels of the mdd.
+
+        Usage:
+            ddf.to_sav( sav_file = "test.sav" )
+            ddf.to_sav( sav_file = "test.sav", columns = [ 'respondent.serial', 'q2', 'q9[..].inn1' ], where = { 'd1a': 'fr' } )
+
+        Args:
+            sav_file (str - optional): Path and name of sav file.
+            columns (list - optional): The columns to export, names, generic names or patterns (see to_df). Defaults to the exportable columns in the DDF.
+            where (str/list/dict - optional): The respondents to export (see to_df). Defaults to all respondents.
+            batch_size (int - optional): Number of respondents decoded at a time (default 10000).
+            file_label (str - optional): The SPSS file label.
+
+        The case data is decoded a batch at a time straight to category values and numbers (no text decoding) into
+        SPSS columns allocated once for all respondents, pyreadstat then writes the whole file in one call so these
+        columns are held in memory ( one float per respondent and variable / dichotomy ). Variable names are made valid SPSS names
+        (q9[{brand_a}].inn1 -> q9_brand_a_inn1), multi-punch variables are expanded to one 0/1 dichotomy per category.
+
+        Outputs:
+            sav file.
+
+        Returns:
+            None
+        """
+        import pyreadstat
+
+        start = datetime.datetime.now()
+        self.log.logs.info("Converting Dimensions VDATA to sav file")
+
+        if (sav_file is None):
+            original_filename = ntpath.basename(self.ddf)
+            original_filename_without_extension = os.path.splitext(original_filename)[0]
+            sav_file = os.path.normpath(original_filename_without_extension + ".sav")
+
+        questions = self._resolve_columns(columns)
+        kinds = self._question_kinds(questions)
+        variables = self._spss_variables(kinds)
+
+        total = self.count() if where is None else len(self._respondent_keys(where))
+        columns = self._spss_columns(kinds, variables, total)
+        offset = 0
+        for df in self._casedata_batches(questions, 0, multi_punch='list', where=where, batch_size=batch_size, resolved=True):
+            self._spss_batch(df, kinds, variables, columns, offset)
+            offset += len(df)
+        data = pandas.DataFrame(OrderedDict((spss_name, column[:offset]) for spss_name, column in columns.items()), copy=False)
+
+        specs = [spec for name in variables for spec in variables[name]]
+        self.log.logs.info("Writing " + sav_file)
+        pyreadstat.write_sav(data, sav_file, file_label=file_label,
+                             column_labels=[spec[1] for spec in specs],
+                             variable_value_labels={spec[0]: spec[2] for spec in specs if spec[2]},
+                             variable_measure={spec[0]: spec[3] for spec in specs})
+
+        end = datetime.datetime.now()
+        elapsed = end - start
+        self.log.logs.info("Elapsed time for to_sav operation: " + str(elapsed))
+
+    # Words SPSS does not accept as variable names
+    _SPSS_RESERVED = {'ALL', 'AND', 'BY', 'EQ', 'GE', 'GT', 'LE', 'LT', 'NE', 'NOT', 'OR', 'TO', 'WITH'}
+
+    def _spss_name(self, name, used):
+        # A valid SPSS variable name for name that is not in used ( lower case names ), q9[{brand_a}].inn1 -> q9_brand_a_inn1
+        base = re.sub(r'[^A-Za-z0-9_]+', '_', name).strip('_')
+        if not base or not base[0].isalpha():
+            base = 'v_' + base
+        if base.upper() in self._SPSS_RESERVED:
+            base += '_'
+        base = base[:60]
+
+        spss_name = base
+        k = 2
+        while spss_name.lower() in used:
+            spss_name = base + '_' + str(k)
+            k += 1
+        used.add(spss_name.lower())
+        return spss_name
+
+    def _spss_variables(self, kinds):
+        """
+        This method maps each exported variable to its SPSS variables.
+
+        Args:
+            kinds (OrderedDict): variable name -> decoder kind, see _question_kinds.
+
+        Returns:
+            OrderedDict: variable name -> list of ( SPSS name, label, value labels, measure, category value ), one entry
+                per dichotomy ( category value ) for a multi-punch variable, a single entry with category value None otherwise.
+        """
+        used = set()
+        variables = OrderedDict()
+        for name, kind in kinds.items():
+            v = self.mdm.NameIndex.VariableInstance(name)
+            label = (v.Label or '') if v is not None else ''
+            categories = list(v.Categories.values()) if v is not None else []
+
+            if kind == 'multi':
+                # The prefix of the dichotomies, only the dichotomy names are taken
+                prefix = self._spss_name(name, set(used))
+                variables[name] = [(self._spss_name(prefix + '_' + c.Name, used), label + ': ' + (c.Label or c.Name), {0: 'No', 1: 'Yes'}, 'nominal', c.Value) for c in categories]
+            elif kind == 'single':
+                variables[name] = [(self._spss_name(name, used), label, {c.Value: c.Label or c.Name for c in categories}, 'nominal', None)]
+            elif kind in ('numeric', 'date'):
+                variables[name] = [(self._spss_name(name, used), label, None, 'scale', None)]
+            else:
+                variables[name] = [(self._spss_name(name, used), label, None, 'nominal', None)]
+
+        return variables
+
+    def _spss_columns(self, kinds, variables, total):
+        # One preallocated SPSS column per SPSS variable for total respondents, missing values are NaN / NaT / ''
+        columns = OrderedDict()
+        for name, kind in kinds.items():
+            for spec in variables[name]:
+                if kind == 'date':
+                    columns[spec[0]] = numpy.full(total, numpy.datetime64('NaT'), dtype='datetime64[ns]')
+                elif kind in ('multi', 'single', 'numeric', 'boolean'):
+                    columns[spec[0]] = numpy.full(total, numpy.nan, dtype=float)
+                else:
+                    columns[spec[0]] = numpy.full(total, '', dtype=object)
+        return columns
+
+    def _spss_batch(self, df, kinds, variables, columns, offset):
+        # Write a case data batch ( category values, see _casedata_batches ) into the SPSS columns ( see _spss_columns ) from row offset
+        rows = slice(offset, offset + len(df))
+        for name, kind in kinds.items():
+            values = df[name].values
+            if kind == 'multi':
+                for spss_name, _, _, _, category_value in variables[name]:
+                    columns[spss_name][rows] = [numpy.nan if value is None else float(category_value in value) for value in values]
+            elif kind in ('single', 'numeric', 'boolean'):
+                columns[variables[name][0][0]][rows] = [numpy.nan if value is None or (kind == 'single' and value == -1) else float(value) for value in values]
+            elif kind == 'date':
+                columns[variables[name][0][0]][rows] = pandas.to_datetime(pandas.Series(values, dtype=object), errors='coerce').values
+            else:
+                columns[variables[name][0][0]][rows] = ['' if value is None else str(value) for value in values]
+
     def _vacuum(self):
         """
         This method rebuilds the ddf, repacking it into a minimal amount of disk space.
@@ -1684,9 +2328,8 @@ class DDF:
 
         # Check that the columns specified as parameters exist in the DDF - exit with error when it is an issue
         err_msg = ""
-        list_of_all_vars = self._list_of_all_var_names()
 
-        if source_column_name.lower() not in list_of_all_vars:
+        if source_column_name not in self.mdm.NameIndex:
             err_msg += f"Source column {source_column_name} not found in the MDD. "
 
         data_type = self._get_variable_datatype(source_column_name)
@@ -1698,7 +2341,7 @@ class DDF:
             err_msg += f"Destination variable {extract_column_name} is part of a grid, and should be a standalone text variable. "
 
         # Does the new extract column already exist - and is it a problem?
-        var_exists = extract_column_name.lower() in list_of_all_vars
+        var_exists = extract_column_name in self.mdm.NameIndex
         if var_exists and (not overwrite):
             err_msg += f"MDD variable {extract_column_name} already exists and overwrite is set to False. "
         if (not var_exists) and (not create_new_text_field):
@@ -1738,15 +2381,18 @@ class DDF:
         if (column_label is None):
             column_label = column_name
         # Need to add to the mdd and the ddf
-        if ( not self.mdm.Fields[ column_name ] ):
+        if ( self.mdm.NameIndex.Field( column_name ) is None ):
             conn = sqlite3.connect(self.ddf)
             cur = conn.cursor()
             cur.execute( "ALTER TABLE L1 ADD COLUMN [" + column_name + ":X] text;" )
             conn.commit()
+            DDFSchema.invalidate( self.ddf )
             conn.close()
 
             var = Variable( column_name, str( uuid.uuid4() ),2 , '1', '4000', 0, 0, self.mdm.Languages.Base, self.mdm.Contexts.Base )
             self.mdm.Fields._items[ column_name ] = var
+            # The name index is rebuilt with the new field on its next use
+            self.mdm._name_index = None
 
             filename = ntpath.basename( self.mdd )
             location = ntpath.dirname( self.mdd )
@@ -1930,10 +2576,11 @@ class DDF:
             The mapping dictionary as described above
 
         """
+        field = self.mdm.NameIndex.Field(column_name)
         if function:
-            d = { c.Value: function(c.Name) for _, c in self.mdm.Fields[column_name].Categories.items() }
+            d = { c.Value: function(c.Name) for _, c in field.Categories.items() }
         else:
-            d = { c.Value: c.Name for _, c in self.mdm.Fields[column_name].Categories.items() }
+            d = { c.Value: c.Name for _, c in field.Categories.items() }
 
         return d
 
@@ -2022,7 +2669,7 @@ class DDF:
 
         return
 
-    @ft.lru_cache(maxsize=256)
+    @memoized(maxsize=256)
     def set_of_variable_names(self, *patterns, collapse=False):
         """
         This method returns the set of variable names that match the patterns specified, optionally
@@ -2068,6 +2715,43 @@ class DDF:
 
         return result_set
 
+    def _resolve_columns(self, columns):
+        """
+        This method expands the columns of an export to the lower case names of the variable instances to export.
+
+        Usage:
+            _resolve_columns( [ 'q1', 'q9[..].inn1', 'respondent_', DDF.GRID ] )
+
+        Args:
+            columns (list of str): Each entry is a variable name ('q9[{brand_a}].inn1'), a generic name ('q9[..].inn1' - all
+                the instances of the variable, 'q10[{brand_a}].q10b[..].val' - the instances of one iteration) or a pattern
+                as used by set_of_variable_names. None - all exportable variables.
+
+        Returns:
+            list of var names (list of strings), in the order of columns
+        """
+        exportable = self._list_of_exportable_var_names()
+        if not columns:
+            return list(exportable)
+
+        names = []
+        for column in columns:
+            name = column.lower()
+            if '[..]' in name:
+                # Each [..] matches any iteration of its loop
+                generic = re.compile(re.escape(name).replace(re.escape('[..]'), r'\[[^\]]*\]'))
+                matches = [var for var in exportable if generic.fullmatch(var)]
+            elif self.mdm.NameIndex.Find(name) is not None:
+                matches = [name]
+            else:
+                pattern = re.compile(column, re.IGNORECASE)
+                matches = [var for var in exportable if pattern.match(var)]
+
+            # Unknown names are kept, they are exported as empty columns
+            names.extend(matches if matches else [name])
+
+        return list(OrderedDict.fromkeys(names))
+
     def _convert_date( self, value ):
         date_val = ''
         dt = str( value ).split('.')
@@ -2081,77 +2765,369 @@ class DDF:
 
         return date_val
 
-    def _export_data( self, col, rows, cat_map_dict, questions, use_category_names ):
-        if ( rows ):
-            try:
-                for row in rows:
-                    use_var = row[1]
-                    value = None
+    def _column_kind( self, column, use_var ):
+        # The decoder kind of a schema Column, see DDFSchema.COLUMN_KINDS and _column_decoder
+        if ( use_var.lower() == 'datacollection.finishtime' ):
+            # Required field in the respondent table
+            return 'date'
+        return column.Kind
+
+    def _fix_text( self, value ):
+        if ( value.find( "'" ) > 0 ):
+            # Fixing text that has a ' in it
+            value = value.replace( "'", "''" )
+        if ( value.find( '"' ) > 0 ):
+            # Fixing text that has a " in it
+            value = value.replace( '"', "\'" )
+        if ( value.find( "\n" ) > 0 ):
+            # Fixing text that has a return in it
+            value = value.replace( "\r", "\\r" )
+            value = value.replace( "\n", "\\n" )
+        return value
+
+    def _parse_multi_punch( self, values ):
+        """
+        Split a batch of multi-punch response strings ( '4;5;' ) in one go.
 
-                    if ( use_var.lower() == 'datacollection.finishtime' ):
-                        # Required field in the respondent table
-                        value = self._convert_date( row[ 2 ] )
-                    else:
-                        if ( str( col[0] ).endswith(':S') ):
-                            # Multi-punch - convert value to name
-                            if ( use_category_names == 1 ):
-                                if ( row[2] != '-1' and row[2] is not None ):
-                                    values = row[2].split( ';' )
-                                    value = ''
-                                    for response in values:
-                                        if ( response != '' ):
-                                            value += cat_map_dict.get( int( response ) ) + ';'
-                            else:
-                                value = row[2]
-                        elif ( str( col[0] ).endswith(':C1') ):
-                            # Simgle punch - convert value to name
-                            if ( use_category_names == 1 ):
-                                if ( row[2] != -1 ):
-                                    value = cat_map_dict.get( int( row[2] ) )
-                            else:
-                                value = int( row[2] )
-                        elif ( str( col[0] ).endswith(':T') ):
-                            # Date values
-                            value = self._convert_date( row[ 2 ] )
-                        else:
-                            value = row[ 2 ]
-
-                    if ( use_var.find( '[' ) > -1 ):
-                        if ( use_var.find( '{' ) > -1 ):
-                            parts = use_var.split( '{' )
-                            for part in parts:
-                                if ( part.find( '}' ) > -1 ):
-                                    ind = part[:part.find( '}' )]
-                                    name = cat_map_dict.get( int( ind ) )
-                                    use_var = use_var.replace( ind, name )
-
-                    if ( value is not None ):
-                        if ( str( value ).find( "'" ) > 0 ):
-                            # Fixing text that has a ' in it
-                            value = value.replace( "'", "''" )
-                        if ( str( value ).find( '"' ) > 0 ):
-                            # Fixing text that has a ' in it
-                            value = value.replace( '"', "\'" )
-                        if ( str( value ).find( "\n" ) > 0 ):
-                            # Fixing text that has a return in it
-                            value = str( value ).replace( "\r", "\\r" )
-                            value = str( value ).replace( "\n", "\\n" )
-
-                        if ( use_var in questions ):
-                            self.resp_dict[ row[0] ][ use_var ] = value
+        Returns:
+            ( valid, rows, codes ): valid marks the cells holding a response string ( not NULL or '-1' ),
+                rows and codes hold the cell position and category value of every single response.
+        """
+        values = pandas.Series( list( values ), dtype = object )
+        valid = ( values.notna() & ( values != '-1' ) ).values
+        responses = values[ valid ].str.split( ';' ).explode()
+        responses = responses[ responses.notna() & ( responses != '' ) ]
+        return valid, responses.index.values.astype( numpy.int64 ), responses.values.astype( numpy.int64 )
+
+    def _decode_multi_punch( self, values, use_category_names, multi_punch ):
+        # multi_punch = 'string': 'name;name;' ( or the raw value string ), 'list': [ name, name ] ( or [ value, value ] )
+        valid, rows, codes = self._parse_multi_punch( values )
+        items = codes
+        if ( use_category_names == 1 ):
+            items = self.mdm.CategoryMap.values_to_names( codes )
+            if ( pandas.isna( items ).any() ):
+                raise KeyError( "Unknown category value in " + str( sorted( set( codes[ pandas.isna( items ) ].tolist() ) ) ) )
+
+        decoded = numpy.full( len( valid ), None, dtype = object )
+        responses = pandas.Series( items, index = rows, dtype = object )
+        if ( multi_punch == 'list' ):
+            for pos in numpy.flatnonzero( valid ):
+                decoded[ pos ] = [ ]
+            for pos, item in zip( rows.tolist(), items.tolist() ):
+                decoded[ pos ].append( item )
+        else:
+            decoded[ valid ] = ''
+            if ( len( rows ) > 0 ):
+                joined = ( responses.astype( str ) + ';' ).groupby( level = 0, sort = False ).agg( ''.join )
+                decoded[ joined.index.values ] = joined.values
+        return decoded
+
+    def _column_decoder( self, kind, use_category_names, multi_punch = 'string' ):
+        """
+        Compile the decoder of one case data column. The decoder maps a whole batch of raw values
+        to the exported values (None = no value), so the column kind is only looked at once.
+        """
+        if ( kind == 'single' ):
+            if ( use_category_names == 1 ):
+                # Simgle punch - convert value to name, -1 and NULL have no name
+                values_to_names = self.mdm.CategoryMap.values_to_names
+                return lambda values: values_to_names( values ).tolist()
+            return lambda values: [ None if value is None else int( value ) for value in values ]
+
+        if ( kind == 'multi' ):
+            if ( use_category_names == 1 or multi_punch == 'list' ):
+                # Multi-punch - split the whole batch at once and convert values to names
+                return lambda values: self._decode_multi_punch( values, use_category_names, multi_punch )
+            return list
+
+        if ( kind == 'date' ):
+            convert_date = self._convert_date
+            return lambda values: [ None if value is None else convert_date( value ) for value in values ]
+
+        if ( kind == 'text' ):
+            fix_text = self._fix_text
+            return lambda values: [ fix_text( value ) if type( value ) is str else value for value in values ]
+
+        # numeric and boolean values are exported as they are
+        return list
+
+    def _grid_instance_prefix( self, levels, path ):
+        """
+        The variable instance name prefix of a LevelId path, the variables of the table are appended to it.
+            ( ( 'q10', False ), ( 'q10b', False ) ), ( 21, 31 )  ->  q10[{brand_a}].q10b[{attr_x}].
+        levels holds the lower case mdd name of each loop and whether it is a numeric loop ( IteratorType 3 ).
+        """
+        prefix = ''
+        for ( dscname, numeric ), level_id in zip( levels, path ):
+            if ( numeric ):
+                prefix += dscname + '[' + str( level_id ) + '].'
+            else:
+                prefix += dscname + '[{' + self.mdm.CategoryMap.ValueToName( int( level_id ) ) + '}].'
+        return prefix
+
+    def _write_case_values( self, case_data, name, kind, keys, values ):
+        # Write decoded values into case column name of case_data ( see _allocate_case_columns ) at the rows of the respondents keys ( :P0 )
+        resp_index, case_columns, kinds = case_data
+        kinds[ name ] = kind
+        case_columns[ name ][ numpy.searchsorted( resp_index, keys ) ] = values
+
+    def _object_array( self, values ):
+        if ( isinstance( values, numpy.ndarray ) and values.dtype == object ):
+            return values
+        array = numpy.empty( len( values ), dtype = object )
+        array[:] = values
+        return array
+
+    # The iteration of each loop level in a variable instance name, q10[{brand_a}].q10b[{attr_x}].val -> {brand_a}, {attr_x}
+    _ITERATION = re.compile( r'\[([^\]]*)\]' )
+
+    # Number of rows fetched and decoded at a time by _extract_table
+    _FETCH_SIZE = 50000
+
+    @staticmethod
+    def _fetch_columns( cursor, fetch_size ):
+        # The rows of an executed query fetch_size at a time, yields the columns of each batch of rows
+        while ( True ):
+            rows = cursor.fetchmany( fetch_size )
+            if ( not rows ):
+                break
+            yield list( zip( *rows ) )
+
+    def _extract_table( self, batches, specs, levels, wanted, use_category_names, multi_punch ):
+        """
+        Decode the rows of one Levels table query, yields ( variable instance name, kind, :P0 keys, values ) per case column and batch.
+
+        batches holds the columns of each batch of rows ( see _fetch_columns ), the rows are ( :P0, LevelId, ..., LevelId,
+        value, ..., value ), one LevelId per loop level and one value per spec ( column name, variable name, kind ). Each distinct LevelId path of the table is resolved
+        to its variable instance name prefix once, the rows of a batch are grouped by path once and the groups
+        are reused for every column. Only the variable instances in wanted are decoded.
+        """
+        depth = len( levels )
+        decoders = [ self._column_decoder( kind, use_category_names, multi_punch ) for _, _, kind in specs ]
+        prefixes = { }
+        for columns in batches:
+            keys = numpy.array( columns[ 0 ] )
+            if ( depth > 0 ):
+                paths, inverse = numpy.unique( numpy.array( columns[ 1:depth + 1 ] ).T, axis = 0, return_inverse = True )
+                paths = [ tuple( path ) for path in paths.tolist() ]
+                inverse = inverse.ravel()
+
+                # The row positions of each path, in row order
+                order = inverse.argsort( kind = 'stable' )
+                groups = numpy.split( order, numpy.cumsum( numpy.bincount( inverse, minlength = len( paths ) ) )[ :-1 ] )
+                for path in paths:
+                    if ( path not in prefixes ):
+                        prefixes[ path ] = self._grid_instance_prefix( levels, path )
+
+            for i, ( column_name, var_name, kind ) in enumerate( specs ):
+                try:
+                    if ( depth == 0 ):
+                        if ( var_name in wanted ):
+                            yield var_name, kind, keys, self._object_array( decoders[ i ]( columns[ i + 1 ] ) )
+                        continue
+
+                    names = [ prefixes[ path ] + var_name for path in paths ]
+                    targets = [ k for k, name in enumerate( names ) if name in wanted ]
+                    if ( len( targets ) > 0 ):
+                        values = self._object_array( decoders[ i ]( columns[ depth + i + 1 ] ) )
+                        for k in targets:
+                            yield names[ k ], kind, keys[ groups[ k ] ], values[ groups[ k ] ]
+
+                except (Exception) as error :
+                    self.log.logs.error( "Could not decode column " + column_name + " ( " + var_name + " ): " + str( error ) )
+                    raise
+
+    def _casedata_jobs( self, questions, workers = 1, filtered = False, batched = False ):
+        """
+        Plan the case data export: one ( table, sql, specs, levels ) job per Levels table, specs holds the
+        ( column name, variable name, kind ) of the columns the sql returns after :P0 and the LevelIds.
+        With several workers the columns of L1 are split into one group per worker so wide tables are read in parallel too.
+        When filtered the queries only read the respondents of temp.casedata_filter ( see _create_respondent_filter ),
+        when batched they take the first and last :P0 of a batch of respondents as parameters ( see _casedata_batches ).
+        """
+        schema = self.schema
+        jobs = []
+
+        # The questions by generic name, only the loop table columns of these are read ( q9[{brand_a}].inn1 -> q9[..].inn1 )
+        generic_questions = { }
+        for q in questions:
+            generic_questions.setdefault( self.mdm.NameIndex.Generic( q ), [ ] ).append( q )
+
+        # Pick the columns of the L1 table to export ( not the index :P0 ), all of them are then read in one scan of L1
+        specs = []
+        for col in schema.Tables[ 'L1' ].ResponseColumns:
+            if ( self.mdm.NameIndex.Field( col.Variable ) is not None ):
+                skip_q = False
+                if ( len( questions ) > 0 ):
+                    if ( not col.Variable.lower() in generic_questions ):
+                        skip_q = True
 
-            except (Exception) as error :
-                print( 'Error:' + str( error ) )
-                print( "ERROR on line " +  str( sys.exc_info()[-1].tb_lineno ) )
-                
-    def _get_casedata( self, questions_to_use, use_category_names ):
+                if ( not skip_q ):
+                    self.log.logs.info( "Exporting " + col.Variable )
+                    use_var = col.Variable.lower()
+                    specs.append( ( col.Name, use_var, self._column_kind( col, use_var ) ) )
+
+        group = max( 1, -( -len( specs ) // max( 1, workers ) ) )
+        for g in range( 0, len( specs ), group ):
+            # Get Respondent.Serial and the responses of every column
+            conditions = ( [ "[:P0] IN temp.casedata_filter" ] if filtered else [ ] ) + ( [ "[:P0] BETWEEN ? AND ?" ] if batched else [ ] )
+            sql = "SELECT [:P0], " + ", ".join( "[" + spec[0] + "]" for spec in specs[ g:g + group ] ) + " FROM L1" + ( " WHERE " + " AND ".join( conditions ) if len( conditions ) > 0 else "" ) + " ORDER BY [:P0];"
+            jobs.append( ( 'L1', sql, specs[ g:g + group ], () ) )
+
+        # Cycle through all non-L1 tables
+        for table in schema.Levels.values():
+            if ( table.Name == 'L1' ):
+                continue
+
+            # Get the response columns, not indexes or level ids
+            cols = table.ResponseColumns
+
+            if ( len( cols ) == 0 ):
+                continue
+
+            # Join the table with its parent tables once, the question names are built from the LevelId path ( see _grid_instance_prefix )
+            table_tree_list = schema.chain( table.Name )
+            levels, path_text, var_generic_name, join_text, where_text = self._level_join( table_tree_list )
+            letter = chr( 64 + len( table_tree_list ) )
+
+            # Make sure that the variables exist in the metadata and are exported, the other columns are not read
+            specs = []
+            names = []
+            for col in cols:
+                generic = ( var_generic_name + col.Variable ).lower()
+                if ( generic in generic_questions and self.mdm.NameIndex.Field( generic ) is not None ):
+                    specs.append( ( col.Name, col.Variable.lower(), self._column_kind( col, '' ) ) )
+                    names += generic_questions[ generic ]
+
+            if ( len( specs ) > 0 ):
+                # Only read the loop iterations of the exported variable instances
+                for i, level_ids in enumerate( self._level_id_filters( names, levels ) ):
+                    if ( level_ids is not None ):
+                        where_text += " AND " + chr( 65 + i ) + ".[" + table_tree_list[i].LevelId + "] IN (" + ", ".join( str( level_id ) for level_id in sorted( level_ids ) ) + ")"
+
+                # Get Respondent.Serial, the LevelId of every loop level and the responses of every column
+                l1 = chr( len( table_tree_list ) + 65 )
+                if ( filtered ):
+                    where_text += " AND " + l1 + ".[:P0] IN temp.casedata_filter"
+                if ( batched ):
+                    where_text += " AND " + l1 + ".[:P0] BETWEEN ? AND ?"
+                sql = "SELECT " + l1 + ".[:P0], " + path_text + ", ".join( letter + ".[" + spec[0] + "]" for spec in specs ) + " FROM " + join_text + " JOIN L1 as " + l1 + " WHERE " + l1 + ".[:P0] = A.[:P1]" + where_text + " ORDER BY " + l1 + ".[:P0];"
+                jobs.append( ( table.Name, sql, specs, tuple( levels ) ) )
+
+        return jobs
+
+    def _level_join( self, table_tree_list ):
+        """
+        Join a loop table with its parent loop tables ( DDFSchema.chain ), aliased A, B, ... from the top level down.
+
+        Returns:
+            ( levels, path_text, var_generic_name, join_text, where_text ): levels holds the lower case mdd name of each
+                loop and whether it is a numeric loop ( see _grid_instance_prefix ), path_text selects the LevelId of every
+                level, var_generic_name is the generic name prefix of the variables in the table ( Q10[..].Q10b[..]. ) and
+                where_text matches the indexes of the tables ( " AND ..." ).
+        """
+        levels = []
+        path_text = ""
+        var_generic_name = ""
+        join_text = ""
+        where_text = ""
+        for i in range( 0, len( table_tree_list ) ):
+            parent_info = table_tree_list[i]
+
+            # Letter for join table reference
+            letter = chr( 65 + i )
+
+            # Check iterator type
+            tmp_var = None
+            tmp_var = self.mdm.NameIndex.Field( var_generic_name + parent_info.DSCName )
+
+            levels.append( ( parent_info.DSCName.lower(), tmp_var.IteratorType == '3' ) )
+            path_text += letter + ".[" + parent_info.LevelId + "], "
+            var_generic_name += parent_info.DSCName + "[..]."
+
+            # Join with the parent table(s) to align indexes
+            if ( i > 0 ):
+                join_text += " JOIN "
+
+            join_text += parent_info.Name + " as " + letter
+
+            # Match all indexes
+            if ( i < len( table_tree_list ) -1 ):
+                for j in range( i + 1, -1, -1 ):
+                    where_text += " AND " + letter + ".[:P" + str( j ) + "] = " + chr( 65 + i + 1 ) + ".[:P" + str( j + 1 ) + "]"
+
+        return levels, path_text, var_generic_name, join_text, where_text
+
+    def _question_kinds( self, questions ):
+        # The decoder kind of each question from the columns the case data jobs read, None when no table holds the question
+        kinds = { }
+        for table, sql, specs, levels in self._casedata_jobs( questions ):
+            prefix = "".join( dscname + "[..]." for dscname, _ in levels )
+            for column_name, var_name, kind in specs:
+                kinds[ prefix + var_name ] = kind
+        return OrderedDict( ( q, kinds.get( self.mdm.NameIndex.Generic( q ) ) ) for q in questions )
+
+    def _level_id_filters( self, names, levels ):
+        """
+        The LevelIds each loop level needs for the variable instances names, None for a level where every iteration is needed.
+            [ 'q10[{brand_a}].q10b[{attr_x}].val', 'q10[{brand_b}].q10b[{attr_x}].val' ]  ->  [ { 9, 10 }, { 12 } ]
+        """
+        level_ids = [ set() for _ in levels ]
+        for name in names:
+            iterations = self._ITERATION.findall( name )
+            if ( len( iterations ) != len( levels ) ):
+                return [ None ] * len( levels )
+
+            for i, iteration in enumerate( iterations ):
+                if ( level_ids[i] is None ):
+                    continue
+                if ( iteration.startswith( '{' ) ):
+                    level_id = self.mdm.CategoryMap[ iteration.strip( '{}' ) ]
+                else:
+                    level_id = int( iteration ) if iteration.isdigit() else -1
+
+                if ( level_id == -1 ):
+                    level_ids[i] = None
+                else:
+                    level_ids[i].add( level_id )
+
+        return level_ids
+
+    @staticmethod
+    def _create_respondent_filter( cursor, keys ):
+        # The respondent keys of an export as a temp table, the queries of _casedata_jobs join it when filtered
+        cursor.execute( "CREATE TEMP TABLE casedata_filter ( [:P0] PRIMARY KEY )" )
+        cursor.executemany( "INSERT INTO temp.casedata_filter VALUES ( ? )", ( ( key, ) for key in keys ) )
+
+    def _run_casedata_job( self, cursor, job, wanted, use_category_names, multi_punch, params = () ):
+        # Execute one job of _casedata_jobs and yield the decoded ( name, kind, keys, values ) columns,
+        #   a failing query or column is logged and raised so the export does not silently miss data
+        table, sql, specs, levels = job
+        try:
+            self.log.logs.info( sql )
+            cursor.execute( sql, params )
+            yield from self._extract_table( self._fetch_columns( cursor, self._FETCH_SIZE ), specs, levels, wanted, use_category_names, multi_punch )
+        except (Exception) as error :
+            self.log.logs.error( "Case data export of " + table + " failed: " + str( error ) )
+            self.log.logs.error( sql )
+            raise
+
+    def _allocate_case_columns( self, resps, questions ):
+        # One preallocated column per question, rows are the respondents in :P0 order, returns the case data
+        #   ( respondent index, columns, decoder kind per written column ) of one export or batch.
+        #   _write_case_values writes the values straight into their cells, to_df wraps the columns without a copy.
+        case_columns = OrderedDict()
+        for q in questions:
+            if ( q not in case_columns ):
+                case_columns[ q ] = numpy.full( len( resps ), None, dtype = object )
+        return numpy.array( resps ), case_columns, { }
+
+    def _get_casedata( self, questions_to_use, use_category_names, multi_punch = 'string', workers = 1, where = None ):
         start = datetime.datetime.now()
         questions = questions_to_use.split( ', ' )
 
-        cat_map_dict = { }
-        for key in self.mdm.CategoryMap._items:
-            value = self.mdm.CategoryMap._items[ key ]
-            cat_map_dict[ value ] = str( key ).lower()
+        # The respondent filter is resolved to keys once, every table query then only reads those respondents
+        keys = self._respondent_keys( where )
 
         conn = sqlite3.connect( self.ddf )
         conn.text_factory = lambda b: b.decode(errors = 'ignore')
@@ -2162,127 +3138,188 @@ class DDF:
         c.execute('PRAGMA main.synchronous=OFF')
         c.execute('PRAGMA main.journal_mode=OFF')
 
-        c.execute( "SELECT [:P0] FROM L1 ORDER BY [:P0];" )
-        resps = c.fetchall()
-        self.resp_dict = {}
-        for resp in resps:
-            self.resp_dict[ resp[0] ] = OrderedDict()
+        if ( keys is not None ):
+            self._create_respondent_filter( c, keys )
+            c.execute( "SELECT [:P0] FROM L1 WHERE [:P0] IN temp.casedata_filter ORDER BY [:P0];" )
+        else:
+            c.execute( "SELECT [:P0] FROM L1 ORDER BY [:P0];" )
+        case_data = self._allocate_case_columns( [ resp[0] for resp in c.fetchall() ], questions )
 
-            for q in questions:
-                self.resp_dict[ resp[0] ][ q ] = None
+        jobs = self._casedata_jobs( questions, workers, keys is not None )
+        wanted = set( case_data[1] )
 
-        # Get a list of non-L1 tables along with it's parent table and it's mdd name
-        c.execute( "SELECT TableName, ParentName, DSCTableName FROM Levels WHERE TableName <> 'L1';" )
-        tables = c.fetchall()
+        if ( workers > 1 and len( jobs ) > 1 ):
+            # Release the exclusive lock, the workers open their own read-only connections
+            c.close()
+            conn.close()
 
-        # Get all of the columns in the L1 table except for the index (:P0)
-        c.execute( "SELECT name FROM PRAGMA_TABLE_INFO('L1') WHERE name NOT Like '%:P%';" )
-        cols = c.fetchall()
+            # The workers only run the queries and send back the raw rows, they need no metadata. The rows come
+            #   back in job order and are decoded here, straight into the case columns by respondent key
+            self.log.logs.info( "Extracting " + str( len( jobs ) ) + " tables / column groups with " + str( workers ) + " workers" )
+            with multiprocessing.Pool( processes = workers, initializer = _init_casedata_worker, initargs = ( self.ddf, keys ) ) as pool:
+                for job, batches in zip( jobs, pool.imap( _read_casedata_job, [ job[1] for job in jobs ] ) ):
+                    for name, kind, resp_keys, values in self._extract_table( batches, job[2], job[3], wanted, use_category_names, multi_punch ):
+                        self._write_case_values( case_data, name, kind, resp_keys, values )
+        else:
+            for job in jobs:
+                self.log.logs.info( job[0] )
+                for name, kind, resp_keys, values in self._run_casedata_job( c, job, wanted, use_category_names, multi_punch ):
+                    self._write_case_values( case_data, name, kind, resp_keys, values )
 
-        # Cycle through the columns
-        for col in cols:
-            if ( self.mdm.Fields[ str( col[0][:col[0].find(':')] ) ] is not None ):
-                skip_q = False
-                if ( len( questions ) > 0 ):
-                    if ( not str( col[0][:col[0].find(':')] ).lower() in questions ):
-                        skip_q = True
+            # Close the cursor and connection
+            c.close()
+            conn.close()
 
-                if ( not skip_q ):
-                    # Get Respondent.Serial, the column name and the response
-                    self.log.logs.info( "SELECT [:P0], '" + col[0][:col[0].find(':')] + "', [" + col[0] + "] from L1;" )
-                    c.execute( "SELECT [:P0], '" + col[0][:col[0].find(':')].lower() + "', [" + col[0] + "] from L1;" )
-                    rows = c.fetchall()
+        end = datetime.datetime.now()
+        elapsed = end - start
+        self.log.logs.info( "Elapsed time for to_dataset operation: " + str( elapsed ) )
+        return case_data
 
-                    # Export the data to the csv file
-                    self.log.logs.info( "Exporting " + str( col[0][:col[0].find(':')] ) )
-                    self._export_data( col, rows, cat_map_dict, questions, use_category_names )
+    def _level_frames( self, questions, use_category_names, multi_punch = 'string', where = None ):
+        """
+        Decode every Levels table in its own long shape, yields ( name, DataFrame ) per table that holds exported variables.
 
-        # Cycle through all non-L1 tables
-        table_dict = {}
-        for table in tables:
-            # Dictionary key = table name, value = table row
-            table_dict[ table[ 0 ] ] = table
+        name is HDATA for L1 and the generic loop name otherwise ( Q10[..].Q10b ). The rows are the rows of the table in key
+        order, the columns are the keys of the table ( respondent key first ), the iteration of every loop level ( named
+        after the loop ) and the responses ( named after the variable ). Loop tables are only joined with their parent loop
+        tables for the LevelIds, there is no join with L1 and no pivot to respondent columns.
+        """
+        schema = self.schema
+        keys = self._respondent_keys( where )
 
-            # Get the response columns, not indexes or level ids
-            c.execute( "SELECT name FROM PRAGMA_TABLE_INFO('" + table[0] + "') WHERE name NOT Like '%:P%' AND name NOT Like 'LevelId%';" )
-            cols = c.fetchall()
+        generic_questions = { }
+        for q in questions:
+            generic_questions.setdefault( self.mdm.NameIndex.Generic( q ), [ ] ).append( q )
 
-            self.log.logs.info( table[0] )
+        conn = sqlite3.connect( self.ddf )
+        conn.text_factory = lambda b: b.decode(errors = 'ignore')
+        c = conn.cursor()
+        try:
+            if ( keys is not None ):
+                self._create_respondent_filter( c, keys )
+
+            for table in schema.Levels.values():
+                if ( table.Name == 'L1' ):
+                    name = table.DSCName
+                    levels, path_text, var_generic_name, join_text, where_text = [ ], "", "", "L1 as A", ""
+                    letter = "A"
+                else:
+                    table_tree_list = schema.chain( table.Name )
+                    levels, path_text, var_generic_name, join_text, where_text = self._level_join( table_tree_list )
+                    letter = chr( 64 + len( table_tree_list ) )
+                    name = var_generic_name[ :-len( "[..]." ) ]
+
+                # The exported variables of the table
+                specs = []
+                names = []
+                for col in table.ResponseColumns:
+                    generic = ( var_generic_name + col.Variable ).lower()
+                    if ( generic in generic_questions and self.mdm.NameIndex.Field( generic ) is not None ):
+                        specs.append( ( col.Name, col.Variable.lower(), self._column_kind( col, generic ) ) )
+                        names += generic_questions[ generic ]
+
+                if ( len( specs ) == 0 ):
+                    continue
+
+                for i, level_ids in enumerate( self._level_id_filters( names, levels ) ):
+                    if ( level_ids is not None ):
+                        where_text += " AND " + chr( 65 + i ) + ".[" + table_tree_list[i].LevelId + "] IN (" + ", ".join( str( level_id ) for level_id in sorted( level_ids ) ) + ")"
+                if ( keys is not None ):
+                    where_text += " AND " + letter + ".[" + table.PrimaryKey + "] IN temp.casedata_filter"
+
+                # Get the keys ( respondent key first ), the LevelId of every loop level and the responses of every column
+                key_columns = table.Keys[ ::-1 ]
+                key_text = ", ".join( letter + ".[" + key + "]" for key in key_columns )
+                sql = "SELECT " + key_text + ", " + path_text + ", ".join( letter + ".[" + spec[0] + "]" for spec in specs ) + " FROM " + join_text + ( " WHERE " + where_text[ len( " AND " ): ] if where_text else "" ) + " ORDER BY " + key_text + ";"
+                self.log.logs.info( sql )
+                c.execute( sql )
+                rows = c.fetchall()
+                columns = list( zip( *rows ) ) if len( rows ) > 0 else [ ( ) ] * ( len( key_columns ) + len( levels ) + len( specs ) )
+
+                data = OrderedDict()
+                for i, ( dscname, numeric ) in enumerate( levels ):
+                    level_ids = columns[ len( key_columns ) + i ]
+                    if ( not numeric and use_category_names == 1 ):
+                        level_ids = [ self.mdm.CategoryMap.ValueToName( int( level_id ) ) for level_id in level_ids ]
+                    data[ dscname ] = self._object_array( level_ids )
+
+                offset = len( key_columns ) + len( levels )
+                for j, ( column_name, var_name, kind ) in enumerate( specs ):
+                    values = columns[ offset + j ]
+                    data[ var_name ] = self._object_array( self._column_decoder( kind, use_category_names, multi_punch )( values ) if len( rows ) > 0 else values )
+
+                df = pandas.DataFrame( data, dtype = object, copy = False )
+                for k, key in enumerate( key_columns ):
+                    df.insert( k, key, numpy.array( columns[ k ], dtype = numpy.int64 ) )
+                yield name, df
+        finally:
+            c.close()
+            conn.close()
 
-            # Find the entire tree for this table
-            parent = table[1]
-            table_tree_list = []
-            table_tree_list.insert( 0, table )
-            while parent != 'L1':
-                parent_data = table_dict.get( parent )
-                table_tree_list.insert( 0, parent_data )
-                parent = parent_data[1]
+    # Number of respondents decoded at a time by the streaming exports
+    _BATCH_SIZE = 10000
 
-            # Cycle through the columns if there are any
-            for col in cols:
-                dscname_text = ""
-                var_generic_name = ""
-                join_text = ""
-                letter = ""
-                where_text = ""
-                for i in range( 0, len( table_tree_list ) ):
-                    parent_info = table_tree_list[i]
-
-                    # Letter for join table reference
-                    letter = chr( 65 + i )
-
-                    # Find the LevelId column, could be C1 or L
-                    c.execute( "SELECT name FROM PRAGMA_TABLE_INFO('" + parent_info[0] + "') WHERE name Like 'LevelId%';" )
-                    levelID = c.fetchall()
-
-                    # Check iterator type
-                    tmp_var = None
-                    if ( i == 0 ):
-                        tmp_var = self.mdm.Fields[ parent_info[2] ]
-                    else:
-                        tmp_var = self.mdm.Fields[ var_generic_name + parent_info[2] ]
+    def _casedata_batches( self, columns, use_category_names, multi_punch = 'string', where = None, batch_size = None, resolved = False ):
+        """
+        Decode the case data batch_size respondents at a time, yields one DataFrame ( index :P0 ) per batch.
 
-                    # Build the question
-                    if ( tmp_var.IteratorType == '3' ):
-                        dscname_text += parent_info[2] + "[' || " + letter + ".[" + levelID[0][0] + "] || ']."
-                    else:
-                        dscname_text += parent_info[2] + "[{' || " + letter + ".[" + levelID[0][0] + "] || '}]."
-                    var_generic_name += parent_info[2] + "[..]."
-                    
-                    # Join with the parent table(s) to align indexes
-                    if ( i > 0 ):
-                        join_text += " JOIN "
-
-                    join_text += parent_info[0] + " as " + letter
-
-                    # Match all indexes
-                    if ( i < len( table_tree_list ) -1 ):
-                        for j in range( i + 1, -1, -1 ):
-                            where_text += " AND " + letter + ".[:P" + str( j ) + "] = " + chr( 65 + i + 1 ) + ".[:P" + str( j + 1 ) + "]"
-
-                if ( self.mdm.Fields[ var_generic_name + col[0][:col[0].find(':')] ] is not None ):
-                    # Make sure that the variable exists in the metadata
-                    
-                    try:
-                        # Get Respondent.Serial, build the full question name and get the responses
-                        sql = "SELECT " + chr( len( table_tree_list ) + 65 ) + ".[:P0], '" + dscname_text.lower() + col[0][:col[0].find(':')].lower() + "', " + letter + ".[" + col[0] + "] FROM " + join_text + " JOIN L1 as " + chr( len( table_tree_list ) + 65 ) + " WHERE " + chr( len( table_tree_list ) + 65 ) + ".[:P0] = A.[:P1]" + where_text + ";"
-                        self.log.logs.info( sql )
-                        c.execute( sql )
-                        rows = c.fetchall()
-
-                        # Export the data to the csv file
-                        self._export_data( col, rows, cat_map_dict, questions, use_category_names )
-                    except (Exception) as error :
-                        print( 'Error:' + str( error ) )
-                        print( "ERROR on line " +  str( sys.exc_info()[-1].tb_lineno ) )
-                        print( sql )
-
-        # Close the cursor and connection
-        c.close()
-        conn.close()
+        Every table query of a batch only reads the :P0 range of the batch, so memory stays bounded by the
+        batch size whatever the number of respondents. At least one ( possibly empty ) DataFrame is yielded.
+        When resolved the columns are already the names _resolve_columns returns and are used as they are.
+        """
+        questions = columns if resolved else self._resolve_columns( columns )
+        keys = self._respondent_keys( where )
+        batch_size = batch_size or self._BATCH_SIZE
 
-        end = datetime.datetime.now()
-        elapsed = end - start
-        self.log.logs.info( "Elapsed time for to_dataset operation: " + str( elapsed ) )
+        conn = sqlite3.connect( self.ddf )
+        conn.text_factory = lambda b: b.decode(errors = 'ignore')
+        c = conn.cursor()
+        try:
+            if ( keys is not None ):
+                self._create_respondent_filter( c, keys )
+                c.execute( "SELECT [:P0] FROM L1 WHERE [:P0] IN temp.casedata_filter ORDER BY [:P0];" )
+            else:
+                c.execute( "SELECT [:P0] FROM L1 ORDER BY [:P0];" )
+            resps = [ resp[0] for resp in c.fetchall() ]
+
+            jobs = self._casedata_jobs( questions, 1, keys is not None, batched = True )
+            for b in range( 0, max( len( resps ), 1 ), batch_size ):
+                batch = resps[ b:b + batch_size ]
+                case_data = self._allocate_case_columns( batch, questions )
+                wanted = set( case_data[1] )
+                if ( len( batch ) > 0 ):
+                    for job in jobs:
+                        for name, kind, resp_keys, values in self._run_casedata_job( c, job, wanted, use_category_names, multi_punch, ( batch[0], batch[-1] ) ):
+                            self._write_case_values( case_data, name, kind, resp_keys, values )
+
+                self.log.logs.info( "Decoded " + str( b + len( batch ) ) + " of " + str( len( resps ) ) + " respondents" )
+                df = pandas.DataFrame( case_data[1], index = case_data[0], dtype = object, copy = False )
+                del case_data
+                yield df
+        finally:
+            c.close()
+            conn.close()
+
+    
 
-    
\ No newline at end of file
+
+# ( ddf path, respondent keys ) of each worker process of a parallel case data export, see DDF._get_casedata
+_casedata_worker = None
+
+def _init_casedata_worker(path_to_ddf, keys=None):
+    global _casedata_worker
+    _casedata_worker = (path_to_ddf, keys)
+
+def _read_casedata_job(sql):
+    # Run the query of one case data job on a read-only connection, returns the columns of each batch of raw rows
+    path_to_ddf, keys = _casedata_worker
+    conn = sqlite3.connect(pathlib.Path(os.path.abspath(path_to_ddf)).as_uri() + '?mode=ro', uri=True)
+    conn.text_factory = lambda b: b.decode(errors='ignore')
+    try:
+        cursor = conn.cursor()
+        if (keys is not None):
+            DDF._create_respondent_filter(cursor, keys)
+        cursor.execute(sql)
+        return list(DDF._fetch_columns(cursor, DDF._FETCH_SIZE))
+    finally:
+        conn.close()
@@ -0,0 +1,161 @@
+import os, sqlite3
+from collections import OrderedDict, namedtuple
+
+
+# One column of a ddf table, e.g. 'Q2:S' -> Variable 'Q2', Type 'S', Kind 'multi'.
+#   Key columns ( :P0, :P1, ... ) have Kind 'key', the LevelId column of a loop table has Kind 'levelid'.
+Column = namedtuple('Column', ['Name', 'Variable', 'Type', 'Kind'])
+
+
+class Table:
+    """
+    One table of a ddf file.
+
+    Attributes:
+        Name (str): The SQLite table name (L1, L2, ...).
+        Sql (str): The CREATE TABLE statement.
+        Columns (list of Column): All columns in table order.
+        Keys (list of str): The key columns in index order [':P0', ':P1', ...].
+        PrimaryKey (str): The highest key column, it holds the respondent index (:P0 in L1).
+        LevelId (str): The LevelId column of a loop table, None otherwise.
+        Parent (str): The parent table in the Levels tree, '' for L1 and None for tables that are not levels.
+        DSCName (str): The mdd name of the loop (HDATA for L1).
+    """
+    def __init__(self, name, sql, column_names):
+        self.Name = name
+        self.Sql = sql
+        self.Columns = [DDFSchema.column(column_name) for column_name in column_names]
+        self.Keys = sorted([c.Name for c in self.Columns if c.Kind == 'key'], key=lambda k: int(k[2:]))
+        self.PrimaryKey = self.Keys[-1] if len(self.Keys) > 0 else None
+        self.LevelId = next((c.Name for c in self.Columns if c.Kind == 'levelid'), None)
+        self.Parent = None
+        self.DSCName = None
+
+    @property
+    def ColumnNames(self):
+        return [c.Name for c in self.Columns]
+
+    @property
+    def ResponseColumns(self):
+        """ The columns holding responses, not the key or LevelId columns. """
+        return [c for c in self.Columns if c.Kind not in ('key', 'levelid')]
+
+
+class DDFSchema:
+    """
+    This class holds the schema of a ddf file: its tables, their columns and the Levels tree.
+
+    The schema is read once per version of the file (path, modification time and size), so the
+    DDF methods and clients that need table or column information share one catalog instead of
+    querying sqlite_master, Levels and PRAGMA_TABLE_INFO each time.
+
+    Usage:
+        schema = ipsos.dimensions.schema.DDFSchema.load( path_to_ddf )
+
+        example:
+            schema = DDFSchema.load( path_to_ddf )
+            for table in schema.Levels.values():
+                print( table.Name, table.PrimaryKey, table.LevelId, [ c.Variable for c in table.ResponseColumns ] )
+            chain = schema.chain( 'L4' )    # [ L3, L4 ], the loop tables from L1 down to L4
+
+    Args:
+        path (str): The path to the ddf file.
+
+    Attributes:
+        Tables (OrderedDict): Table name -> Table, in sqlite_master order.
+        Levels (OrderedDict): Table name -> Table, in the order of the Levels table.
+        CaseDataTables (list): The names of the case data tables, every table that is not a metadata table.
+    """
+
+    METADATA_TABLES = ["DataVersion", "Levels", "SchemaVersion"]
+
+    # Column type suffix -> kind of the values stored in the column
+    COLUMN_KINDS = {'C1': 'single', 'S': 'multi', 'T': 'date', 'X': 'text', 'L': 'numeric', 'D': 'numeric', 'B': 'boolean'}
+
+    # ( path, mtime, size ) -> DDFSchema
+    _cache = {}
+
+    def __init__(self, path):
+        self.path = path
+        self.Tables = OrderedDict()
+        self.Levels = OrderedDict()
+
+        conn = sqlite3.connect(path)
+        cur = conn.cursor()
+        cur.execute("select name, sql from sqlite_master where type = 'table'")
+        for name, sql in cur.fetchall():
+            cur.execute("select name from PRAGMA_TABLE_INFO(?)", [name])
+            self.Tables[name] = Table(name, sql, [row[0] for row in cur.fetchall()])
+
+        if ('Levels' in self.Tables):
+            cur.execute("select TableName, ParentName, DSCTableName from Levels")
+            for name, parent, dscname in cur.fetchall():
+                table = self.Tables.get(name)
+                if (table is not None):
+                    table.Parent = parent
+                    table.DSCName = dscname
+                    self.Levels[name] = table
+
+        cur.close()
+        conn.close()
+
+        self.CaseDataTables = [name for name in self.Tables if name not in self.METADATA_TABLES]
+
+    @classmethod
+    def load(cls, path):
+        """
+        This method returns the schema of a ddf file, reading it only when the file is new or has changed.
+
+        Args:
+            path (str): The path to the ddf file.
+
+        Returns:
+            DDFSchema
+        """
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        schema = cls._cache.get(key)
+        if (schema is None):
+            cls.invalidate(path)
+            schema = cls._cache[key] = cls(path)
+        return schema
+
+    @classmethod
+    def invalidate(cls, path):
+        """ Forget the cached schema of a ddf file, call it after changing the tables of the file. """
+        path = os.path.abspath(path)
+        for key in [key for key in cls._cache if key[0] == path]:
+            del cls._cache[key]
+
+    @classmethod
+    def column(cls, name):
+        """ The Column descriptor for a column name. """
+        if (name.startswith(':P')):
+            return Column(name, None, 'P', 'key')
+        variable, _, suffix = name.rpartition(':')
+        if (not variable):
+            return Column(name, name, '', 'text')
+        if (variable.lower() == 'levelid'):
+            return Column(name, variable, suffix, 'levelid')
+        return Column(name, variable, suffix, cls.COLUMN_KINDS.get(suffix, 'text'))
+
+    def columns(self, table):
+        """ The column names of a table, in table order. """
+        return self.Tables[table].ColumnNames
+
+    def primary_key(self, table):
+        """ The key column of a table that holds the respondent index. """
+        return self.Tables[table].PrimaryKey
+
+    def pk_dict(self):
+        """ Case data table name -> respondent index column. """
+        return {name: self.Tables[name].PrimaryKey for name in self.CaseDataTables}
+
+    def chain(self, table):
+        """ The loop tables from the first level below L1 down to table, e.g. [ L3, L4 ]. """
+        chain = []
+        level = self.Levels[table]
+        while (level.Name != 'L1'):
+            chain.insert(0, level)
+            level = self.Levels[level.Parent]
+        return chain
@@ -1,5 +1,6 @@
 import ipsos.xmltodict as xmltodict
-import functools, json, jsonpickle, logging, pprint
+import json, jsonpickle, logging, pprint
+from collections import OrderedDict
 
 from ipsos.models.metadata_model.CategoryMap import CategoryMap
 from ipsos.models.metadata_model.Contexts import Contexts
@@ -11,75 +12,172 @@ from ipsos.models.metadata_model.Types import Types
 from ipsos.models.metadata_model.RoutingData import RoutingData
 from ipsos.models.metadata_model.ScreeningTableList import ScreeningTableList
 from ipsos.models.metadata_model.CustomProperty import CustomProperty
+from ipsos.models.metadata_model.DefinitionIndex import DefinitionIndex
+from ipsos.models.metadata_model.NameIndex import NameIndex
+from ipsos.models.metadata_model.PropertyIndex import PropertyIndex
+from ipsos.models.MemoryReport import MemoryReport
+from ipsos.util import memoized
 
 class Document():
+    # Sections of mdm:metadata the streaming loader keeps until Types and Fields are built,
+    #   the small sections are turned into model objects as soon as they are parsed
+    _STREAMED_SECTIONS = [ 'definition', 'system', 'design' ]
+
+    # The parts of the design section the model is built from, routings and pages are dropped as soon as they are parsed
+    _DESIGN_PARTS = [ 'fields', 'types' ]
+
+    # Model attributes instantiated by serialize(), these make up the metadata cache snapshot
+    _SNAPSHOT_ATTRIBUTES = [ '_category_map', '_contexts', '_languages', '_createdbyversion', '_datasources', '_types', '_fields', '_variableinstances', '_property_index' ]
+
     def __init__( self ):
-        self._dict = None
+        self._raw = None
+        self._path = None
+        self._definition_index = None
+        self._name_index = None
+        self._lazy = False
+        for attr in self._SNAPSHOT_ATTRIBUTES:
+            setattr( self, attr, None )
+
+    @property
+    def _dict( self ):
+        # When the model was restored from the metadata cache the mdd is only parsed if something
+        #   still needs the raw dictionary (RoutingData, ...)
+        if ( self._raw is None and self._path is not None ):
+            self._raw = self.toDict()
+        return self._raw
+
+    @_dict.setter
+    def _dict( self, value ):
+        self._raw = value
+
+    @property
+    def _index( self ):
+        # Shared by Types and Fields to resolve definition references, not part of the snapshot
+        if ( self._definition_index is None ): self._definition_index = DefinitionIndex( self._dict )
+        return self._definition_index
 
     @property
-    @functools.lru_cache()
     def CategoryMap( self ):
-        return CategoryMap( self._dict )
+        if ( self._category_map is None ): self._category_map = CategoryMap( self._dict )
+        return self._category_map
 
     @property
-    @functools.lru_cache()
     def Contexts( self ):
-        return Contexts( self._dict )
+        if ( self._contexts is None ): self._contexts = Contexts( self._dict )
+        return self._contexts
 
     @property
-    @functools.lru_cache()
     def Languages( self ):
-        return Languages( self._dict )
+        if ( self._languages is None ): self._languages = Languages( self._dict )
+        return self._languages
 
     @property
-    @functools.lru_cache()
     def CreatedByVersion( self ):
-        return self._dict[ 'xml' ][ 'mdm:metadata' ][ '@mdm_createversion' ]
+        if ( self._createdbyversion is None ): self._createdbyversion = self._dict[ 'xml' ][ 'mdm:metadata' ][ '@mdm_createversion' ]
+        return self._createdbyversion
 
     @property
-    @functools.lru_cache()
     def DataSources( self ):
-        return DataSources( self._dict )
+        if ( self._datasources is None ): self._datasources = DataSources( self._dict )
+        return self._datasources
 
     @property
-    @functools.lru_cache()
     def Fields( self ):
-        return Fields( self._dict, self._types, self._category_map, self._languages.Base, self._contexts.Base )
+        if ( self._fields is None ): self._fields = Fields( self._dict, self.Types, self.CategoryMap, self.Languages.Base, self.Contexts.Base, self._index, lazy = self._lazy )
+        return self._fields
 
     @property
-    @functools.lru_cache()
     def VariableInstances( self ):
-        return VariableInstances( self._fields )
+        if ( self._variableinstances is None ): self._variableinstances = VariableInstances( self.Fields, lazy = self._lazy )
+        return self._variableinstances
+
+    @property
+    def NameIndex( self ):
+        # Built on top of Fields/VariableInstances, not part of the snapshot
+        if ( self._name_index is None ): self._name_index = NameIndex( self.Fields, self.VariableInstances )
+        return self._name_index
+
+    @property
+    def PropertyIndex( self ):
+        if ( self._property_index is None ): self._property_index = PropertyIndex( self._index )
+        return self._property_index
 
     @property
-    @functools.lru_cache()
     def Types( self ):
-        return Types( self._dict, self._languages.Base, self._contexts.Base, self._category_map )
+        if ( self._types is None ): self._types = Types( self._dict, self.Languages.Base, self.Contexts.Base, self.CategoryMap, self._index )
+        return self._types
     
     @property
-    @functools.lru_cache()
+    @memoized
     def RoutingData(self):
         return RoutingData( self._dict)
     
     @property
-    @functools.lru_cache()
+    @memoized
     def ScreeningTableList(self):
-        return ScreeningTableList( self._dict)
+        return ScreeningTableList( self.PropertyIndex)
     
     @property
-    @functools.lru_cache()
+    @memoized
     def CustomProperty(self):
-        return CustomProperty( self._dict)
+        return CustomProperty( self.PropertyIndex)
+
+    def find_by_property( self, name, value = None ):
+        """
+        Find the variables and categories carrying a custom property, see ipsos.models.metadata_model.PropertyIndex.
+
+        Args:
+            name (str): The property name, not case sensitive.
+            value (optional): When set, only the entries whose property value matches (not case sensitive).
+
+        Returns:
+            list: PropertyEntry( Kind, Id, Name, Parent, Property, Value, Context ) tuples, Kind is 'variable' or 'category'.
+        """
+        return self.PropertyIndex.Find( name, value )
+
+    def MemoryReport( self ):
+        """
+        Measure the memory held by the metadata model, see ipsos.models.MemoryReport.
+
+        Returns:
+            MemoryReport: Count and bytes per object type, print it for a table.
+        """
+        return MemoryReport( self )
 
     def Close( self ):
         self = None
 
-    def Open( self, path ):
+    def Open( self, path, cache = None, key = None, streaming = False, lazy = False ):
+        """
+        Load the metadata model of an mdd file.
+
+        Args:
+            path (str): The path to the mdd file.
+            cache (MetadataCache - optional): When set, the model is restored from / stored to this cache.
+            key (str - optional): The content hash of the mdd file, required to use the cache.
+            streaming (boolean - optional): When True, build the model in a single incremental pass without keeping the raw dictionary.
+            lazy (boolean - optional): When True, questions and their variable instances are only built when first accessed.
+                The model is not stored in the cache because that would build everything.
+        """
         logging.debug( "Opening " + path )
         self._path = path
-        self._dict = self.toDict()
-        
-        self.serialize( "serialized.json" )
+        self._lazy = lazy
+
+        if ( cache is not None and key is not None ):
+            snapshot = cache.load( key )
+            if ( snapshot is not None ):
+                self._restore( snapshot )
+                return
+
+        if ( streaming ):
+            self.toModel()
+        else:
+            self._dict = self.toDict()
+            
+            self.serialize( "serialized.json" )
+
+        if ( cache is not None and key is not None and not lazy ):
+            cache.store( key, self._snapshot() )
 
     def serialize( self, path ):
         logging.debug( "Serializing to " + path )
@@ -92,18 +190,92 @@ class Document():
         self._types = self.Types
         self._fields = self.Fields
         self._variableinstances = self.VariableInstances
-
+        self._property_index = self.PropertyIndex
+        self._definition_index = None
 
         # to do:  check versioning
 
         # Clean up
         # del( self._dict )
 
+    def _snapshot( self ):
+        return { attr: getattr( self, attr ) for attr in self._SNAPSHOT_ATTRIBUTES }
+
+    def _restore( self, snapshot ):
+        logging.debug( "Restoring metadata model from snapshot" )
+        for attr in self._SNAPSHOT_ATTRIBUTES:
+            setattr( self, attr, snapshot[ attr ] )
+
 
     def toDict( self ):
         logging.debug( "Converting MDD XML to dictionary" )
         return xmltodict.parse( open( self._path, "r", encoding = "utf-8" ).read(), ordered_mixed_children=True )
 
+    def toModel( self ):
+        """
+        Build the metadata model with an incremental expat pass over the mdd file. Each child of
+        mdm:metadata is handed over as soon as it has been parsed, so the raw text is never read
+        into memory and the raw dictionary never exists as a whole. The small sections are turned
+        into model objects straight away, only the parts of the design section the model needs are
+        kept and once Types is built the questions are read through the definition index alone,
+        which drops the raw nodes of each question as soon as Fields has parsed it ( release ).
+        The raw definitions of the questions that are not parsed yet and the model built so far
+        are what is held at any time, not the raw mdd plus the model.
+        """
+        logging.debug( "Streaming MDD XML into the metadata model" )
+        root = { }
+        sections = { }
+
+        def wrap( section ):
+            return { 'xml': { 'mdm:metadata': section } }
+
+        def handle( path, item ):
+            name, attrs = path[ -1 ]
+            if ( not root ): root.update( path[ 1 ][ 1 ] or { } )
+
+            # The attributes of the section element itself are only available on the path
+            if ( attrs ):
+                section = OrderedDict( ( '@' + key, value ) for key, value in attrs.items() )
+                if ( isinstance( item, dict ) ):
+                    section.update( item )
+                elif ( item is not None ):
+                    section[ '#text' ] = item
+                item = section
+
+            if ( item is None ):
+                pass
+            elif ( name == 'design' ):
+                sections[ name ] = { part: item[ part ] for part in self._DESIGN_PARTS if part in item }
+            elif ( name in self._STREAMED_SECTIONS ):
+                sections[ name ] = item
+            elif ( name == 'categorymap' ):
+                self._category_map = CategoryMap( wrap( { name: item } ) )
+            elif ( name == 'languages' ):
+                self._languages = Languages( wrap( { name: item } ) )
+            elif ( name == 'contexts' ):
+                self._contexts = Contexts( wrap( { name: item } ) )
+            elif ( name == 'datasources' ):
+                self._datasources = DataSources( wrap( { name: item } ) )
+
+            return True
+
+        with open( self._path, 'rb' ) as f:
+            xmltodict.parse( f, item_depth = 3, item_callback = handle, ordered_mixed_children = True )
+
+        self._createdbyversion = root.get( 'mdm_createversion' )
+
+        mdm_dict = wrap( sections )
+        index = DefinitionIndex( mdm_dict )
+        self._property_index = PropertyIndex( index )
+        self._types = Types( mdm_dict, self._languages.Base, self._contexts.Base, self._category_map, index )
+
+        # From here on the questions are only read through the index, the sections are released and
+        #   Fields drops the nodes of each question from the index once it has been parsed
+        sections.clear()
+        self._fields = Fields( mdm_dict, self._types, self._category_map, self._languages.Base, self._contexts.Base, index, lazy = self._lazy, release = True )
+        self._variableinstances = VariableInstances( self._fields, lazy = self._lazy )
+        del mdm_dict, index
+
     def toJson( self, path, pretty = False ):
         logging.debug( "Saving MDD XML as JSON" )
         with open( path, "w", encoding = "utf-8" ) as f:
@@ -0,0 +1,89 @@
+import sys
+from collections import OrderedDict
+
+
+class MemoryReport:
+    """
+    This class measures the memory held by a metadata model, grouped by object type.
+
+    Every object reachable from the model is counted once. The size of an object includes its
+    instance dictionary and the containers (OrderedDict, list, ...) it owns, strings are reported
+    on their own line so that shared (interned) names and labels are only counted once.
+
+    Usage:
+        report = ipsos.models.MemoryReport.MemoryReport( document )
+
+        example:
+            mdm = Document()
+            mdm.Open( path_to_mdd )
+            print( mdm.MemoryReport() )
+            bytes_per_variable = report[ 'Variable' ][ 'bytes' ] / report[ 'Variable' ][ 'count' ]
+
+    Args:
+        document (Document): The metadata model to measure.
+    """
+
+    _CONTAINERS = ( dict, list, tuple, set, frozenset )
+
+    def __init__( self, document ):
+        self._items = OrderedDict()
+        self._measure( [ getattr( document, attr ) for attr in document._SNAPSHOT_ATTRIBUTES ] )
+
+    def __getitem__( self, key ):
+        return self._items[ key ]
+
+    def __iter__( self ):
+        return iter( [ ( key, self._items[ key ] ) for key in self._items ] )
+
+    def __str__( self ):
+        lines = [ '{0:<20}{1:>12}{2:>16}{3:>12}'.format( 'Type', 'Count', 'Bytes', 'Bytes/obj' ) ]
+        for key, item in sorted( self._items.items(), key = lambda i: -i[ 1 ][ 'bytes' ] ):
+            lines.append( '{0:<20}{1:>12,}{2:>16,}{3:>12,}'.format( key, item[ 'count' ], item[ 'bytes' ], item[ 'bytes' ] // max( item[ 'count' ], 1 ) ) )
+        lines.append( '{0:<20}{1:>12}{2:>16,}'.format( 'Total', '', self.Total ) )
+        return '\n'.join( lines )
+
+    @property
+    def Total( self ):
+        return sum( item[ 'bytes' ] for item in self._items.values() )
+
+    def _add( self, key, size, count = 0 ):
+        if ( key not in self._items ): self._items[ key ] = { 'count': 0, 'bytes': 0 }
+        self._items[ key ][ 'count' ] += count
+        self._items[ key ][ 'bytes' ] += size
+
+    def _measure( self, roots ):
+        seen = set( )
+        stack = [ ( o, None ) for o in roots ]
+        while ( len( stack ) > 0 ):
+            o, owner = stack.pop()
+            if ( o is None or id( o ) in seen ):
+                continue
+            if ( type( o ) is str ):
+                seen.add( id( o ) )
+                self._add( 'str', sys.getsizeof( o ), 1 )
+            elif ( isinstance( o, self._CONTAINERS ) ):
+                seen.add( id( o ) )
+                self._add( owner or type( o ).__name__, sys.getsizeof( o ) )
+                if ( isinstance( o, dict ) ):
+                    for key, value in o.items():
+                        stack.append( ( key, owner ) )
+                        stack.append( ( value, owner ) )
+                else:
+                    for value in o:
+                        stack.append( ( value, owner ) )
+            elif ( type( o ).__module__.startswith( 'ipsos.models' ) ):
+                seen.add( id( o ) )
+                name = type( o ).__name__
+                self._add( name, sys.getsizeof( o ), 1 )
+                for value in self._attributes( o ):
+                    stack.append( ( value, name ) )
+
+    def _attributes( self, o ):
+        values = [ ]
+        if ( hasattr( o, '__dict__' ) ):
+            self._add( type( o ).__name__, sys.getsizeof( o.__dict__ ) )
+            values.extend( o.__dict__.values() )
+        for cls in type( o ).__mro__:
+            for slot in cls.__dict__.get( '__slots__', () ):
+                if ( hasattr( o, slot ) ): values.append( getattr( o, slot ) )
+        return values
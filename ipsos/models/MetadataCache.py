@@ -0,0 +1,149 @@
+import gzip, logging, os, pickle, tempfile
+
+
+class MetadataCache:
+    """
+    This class stores parsed metadata models on disk, keyed on the content hash of the mdd file,
+    so that opening the same mdd again restores the model instead of re-parsing the XML.
+
+    Usage:
+        cache = ipsos.models.MetadataCache.MetadataCache( path_to_cache_folder, max_size )
+
+        example:
+            cache = MetadataCache( "./cache", max_size = 512 * 1024 * 1024 )
+            snapshot = cache.load( key )
+            if ( snapshot is None ):
+                cache.store( key, snapshot )
+
+    Args:
+        path (str): The folder holding the cache files (default = ~/.ipsos/mdd_cache). The snapshots are unpickled when
+            loaded, so the folder is created readable and writable by its owner only (mode 0700).
+        max_size (int): The maximum size of the cache folder in bytes, least recently used snapshots are evicted first (default = 2GB)
+
+    Methods:
+        load( key ): Return the snapshot stored for key, or None.
+        store( key, snapshot ): Store a snapshot for key and evict old snapshots if the cache is too big.
+        clear( ): Remove every snapshot from the cache.
+    """
+
+    # Bump when the metadata model classes change shape, older snapshots are then ignored
+    VERSION = 5
+
+    DEFAULT_PATH = os.path.join( os.path.expanduser( '~' ), '.ipsos', 'mdd_cache' )
+    DEFAULT_MAX_SIZE = 2 * 1024 * 1024 * 1024
+
+    _EXTENSION = '.mdm.gz'
+
+    def __init__( self, path = None, max_size = None ):
+        self.path = path if path is not None else self.DEFAULT_PATH
+        self.max_size = max_size if max_size is not None else self.DEFAULT_MAX_SIZE
+
+    def _file( self, key ):
+        return os.path.join( self.path, key + '.v' + str( self.VERSION ) + self._EXTENSION )
+
+    def load( self, key ):
+        """
+        This method returns the snapshot stored for key.
+
+        Args:
+            key (str): The content hash of the mdd file.
+
+        Returns:
+            The snapshot, or None when there is no usable snapshot for key.
+        """
+        path = self._file( key )
+        if ( not os.path.exists( path ) ):
+            return None
+
+        logging.debug( "Loading metadata snapshot " + path )
+        try:
+            with gzip.open( path, 'rb' ) as f:
+                snapshot = pickle.load( f )
+        except Exception as e:
+            # Truncated or incompatible snapshot, drop it and parse the mdd instead
+            logging.warning( "Discarding unreadable metadata snapshot " + path + ": " + str( e ) )
+            self._remove( path )
+            return None
+
+        # Mark the snapshot as recently used for the eviction policy
+        try:
+            os.utime( path, None )
+        except OSError:
+            pass
+
+        return snapshot
+
+    def store( self, key, snapshot ):
+        """
+        This method stores a snapshot for key, evicting the least recently used snapshots
+        when the cache grows beyond max_size.
+
+        Args:
+            key (str): The content hash of the mdd file.
+            snapshot (object): The picklable metadata model snapshot.
+
+        Returns:
+            None
+        """
+        # The snapshots are unpickled on load, keep the folder private to the user
+        if ( not os.path.exists( self.path ) ): os.makedirs( self.path, mode = 0o700, exist_ok = True )
+
+        path = self._file( key )
+        logging.debug( "Storing metadata snapshot " + path )
+
+        # Write to a temporary file first so that concurrent readers never see a partial snapshot
+        fd, tmp_path = tempfile.mkstemp( dir = self.path, suffix = '.tmp' )
+        try:
+            with os.fdopen( fd, 'wb' ) as raw:
+                with gzip.GzipFile( fileobj = raw, mode = 'wb', compresslevel = 1 ) as f:
+                    pickle.dump( snapshot, f, protocol = pickle.HIGHEST_PROTOCOL )
+            os.replace( tmp_path, path )
+        except Exception as e:
+            logging.warning( "Unable to store metadata snapshot " + path + ": " + str( e ) )
+            self._remove( tmp_path )
+            return
+
+        self._evict( keep = path )
+
+    def clear( self ):
+        """
+        This method removes every snapshot from the cache.
+
+        Returns:
+            None
+        """
+        for path, _, _ in self._entries():
+            self._remove( path )
+
+    def _entries( self ):
+        entries = []
+        if ( os.path.exists( self.path ) ):
+            for name in os.listdir( self.path ):
+                if ( name.endswith( self._EXTENSION ) ):
+                    path = os.path.join( self.path, name )
+                    try:
+                        st = os.stat( path )
+                    except OSError:
+                        continue
+                    entries.append( ( path, st.st_size, st.st_mtime ) )
+        return entries
+
+    def _evict( self, keep = None ):
+        entries = self._entries()
+        total = sum( size for _, size, _ in entries )
+
+        # Oldest first
+        for path, size, _ in sorted( entries, key = lambda e: e[2] ):
+            if ( total <= self.max_size ):
+                break
+            if ( path == keep ):
+                continue
+            logging.debug( "Evicting metadata snapshot " + path )
+            self._remove( path )
+            total -= size
+
+    def _remove( self, path ):
+        try:
+            os.remove( path )
+        except OSError:
+            pass
@@ -1,31 +1,98 @@
 import itertools, logging
+import numpy
 from collections import OrderedDict
 
 class CategoryMap:
+    """ Category name <-> value map of the mdd.
+
+    Both directions are precomputed: _items maps the lower case name to its value and ValueNames maps
+    a value back to its name. For decoding whole columns values_to_names() looks the values up in a
+    dense array indexed by value, built the first time it is needed.
+    """
+
+    # The dense value array is only built when it stays small compared to the number of categories
+    _MAX_DENSE_SIZE = 16 * 1024 * 1024
+
     def __init__( self, mdm_dict ):
         logging.debug( "Instantiating Category Map" )
         self._items = OrderedDict()
+        self.ValueNames = { }
+        self._array = None
         self._document = mdm_dict
         self._parse()
 
     def __getitem__( self, key ):
-        if ( self._items.get( key.lower() ) ):
-            return self._items[ key.lower() ]
+        value = self._items.get( key.lower() )
+        if ( value ):
+            return value
         else:
             return -1
 
     def __iter__( self ):
         return iter( [ self._items[ item ] for item in self._items ] )
 
+    def __getstate__( self ):
+        # The dense array is rebuilt on demand
+        state = self.__dict__.copy()
+        state[ '_array' ] = None
+        return state
+
     def _parse( self ):
         for item in self._document[ 'xml' ][ 'mdm:metadata' ][ 'categorymap' ][ 'categoryid' ]:
-            self._items[ item[ '@name' ].lower() ] = int( item[ '@value' ] )
-            
+            name = item[ '@name' ].lower()
+            value = int( item[ '@value' ] )
+            self._items[ name ] = value
+            # First name wins, same as the linear scan it replaces
+            self.ValueNames.setdefault( value, name )
+
         del( self._document )
 
+    def _dense( self ):
+        if ( self._array is None ):
+            values = list( self.ValueNames )
+            if ( len( values ) == 0 or min( values ) < 0 or max( values ) >= min( self._MAX_DENSE_SIZE, max( 1024, 4 * len( values ) ) ) ):
+                # Sparse or negative values, values_to_names falls back to the dictionary
+                self._array = False
+            else:
+                self._array = numpy.full( max( values ) + 1, None, dtype = object )
+                for value, name in self.ValueNames.items():
+                    self._array[ value ] = name
+        return self._array
+
     def NameToValue( self, name ):
         return self._items[ name.lower() ]
 
     def ValueToName( self, value ):
-        for k, v in self._items.items():
-            if ( v == value ): return k
+        return self.ValueNames.get( value )
+
+    def values_to_names( self, values ):
+        """ Map an array of category values to their names in one go.
+
+        Args:
+            values (array like): Category values, ints or floats ( NaN for missing ).
+
+        Returns:
+            numpy.ndarray: An object array of the same length with the names, None where the value is
+                missing or not in the map. Wrap it in a pandas Series / Categorical as needed.
+        """
+        values = numpy.asarray( values )
+        names = numpy.full( values.shape, None, dtype = object )
+        if ( values.size == 0 ):
+            return names
+
+        if ( values.dtype.kind not in 'iuf' ):
+            # Mixed/object input (None, strings of digits, ...)
+            values = numpy.array( [ numpy.nan if v is None or v == '' else float( v ) for v in values.ravel() ] ).reshape( values.shape )
+
+        valid = numpy.isfinite( values ) if values.dtype.kind == 'f' else numpy.ones( values.shape, dtype = bool )
+        codes = numpy.zeros( values.shape, dtype = numpy.int64 )
+        codes[ valid ] = values[ valid ]
+
+        array = self._dense()
+        if ( array is not False ):
+            valid &= ( codes >= 0 ) & ( codes < len( array ) )
+            names[ valid ] = array[ codes[ valid ] ]
+        else:
+            get = self.ValueNames.get
+            names[ valid ] = [ get( code ) for code in codes[ valid ].tolist() ]
+        return names
@@ -2,8 +2,8 @@
 class CustomProperty:
 
     # constructor
-    def __init__(self,mdm_dict) -> None:
-        self._document = mdm_dict
+    def __init__(self,property_index) -> None:
+        self._property_index = property_index
 
     
     def slice_string(self,text):
@@ -25,60 +25,37 @@ class CustomProperty:
         """
 
         try:
-            json_obj  = self._document ['xml']['mdm:metadata']['definition']['variable']
-
-            '''variables for idatagenerator'''
-            # var_names = []
-            # var_property_value = []
             name_of_variables = []
             custom_property_ = []
             custom_property_value = []
 
-            
-            for var in json_obj:
-                try:
-                    current_var_property = var['properties']['property']
-
-                    for property in current_var_property:
-                        if property['@name'].lower()  == "idatagenerator":
-                            name_of_variables.append(var['@name'])
-                            custom_property_.append("idatagenerator")
-                            custom_property_value.append(property['@value'])
-                except Exception as e:
-                    pass
-            
+            for entry in self._property_index.Find("idatagenerator"):
+                if entry.Kind == "variable":
+                    name_of_variables.append(entry.Name)
+                    custom_property_.append("idatagenerator")
+                    custom_property_value.append(entry.Value)
+
 
 
             """
             Code for getting screening Table list properties 
             
             """
-            screening_table_object = self._document ['xml']['mdm:metadata']['definition']['categories'] 
             all_the_values = None
             
-            for values in screening_table_object:
-                if values['@name'] == "ScreeningTableList":
-                    try:
-                        first_category = values['category'][0]
-                        if first_category['properties']: 
-                            all_the_values = values['category']
-                            break
-                    except Exception as e:
-                        pass
+            for values in self._property_index.Lists.get("ScreeningTableList", []):
+                if len(values) > 0 and values[0].Properties:
+                    all_the_values = values
+                    break
             if all_the_values is not None:
                 for category in all_the_values:
-                    try:
-                        name = self.slice_string(category.get('labels', {}).get('text', [{}])[0].get('#text',{}))
-                    except Exception as e:
-                        name = self.slice_string(category.get('labels', {}).get('text', [{}]).get('#text',{}))
+                    name = self.slice_string(category.Label)
 
                     property = None
                     value = None
-                    try:
-                        property = (category['properties']['property']['@name']).lower()
-                        value = (category['properties']['property']['@value']).lower()    
-                    except Exception as e:
-                        pass
+                    if len(category.Properties) == 1 and category.Properties[0][1] is not None:
+                        property = category.Properties[0][0].lower()
+                        value = category.Properties[0][1].lower()
 
                     name_of_variables.append(name)
                     custom_property_.append(property)
@@ -0,0 +1,106 @@
+import logging
+
+
+def _as_list( o ):
+    if ( o is None ):
+        return [ ]
+    if ( type( o ) is list ):
+        return o
+    return [ o ]
+
+
+class DefinitionIndex:
+    """ Lookup tables over the raw mdd dictionary, built in a single pass when the document is loaded.
+
+    The definition node holds every variable and shared list while the design and system nodes
+    only reference them by id, so resolving a reference used to mean scanning the definition node
+    again. This class resolves:
+        Variables           definition variable id -> variable node
+        OtherVariables      definition othervariable id -> othervariable node
+        Categories          definition categories id -> categories node
+        CategoriesByName    definition categories name -> categories node (first one wins)
+        DesignVariables     ids of the simple questions referenced from design/fields
+        SystemOwners        variable id -> name of the system class it belongs to
+        FieldOwners         variable id -> name of the top level loop/grid it belongs to
+        ClassOwners         variable id -> name of the top level class/block it belongs to
+        Helpers             ids of the variables referenced as helper fields
+        SystemClasses, Loops, Grids, Classes    name -> top level node
+    """
+    def __init__( self, mdm_dict ):
+        logging.debug( "Indexing MDD definition" )
+        self.Definitions = [ ]
+        self.Variables = { }
+        self.OtherVariables = { }
+        self.Categories = { }
+        self.CategoriesByName = { }
+        self.DesignVariables = set( )
+        self.SystemOwners = { }
+        self.FieldOwners = { }
+        self.ClassOwners = { }
+        self.Helpers = set( )
+        self.SystemClasses = { }
+        self.Loops = { }
+        self.Grids = { }
+        self.Classes = { }
+        self._parse( mdm_dict[ 'xml' ][ 'mdm:metadata' ] )
+
+    def _parse( self, metadata ):
+        definition = metadata.get( 'definition' ) or { }
+        self.Definitions = _as_list( definition.get( 'variable' ) )
+        for variable in self.Definitions:
+            self.Variables[ variable[ '@id' ] ] = variable
+            self._add_helpers( variable )
+        for variable in _as_list( definition.get( 'othervariable' ) ):
+            self.OtherVariables[ variable[ '@id' ] ] = variable
+        for categories in _as_list( definition.get( 'categories' ) ):
+            self.Categories[ categories[ '@id' ] ] = categories
+            self.CategoriesByName.setdefault( categories[ '@name' ], categories )
+
+        design_fields = ( metadata.get( 'design' ) or { } ).get( 'fields' ) or { }
+        for variable in _as_list( design_fields.get( 'variable' ) ):
+            self.DesignVariables.add( variable[ '@ref' ] )
+
+        # System variables
+        try:
+            for field in metadata[ 'system' ][ 'class' ]:
+                self.SystemClasses.setdefault( field[ '@name' ], field )
+                self._add_owner( field[ 'fields' ], self.SystemOwners, field[ '@name' ] )
+        except:
+            pass
+
+        # Grid/loop variables
+        for field in _as_list( design_fields.get( 'loop' ) ):
+            self.Loops.setdefault( field[ '@name' ], field )
+            self._add_helpers( field )
+            self._add_owner( field[ 'class' ][ 'fields' ], self.FieldOwners, field[ '@name' ] )
+        for field in _as_list( design_fields.get( 'grid' ) ):
+            self.Grids.setdefault( field[ '@name' ], field )
+            self._add_helpers( field )
+            self._add_owner( field[ 'class' ][ 'fields' ], self.FieldOwners, field[ '@name' ] )
+
+        # Class/block variables
+        for field in _as_list( design_fields.get( 'class' ) ):
+            self.Classes.setdefault( field[ '@name' ], field )
+            self._add_helpers( field )
+            self._add_owner( field[ 'fields' ], self.ClassOwners, field[ '@name' ] )
+
+    def _add_owner( self, o, owners, name ):
+        """ Drill down to the simple questions of a top level field and map their ids to the field name. """
+        for var in _as_list( o.get( 'variable' ) ):
+            if ( '@ref' in var ):
+                owners[ var[ '@ref' ] ] = name
+        for loop in _as_list( o.get( 'loop' ) ) + _as_list( o.get( 'grid' ) ):
+            self._add_helpers( loop )
+            self._add_owner( loop[ 'class' ][ 'fields' ], owners, name )
+
+    def _add_helpers( self, node ):
+        """ Collect the helper field references of a variable/loop/class node, same layout as Fields reads them. """
+        if ( "helperfields" not in node ):
+            return
+        helperfields = node[ 'helperfields' ]
+        if ( type( helperfields ) == list ):
+            for h in helperfields:
+                self.Helpers.add( h[ 'helperfields' ][ 'variable' ][ '@ref' ] )
+        elif ( 'variable' in helperfields ):
+            for var in _as_list( helperfields[ 'variable' ] ):
+                self.Helpers.add( var[ '@ref' ] )
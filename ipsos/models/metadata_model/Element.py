@@ -1,11 +1,14 @@
+import sys
 from ipsos.models.metadata_model.Label import Label
 from ipsos.models.metadata_model.Properties import Properties
 
 
 class Element:
+    __slots__ = ( 'Id', 'Name', 'Value', 'Factor', 'Label', 'Labels', 'Fixed', 'Exclusive', 'Properties' )
+
     def __init__( self, id, name, value, language, context ):
         self.Id = id
-        self.Name = name
+        self.Name = sys.intern( name )
         self.Value = int( value )
         self.Factor = None
         self.Label = ''
@@ -13,4 +16,4 @@ class Element:
         self.Fixed = False
         self.Exclusive = False
         self.Properties = Properties()
-        
\ No newline at end of file
+        
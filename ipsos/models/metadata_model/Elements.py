@@ -1,16 +1,20 @@
+import sys
 from collections import OrderedDict
 from ipsos.models.metadata_model.Properties import Properties
 from ipsos.models.metadata_model.Label import Label
+from ipsos.models.metadata_model.Empty import EMPTY_ITEMS
 
 class Elements:
+    __slots__ = ( '_items', 'Id', 'Name', 'Label', 'IsReference', '_base_language', '_base_context', '_category_map', 'Ref', 'Labels', 'Properties' )
+
     def __init__( self, id, name, category_map, language, context, ref = None ):
-        self._items = OrderedDict()
+        self._items = EMPTY_ITEMS
         self.Id = id
-        self.Name = name
+        self.Name = sys.intern( name )
         self.Label = ''
         self.IsReference = False
-        self._base_language = language.upper()
-        self._base_context = context.upper()
+        self._base_language = sys.intern( language.upper() )
+        self._base_context = sys.intern( context.upper() )
         self._category_map = category_map
         self.Ref = ref
         self.Labels = Label( language, context )
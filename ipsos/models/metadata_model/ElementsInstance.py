@@ -3,6 +3,7 @@ from ipsos.models.metadata_model.Element import Element
 from ipsos.models.metadata_model.Elements import Elements
 from ipsos.models.metadata_model.Properties import Properties
 from ipsos.models.metadata_model.Label import Label
+from ipsos.models.metadata_model.Empty import set_item
 
 class ElementsInstance:
     def __init__( self, types, category_map, language, context ):
@@ -11,7 +12,7 @@ class ElementsInstance:
         self._base_context = context.upper()
         self._category_map = category_map
 
-    def _parse( self, d, var, xml_document, el ):
+    def _parse( self, d, var, index, el ):
         other_vars_list = ''
         exclusive_count = 0
         if ( d is not None ):
@@ -21,30 +22,30 @@ class ElementsInstance:
                     other_vars_list += o_list
                     exclusive_count += e_count
                 if ( key == "categories" ): 
-                    o_list, e_count = self._parse_categories( d[ key ], var, other_vars_list, exclusive_count, xml_document, el )
+                    o_list, e_count = self._parse_categories( d[ key ], var, other_vars_list, exclusive_count, index, el )
                     other_vars_list += o_list
                     exclusive_count += e_count
                 if ( key == "@categoriesref" ): 
-                    o_list, e_count = self._parse_categories( d[ key ], var, other_vars_list, exclusive_count, xml_document, el )
+                    o_list, e_count = self._parse_categories( d[ key ], var, other_vars_list, exclusive_count, index, el )
                     other_vars_list += o_list
                     exclusive_count += e_count
 
         return other_vars_list, exclusive_count
 
-    def _parse_categories( self, o, var, other_vars_list, exclusive_count, xml_document, el ):
+    def _parse_categories( self, o, var, other_vars_list, exclusive_count, index, el ):
         if ( type( o ) == list ):
             for categories in o:
                 e = Elements( categories[ '@id' ], categories[ '@name' ], self._category_map, self._base_language, self._base_context )
                 if ( '@categoriesref' in categories ):
                     # Types list
                     e.IsReference = True
-                    item = next( x for x in xml_document[ 'xml' ][ 'mdm:metadata' ][ 'definition' ][ 'categories' ] if x[ '@id' ] == categories[ '@categoriesref' ] )
+                    item = index.Categories[ categories[ '@categoriesref' ] ]
                     items = self._types[ item[ '@name' ] ]
                     e._items = items._items
                     if ( var is not None ):
                         self._add_types_categories( var, e )
                 else:
-                    o_list, e_count = self._parse( categories, var, xml_document, e )
+                    o_list, e_count = self._parse( categories, var, index, e )
                     other_vars_list += o_list
                     exclusive_count += e_count
 
@@ -56,21 +57,21 @@ class ElementsInstance:
                 e.Label = e.Labels.Label
 
                 if ( el is not None ):
-                    el._items[ e.Name ] = e
+                    set_item( el, '_items', e.Name, e )
                 elif ( var is not None ):
-                    var.Elements[ e.Name ] = e
+                    set_item( var, 'Elements', e.Name, e )
         elif ( type( o ) == OrderedDict ):
             e = Elements( o[ '@id' ], o[ '@name' ], self._category_map, self._base_language, self._base_context )
             if ( '@categoriesref' in o ):
                 # Types list
                 e.IsReference = True
-                item = next( x for x in xml_document[ 'xml' ][ 'mdm:metadata' ][ 'definition' ][ 'categories' ] if x[ '@id' ] == o[ '@categoriesref' ] )
+                item = index.Categories[ o[ '@categoriesref' ] ]
                 items = self._types[ item[ '@name' ] ]
                 e._items = items._items
                 if ( var is not None ):
                     self._add_types_categories( var, e )
             else:
-                o_list, e_count = self._parse( o, var, xml_document, e )
+                o_list, e_count = self._parse( o, var, index, e )
                 other_vars_list += o_list
                 exclusive_count += e_count
 
@@ -82,11 +83,11 @@ class ElementsInstance:
             e.Label = e.Labels.Label
 
             if ( el is not None ):
-                el._items[ e.Name ] = e
+                set_item( el, '_items', e.Name, e )
             elif ( var is not None ):
-                var.Elements[ e.Name ] = e
+                set_item( var, 'Elements', e.Name, e )
         else:
-            item = next( x for x in xml_document[ 'xml' ][ 'mdm:metadata' ][ 'definition' ][ 'categories' ] if x[ '@id' ] == o )
+            item = index.Categories.get( o )
             if ( item ):
                 e = Elements( item[ '@id' ], item[ '@name' ], self._category_map, self._base_language, self._base_context )
                 # Types list
@@ -97,9 +98,9 @@ class ElementsInstance:
                     self._add_types_categories( var, e )
 
                 if ( el is not None ):
-                    el._items[ e.Name ] = e
+                    set_item( el, '_items', e.Name, e )
                 elif ( var is not None ):
-                    var.Elements[ e.Name ] = e
+                    set_item( var, 'Elements', e.Name, e )
             else:
                 raise NotImplementedError( "Error parsing categories in Elements._parse_categories().  Unexpected type." )
         
@@ -110,7 +111,7 @@ class ElementsInstance:
             if ( type( e ) == Elements ):
                 self._add_types_categories( var, e )
             else:
-                var.Categories[ name ] = e
+                set_item( var, 'Categories', name, e )
 
     def _parse_category( self, o, var, other_vars_list, exclusive_count, el ):
         if ( type( o ) == list ):
@@ -132,12 +133,12 @@ class ElementsInstance:
                 if ( "properties" in category ): e.Properties._from_dict( category[ "properties" ] )
 
                 if ( el is not None ):
-                    el._items[ e.Name ] = e
+                    set_item( el, '_items', e.Name, e )
                 elif ( var is not None ):
-                    var.Elements[ e.Name ] = e
+                    set_item( var, 'Elements', e.Name, e )
 
                 if ( var is not None ):
-                    var.Categories[ e.Name ] = e
+                    set_item( var, 'Categories', e.Name, e )
 
                 if ( 'othervariable' in category ):
                     for h in category[ 'othervariable' ]:
@@ -162,12 +163,12 @@ class ElementsInstance:
             if ( "properties" in o ): e.Properties._from_dict( o[ "properties" ] )
 
             if ( el is not None ):
-                el._items[ e.Name ] = e
+                set_item( el, '_items', e.Name, e )
             elif ( var is not None ):
-                var.Elements[ e.Name ] = e
+                set_item( var, 'Elements', e.Name, e )
 
             if ( var is not None ):
-                var.Categories[ e.Name ] = e
+                set_item( var, 'Categories', e.Name, e )
 
             if ( "othervariable" in o ):
                 for h in o[ 'othervariable' ]:
@@ -0,0 +1,31 @@
+from collections import OrderedDict
+
+
+class _EmptyItems( OrderedDict ):
+    """ Read only, shared stand in for the item collections of model objects that have no items.
+
+    Most variables never get elements, helper fields, other categories, ... so rather than
+    creating an empty OrderedDict for each of them they all point at EMPTY_ITEMS. Use set_item
+    to add an item, it swaps the sentinel for a real OrderedDict on the first write.
+    """
+    def _read_only( self, *args, **kwargs ):
+        raise TypeError( "EMPTY_ITEMS is shared and read only, use set_item() to add items" )
+
+    __setitem__ = __delitem__ = _read_only
+    clear = pop = popitem = setdefault = update = move_to_end = _read_only
+
+    def __reduce__( self ):
+        # Unpickle to the module level sentinel so identity checks keep working
+        return 'EMPTY_ITEMS'
+
+
+EMPTY_ITEMS = _EmptyItems()
+
+
+def set_item( obj, attr, key, value ):
+    """ obj.attr[ key ] = value, replacing the shared EMPTY_ITEMS sentinel with a new OrderedDict first. """
+    items = getattr( obj, attr )
+    if ( items is EMPTY_ITEMS ):
+        items = OrderedDict()
+        setattr( obj, attr, items )
+    items[ key ] = value
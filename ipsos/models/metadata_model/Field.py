@@ -1,14 +1,19 @@
 from ipsos.models.metadata_model.Label import Label
 from ipsos.models.metadata_model.Properties import Properties
 from ipsos.models.metadata_model.Variable import Variable
+from ipsos.models.metadata_model.Empty import EMPTY_ITEMS
 from collections import OrderedDict
+import sys
 
 
 class Field:
+    __slots__ = ( '_items', 'Name', 'FullName', 'Label', 'UUID', 'IsGrid', 'ObjectTypeValue', 'Type', 'Orientation', 'IteratorType', 'IsSystem',
+                  'Elements', 'Categories', 'VariableInstances', 'Labels', 'Properties', 'OtherCategories', 'HelperFields' )
+
     def __init__( self, name, uuid, objecttypevalue, isgrid, iteratortype, language, context ):
         self._items = OrderedDict()
-        self.Name = name
-        self.FullName = name
+        self.Name = sys.intern( name )
+        self.FullName = self.Name
         self.Label = ''
         self.UUID = uuid
         self.IsGrid = isgrid
@@ -17,13 +22,13 @@ class Field:
         self.Orientation = 'Horizontal'
         self.IteratorType = iteratortype
         self.IsSystem = False
-        self.Elements = OrderedDict()
-        self.Categories = OrderedDict()
-        self.VariableInstances = OrderedDict()
+        self.Elements = EMPTY_ITEMS
+        self.Categories = EMPTY_ITEMS
+        self.VariableInstances = EMPTY_ITEMS
         self.Labels = Label( language, context )
         self.Properties = Properties()
-        self.OtherCategories = OrderedDict()
-        self.HelperFields = OrderedDict()
+        self.OtherCategories = EMPTY_ITEMS
+        self.HelperFields = EMPTY_ITEMS
                 
     def __getitem__( self, key ):
         if ( key.find( '.' ) > 0 ):
@@ -9,17 +9,38 @@ from ipsos.models.metadata_model.Elements import Elements
 from ipsos.models.metadata_model.ElementsInstance import ElementsInstance
 from ipsos.models.metadata_model.Categories import Categories
 from ipsos.models.metadata_model.Types import Types
+from ipsos.models.metadata_model.DefinitionIndex import DefinitionIndex
+from ipsos.models.metadata_model.Empty import set_item
 
 
 class Fields:
-    def __init__( self, mdm_dict, types, category_map, language, context ):
-        self._items = OrderedDict()
+    """ The top level questions of the mdd, keyed on name.
+
+    With lazy = True only the list of top level questions is worked out when the object is created,
+    a question is parsed the first time it is requested with [ ] or reached while iterating. Accessing
+    _items parses everything that is left.
+
+    With release = True the raw nodes of a question are dropped from the definition index as soon as the
+    question has been parsed, the streaming loader uses this so the raw mdd is freed question by question.
+    """
+    def __init__( self, mdm_dict, types, category_map, language, context, index = None, lazy = False, release = False ):
+        self._loaded = OrderedDict()
+        self._pending = OrderedDict()
+        self._release = release
+        self._consumed = [ ]
         self._document = mdm_dict
         self._types = types
         self._category_map = category_map
         self._base_language = language.upper()
         self._base_context = context.upper()
+        self._index = index if index is not None else DefinitionIndex( mdm_dict )
         self._parse()
+        if ( not lazy ): self._load_all()
+
+    @property
+    def _items( self ):
+        if ( len( self._pending ) > 0 ): self._load_all()
+        return self._loaded
 
     def __getitem__( self, key ):
         if ( key.find( '.' ) > 0 ):
@@ -27,7 +48,7 @@ class Fields:
             q_parts = str(fullname).split('.')[ 1: ]
 
             try:
-                field = self._items[ str(fullname).split('.')[ 0 ] ]
+                field = self._get( str(fullname).split('.')[ 0 ] )
                 for item in q_parts:
                     if ( type( field ) == Variable ):
                         field = field.HelperFields[ item ]
@@ -38,164 +59,124 @@ class Fields:
                 return None
         else:
             try:
-                return self._items[ key ]
+                return self._get( key )
             except:
                 return None
 
     def __iter__( self ):
-        return iter( [ self._items[ item ] for item in self._items ] )
+        for name in self._names():
+            if ( name in self._pending ): self._load( name )
+            if ( name in self._loaded ): yield self._loaded[ name ]
+
+    def __getstate__( self ):
+        # Snapshots always hold the fully parsed questions
+        self._load_all()
+        return self.__dict__
+
+    def _names( self ):
+        """ The top level names in mdd order, without parsing anything. """
+        if ( '_order' not in self.__dict__ ):
+            return list( self._loaded )
+        known = set( self._order )
+        return self._order + [ name for name in self._loaded if name not in known ]
+
+    def _get( self, name ):
+        if ( name in self._pending ): self._load( name )
+        return self._loaded[ name ]
+
+    def _load( self, name ):
+        for method, node, kwargs in self._pending.pop( name ):
+            method( node, None, self._helper_list, **kwargs )
+        if ( self._release ): self._release_nodes( name )
+        if ( len( self._pending ) == 0 ): self._cleanup()
+
+    def _release_nodes( self, name ):
+        # Drop the raw nodes of a parsed question from the index, the definition variables it read included
+        index = self._index
+        for nodes in ( index.SystemClasses, index.Loops, index.Grids, index.Classes ):
+            nodes.pop( name, None )
+        for ref in self._consumed:
+            index.Variables.pop( ref, None )
+            index.OtherVariables.pop( ref, None )
+        self._consumed = [ ]
+
+    def _load_all( self ):
+        for name in list( self._pending ):
+            self._load( name )
+        self._cleanup()
+
+    def _cleanup( self ):
+        if ( '_document' in self.__dict__ ):
+            # Keep the mdd order, questions may have been parsed in any order
+            order = self._names()
+            self._loaded = OrderedDict( ( name, self._loaded[ name ] ) for name in order if name in self._loaded )
+
+            del ( self._document )
+            del ( self._index )
+            del ( self._release )
+            del ( self._consumed )
+            del ( self._base_language )
+            del ( self._base_context )
+            del ( self._helper_list )
+            del ( self._done_list )
+            del ( self._order )
 
     def _parse( self ):
         """ Fields is a combination of variables and fields where the variables node
         contains the simple questions and the fields node contains the grids/arrays.
 
-        Store the fields information in a dict along with the simple-question reference id (@ref).
+        The definition index maps each variable id (@id) to the loop/class it belongs to, if any.
         Go through the variables node adding each to the field class but first check the
-        variable id (@id) against the field dict to see if it belongs to a loop, if it does,
-        add the loop to the field class and then add the variable to that field object.
+        variable id against the index to see if it belongs to a loop, if it does,
+        add the loop to the field class (once) and then add the variable to that field object.
+
+        Each top level question is queued in _pending together with the method that parses it.
         """
-        questions_list = [ ]
-        field_dict = { }
-        class_dict = { }
-        system_dict = { }
-
-        # Get the ref for each variable in design in order to remove variables that
-        #  are only in the definition node
-        if ( type( self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'variable' ] ) is list ):
-            for variable in self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'variable' ]:
-                questions_list.append( variable[ '@ref' ] )
-        else:
-            questions_list.append( self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'variable' ][ '@ref' ] )
-
-        # Create the dictionary of variable/grid pairs
-        # System variables
-        try:
-            for field in self._document[ 'xml' ][ 'mdm:metadata' ][ 'system' ][ 'class' ]:
-                name = field[ '@name' ]
-                self._get_field_variable_pairs( field[ 'fields' ], system_dict, name )
-        except:
-            pass
-        
-        # Grid/loop variables
-        if ( "loop" in self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ] ):
-            if ( type( self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'loop' ] ) is list ):
-                for field in self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'loop' ]:
-                    name = field[ '@name' ]
-                    self._get_field_variable_pairs( field[ 'class' ][ 'fields' ], field_dict, name )
-            else:
-                name = self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'loop' ][ '@name' ]
-                self._get_field_variable_pairs( self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'loop' ][ 'class' ][ 'fields' ], field_dict, name )
-        if ( "grid" in self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ] ):
-            if ( type( self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'grid' ] ) is list ):
-                for field in self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'grid' ]:
-                    name = field[ '@name' ]
-                    self._get_field_variable_pairs( field[ 'class' ][ 'fields' ], field_dict, name )
-            else:
-                name = self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'grid' ][ '@name' ]
-                self._get_field_variable_pairs( self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'grid' ][ 'class' ][ 'fields' ], field_dict, name )
-
-        # Class/block variables
-        if ( 'class' in self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ] ):
-            if ( type( self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'class' ] ) is list ):
-                for field in self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'class' ]:
-                    name = field[ '@name' ]
-                    self._get_field_variable_pairs( field[ 'fields' ], class_dict, name )
-            else:
-                name = self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'class' ][ '@name' ]
-                self._get_field_variable_pairs( self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'class' ][ 'fields' ], class_dict, name )
+        index = self._index
+        self._helper_list = set( )
+        self._done_list = set( )
 
         # Go through the variables node
         #   Find the system variables first
-        helper_list = [ ]
-        done_list = [ ]
-        for variable in self._document[ 'xml' ][ 'mdm:metadata' ][ 'definition' ][ 'variable' ]:
-            uuid = variable[ '@id' ]
-            if ( system_dict.get( uuid ) is not None ):
+        for variable in index.Definitions:
+            name = index.SystemOwners.get( variable[ '@id' ] )
+            if ( name is not None ):
                 # This question is part of a block/class question
-                for field in self._document[ 'xml' ][ 'mdm:metadata' ][ 'system' ][ 'class' ]:
-                    if ( field[ '@name' ] == system_dict.get( uuid ) ):
-                        if ( variable[ '@id' ] in done_list ):
-                            break
-                        else:
-                            self._get_class( field, None, helper_list, done_list, is_system = True )
+                self._queue( name, self._get_class, index.SystemClasses[ name ], done_list = self._done_list, is_system = True )
 
-        for variable in self._document[ 'xml' ][ 'mdm:metadata' ][ 'definition' ][ 'variable' ]:
+        for variable in index.Definitions:
             uuid = variable[ '@id' ]
-            if ( system_dict.get( uuid ) is None and not ( uuid in helper_list ) ):
-                # Already took care of system variables, skip them here
-                if ( field_dict.get( uuid ) is None and class_dict.get( uuid ) is None ):
-                    # The variable does not belong to a complex question
-                    if ( uuid in questions_list ):
-                        self._get_variable( variable, None, helper_list )
-                elif ( field_dict.get( uuid ) is None ):
-                    # This question is part of a class/block
-                    if ( type( self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'class' ] ) is list ):
-                        for field in self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'class' ]:
-                            if ( field[ '@name' ] == class_dict.get( uuid ) ):
-                                self._get_class( field, None, helper_list, done_list )
-                                break
-                    else:
-                        if ( self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'class' ][ '@name' ] == class_dict.get( uuid ) ):
-                            self._get_class( self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'class' ], None, helper_list, done_list )
-                else:
-                    # This question is part of a grid/loop
-                    if ( "loop" in self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ] ):
-                        if ( type( self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'loop' ] ) is list ):
-                            for field in self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'loop' ]:
-                                if ( field[ '@name' ] == field_dict.get( uuid ) ):
-                                    self._get_field( field, None, helper_list, done_list )
-                                    break
-                        else:
-                            if ( self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'loop' ][ '@name' ] == field_dict.get( uuid ) ):
-                                self._get_field( self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'loop' ], None, helper_list, done_list )
-
-                    if ( "grid" in self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ] ):
-                        if ( type( self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'grid' ] ) is list ):
-                            for field in self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'grid' ]:
-                                if ( field[ '@name' ] == field_dict.get( uuid ) ):
-                                    self._get_field( field, None, helper_list, done_list, grid_node=True )
-                                    break
-                        else:
-                            if ( self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'grid' ][ '@name' ] == field_dict.get( uuid ) ):
-                                self._get_field( self._document[ 'xml' ][ 'mdm:metadata' ][ 'design' ][ 'fields' ][ 'grid' ], None, helper_list, done_list, grid_node=True )
+            if ( uuid in index.SystemOwners or uuid in index.Helpers ):
+                # Already took care of system variables, helper fields are added to their parent
+                continue
+
+            field_name = index.FieldOwners.get( uuid )
+            class_name = index.ClassOwners.get( uuid )
+            if ( field_name is None and class_name is None ):
+                # The variable does not belong to a complex question
+                if ( uuid in index.DesignVariables ):
+                    self._queue( variable[ '@name' ], self._get_variable, variable )
+            elif ( field_name is None ):
+                # This question is part of a class/block
+                if ( class_name in index.Classes ):
+                    self._queue( class_name, self._get_class, index.Classes[ class_name ], done_list = self._done_list )
+            else:
+                # This question is part of a grid/loop
+                if ( field_name in index.Loops ):
+                    self._queue( field_name, self._get_field, index.Loops[ field_name ], done_list = self._done_list )
+                if ( field_name in index.Grids ):
+                    self._queue( field_name, self._get_field, index.Grids[ field_name ], done_list = self._done_list, grid_node = True )
 
-        del ( self._document )
-        del ( self._base_language )
-        del ( self._base_context )
+        self._order = list( self._pending )
 
-    def _get_field_variable_pairs( self, o, field_dict, name ):
-        """ Drill down to find the simple question and then store that id as the dictionary key,
-        the value will be the top level grid name.
-        
-        As we go through the variables node we will check the id of each variable against this 
-        dictionary to see if it belongs to a grid, if it does then we go through the fields
-        node to build the complex question.
-        """
-        for field_key in o.keys():
-            if ( field_key == 'variable' ):
-                if ( type( o[ 'variable' ] ) == list ):
-                    for var in o[ 'variable' ]:
-                        for key in var.keys():
-                            if ( key == '@ref' ):
-                                field_dict[ var[ key ] ] = name
-                                break
-                else:
-                    for key in o[ 'variable' ].keys():
-                        if ( key == '@ref' ):
-                            field_dict[ o[ 'variable' ][ key ] ] = name
-                            break
-            elif ( field_key == 'loop' ):
-                if ( type( o[ 'loop' ] ) == list ):
-                    for loop in o[ 'loop' ]:
-                        self._get_field_variable_pairs( loop[ 'class' ][ 'fields' ], field_dict, name )
-                else:
-                    self._get_field_variable_pairs( o[ 'loop' ][ 'class' ][ 'fields' ], field_dict, name )
-            elif ( field_key == 'grid' ):
-                if ( type( o[ 'grid' ] ) == list ):
-                    for loop in o[ 'grid' ]:
-                        self._get_field_variable_pairs( loop[ 'class' ][ 'fields' ], field_dict, name )
-                else:
-                    self._get_field_variable_pairs( o[ 'grid' ][ 'class' ][ 'fields' ], field_dict, name )
+        # Every question has been queued with its nodes, the list of definitions is only needed for that
+        if ( self._release ): index.Definitions = [ ]
+
+    def _queue( self, name, method, node, **kwargs ):
+        steps = self._pending.setdefault( name, [ ] )
+        for step in steps:
+            if ( step[ 1 ] is node ): return
+        steps.append( ( method, node, kwargs ) )
 
     def _get_field( self, field, f, helper_list, done_list, full_name = None, is_system = False, grid_node=False ):
         isgrid = '0'
@@ -218,7 +199,7 @@ class Fields:
         f_new.IsSystem = is_system
         if ( "categories" in field ):
             e = ElementsInstance( self._types, self._category_map, self._base_language, self._base_context )
-            other_vars_list, _ = e._parse( field[ 'categories' ], f_new, self._document, None )
+            other_vars_list, _ = e._parse( field[ 'categories' ], f_new, self._index, None )
         if ( iteratortype == '3' ):
             # Numeric iterator - no categories
             if ( "ranges" in field ):
@@ -233,8 +214,8 @@ class Fields:
                             e = Element( str( i ), str( i ), i, self._base_language, self._base_context )
                             e.Labels.Text( self._base_language, self._base_context, str( i ) )
                             e.Label = e.Labels.Label
-                            f_new.Elements[ e.Name ] = e
-                            f_new.Categories[ e.Name ] = e
+                            set_item( f_new, 'Elements', e.Name, e )
+                            set_item( f_new, 'Categories', e.Name, e )
                 else: f_new.ObjectTypeValue = 1
 
         if ( "labels" in field ): 
@@ -292,13 +273,13 @@ class Fields:
         for _, value in sorted( new_fields_dict.items() ):
             if ( len( value ) == 4 ):
                 self._find_field_variable( value, f_new, helper_list )
-                done_list.append( value[ '@ref' ] )
+                done_list.add( value[ '@ref' ] )
             else:
                 self._get_field( value, f_new, helper_list, done_list, full_name = f_new.FullName )
-                done_list.append( value[ '@id' ][1:] )
+                done_list.add( value[ '@id' ][1:] )
         
         if ( f is None ):
-            self._items[ name ] = f_new
+            self._loaded[ name ] = f_new
         else:
             f._items[ name ] = f_new
 
@@ -333,24 +314,23 @@ class Fields:
                 if ( type( field[ 'fields' ][ 'variable' ] ) == list ):
                     for var in field[ 'fields' ][ 'variable' ]:
                         self._find_field_variable( var, f_new, helper_list, is_system = is_system )
-                        done_list.append( var[ '@ref' ] )
+                        done_list.add( var[ '@ref' ] )
                 else:
                     self._find_field_variable( field[ 'fields' ][ 'variable' ], f_new, helper_list, is_system = is_system )
         
         if ( f is None ):
-            self._items[ name ] = f_new
+            self._loaded[ name ] = f_new
         else:
             f._items[ name ] = f_new
 
     def _find_field_variable( self, var, f, helper_list, is_system = False ):
-        ref = var[ '@ref' ]
-        for variable in self._document[ 'xml' ][ 'mdm:metadata' ][ 'definition' ][ 'variable' ]:
-            if ( variable[ '@id' ] == ref ):
-                self._get_variable( variable, f, helper_list, is_system )
-                break
+        variable = self._index.Variables.get( var[ '@ref' ] )
+        if ( variable is not None ):
+            self._get_variable( variable, f, helper_list, is_system )
 
     def _get_variable( self, variable, f, helper_list, is_system = False ):
         other_vars_list = ''
+        if ( self._release ): self._consumed.append( variable[ '@id' ] )
 
         var, other_vars_list = self._add_variable( variable, other_vars_list, is_system )
 
@@ -373,29 +353,26 @@ class Fields:
                 self._get_helperfield( ref, var, helper_list, 2, is_system )
 
         if ( f is None ):
-            self._items[ var.Name ] = var
+            self._loaded[ var.Name ] = var
         else:
             f._items[ var.Name ] = var
 
     def _get_helperfield( self, ref, var, helper_list, helper_type, is_system = False ):
-        helper_list.append( ref )
+        helper_list.add( ref )
+        if ( self._release ): self._consumed.append( ref )
         help_var = None
 
         if ( helper_type == 1 ):
-            help_var = next( x for x in self._document[ 'xml' ][ 'mdm:metadata' ][ 'definition' ][ 'variable' ] if x[ '@id' ] == ref )
+            help_var = self._index.Variables[ ref ]
         else:
-            if ( type( self._document[ 'xml' ][ 'mdm:metadata' ][ 'definition' ][ 'othervariable' ] ) is list ):
-                help_var = next( x for x in self._document[ 'xml' ][ 'mdm:metadata' ][ 'definition' ][ 'othervariable' ] if x[ '@id' ] == ref )
-            else:
-                if ( self._document[ 'xml' ][ 'mdm:metadata' ][ 'definition' ][ 'othervariable' ][ '@id'] == ref ):
-                    help_var = self._document[ 'xml' ][ 'mdm:metadata' ][ 'definition' ][ 'othervariable' ]
+            help_var = self._index.OtherVariables.get( ref )
 
         hvar, _ = self._add_variable( help_var, '', is_system )
 
         if ( helper_type == 1 ):
-            var.HelperFields[ hvar.Name ] = hvar
+            set_item( var, 'HelperFields', hvar.Name, hvar )
         else:
-            var.OtherCategories[ hvar.Name ] = hvar
+            set_item( var, 'OtherCategories', hvar.Name, hvar )
 
     def _add_variable( self, variable, other_vars_list, is_system = False ):
         name = variable[ '@name' ]
@@ -419,7 +396,7 @@ class Fields:
             if ( variable[ '@no-casedata'] == '-1' ): var.HasCaseData = False
         if ( "categories" in variable ):
             e = ElementsInstance( self._types, self._category_map, self._base_language, self._base_context )
-            other_vars_list, exclusive_count = e._parse( variable[ 'categories' ], var, self._document, None )
+            other_vars_list, exclusive_count = e._parse( variable[ 'categories' ], var, self._index, None )
             if ( maxvalue == '9999' ):
                 var.MaxValue = str( len( var.Categories ) - exclusive_count )
         if ( "labels" in variable ): 
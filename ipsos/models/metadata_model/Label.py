@@ -1,15 +1,24 @@
+import sys
+from ipsos.models.metadata_model.Empty import EMPTY_ITEMS
+
+
 class Label:
+    __slots__ = ( '_items', 'Label', '_base_language', '_base_context' )
+
     def __init__( self, language, context ):
-        self._items = {}
+        self._items = EMPTY_ITEMS
         self.Label = ''
-        self._base_language = language.upper()
-        self._base_context = context.upper()
+        self._base_language = sys.intern( language.upper() )
+        self._base_context = sys.intern( context.upper() )
 
     def Text( self, language, context, value ):
-        if ( context.upper() not in self._items ): self._items[ context.upper() ] = {}
-        self._items[ context.upper() ][ language.upper() ] = value
+        if ( self._items is EMPTY_ITEMS ): self._items = {}
+        context = sys.intern( context.upper() )
+        value = sys.intern( value )
+        if ( context not in self._items ): self._items[ context ] = {}
+        self._items[ context ][ sys.intern( language.upper() ) ] = value
         
-        if ( context.upper() == self._base_context and language.upper() == self._base_language ):
+        if ( context == self._base_context and language.upper() == self._base_language ):
             self.Label = value
 
     def TextAt( self, language, context ):
@@ -27,4 +36,4 @@ class Label:
             if ( "#text" in o[ 'text' ] ): self.Text( o[ 'text' ][ '@xml:lang' ], o[ 'text' ][ '@context' ], o[ 'text' ][ '#text' ] )
     
         del ( self._base_language )
-        del ( self._base_context )
\ No newline at end of file
+        del ( self._base_context )
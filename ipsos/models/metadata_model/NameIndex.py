@@ -0,0 +1,107 @@
+import logging, re
+from ipsos.models.metadata_model.Class import Class
+from ipsos.models.metadata_model.Field import Field
+
+
+class NameIndex:
+    """ Resolve any spelling of a variable name to the metadata object in O(1).
+
+    Names are matched exactly first, then case-insensitively:
+        VariableInstance( 'q9[{BRAND_A}].Inn1' )    -> the Q9[{brand_a}].inn1 VariableInstance
+        Field( 'Q9[{brand_a}].inn1' ), Field( 'q9[..].inn1' ), Field( 'Q9.inn1' )    -> the inn1 Variable of the Q9 loop
+
+    The exact lookups go straight to Fields/VariableInstances, so they stay cheap when the model is
+    lazy. The case-insensitive dictionaries are built per top level question on the first miss, so a
+    lookup only ever parses / generates the question the name belongs to.
+    """
+
+    _INDEX = re.compile( r'\[[^\]]*\]' )
+
+    def __init__( self, fields, variableinstances ):
+        self._fields = fields
+        self._variableinstances = variableinstances
+        self._top_names = None
+        self._instance_names = { }
+        self._field_names = { }
+
+    def __contains__( self, name ):
+        return self.Find( name ) is not None
+
+    def Generic( self, name ):
+        """ The generic form of a variable instance name, Q9[{brand_a}].inn1 -> Q9[..].inn1 """
+        return self._INDEX.sub( '[..]', name )
+
+    def VariableInstance( self, name ):
+        """ The VariableInstance for name, None when there is no such variable. """
+        try:
+            return self._variableinstances[ name ]
+        except KeyError:
+            pass
+        top = self._top_level( name )
+        if ( top is None ):
+            return None
+        if ( top not in self._instance_names ): self._build_instance_names( top )
+        return self._instance_names[ top ].get( name.casefold() )
+
+    def Field( self, name ):
+        """ The Variable/Field/Class object for the generic or instance form of name, None when there is no such field. """
+        generic = self.Generic( name )
+        o = self._fields[ generic ]
+        if ( o is not None ):
+            return o
+        top = self._top_level( generic )
+        if ( top is None ):
+            return None
+        if ( top not in self._field_names ): self._build_field_names( top )
+        key = generic.casefold()
+        o = self._field_names[ top ].get( key )
+        if ( o is None ): o = self._field_names[ top ].get( key.replace( '[..]', '' ) )
+        return o
+
+    def Find( self, name ):
+        """ The VariableInstance for name, or the Variable/Field/Class when name is not an instance. """
+        o = self.VariableInstance( name )
+        if ( o is None ): o = self.Field( name )
+        return o
+
+    def FullName( self, name ):
+        """ The full name of a variable instance as it is spelled in the mdd, None when there is no such variable. """
+        o = self.VariableInstance( name )
+        return None if o is None else o.FullName
+
+    def _top_level( self, name ):
+        """ The top level question of name as it is spelled in the mdd, None when there is no such question. """
+        if ( self._top_names is None ):
+            self._top_names = { n.casefold(): n for n in self._fields._names() }
+        for i, c in enumerate( name ):
+            if ( c in '[.' ):
+                name = name[ :i ]
+                break
+        return self._top_names.get( name.casefold() )
+
+    def _build_instance_names( self, top ):
+        logging.debug( "Indexing variable instance names of " + top )
+        names = self._instance_names[ top ] = { }
+        for v in ( self._variableinstances._group( top ) or { } ).values():
+            names.setdefault( v.FullName.casefold(), v )
+
+    def _build_field_names( self, top ):
+        logging.debug( "Indexing field names of " + top )
+        self._field_names[ top ] = { }
+        o = self._fields[ top ]
+        if ( o is not None ): self._add_field( self._field_names[ top ], o, '' )
+
+    def _add_field( self, names, o, prefix ):
+        name = prefix + o.Name
+        key = name.casefold()
+        names.setdefault( key, o )
+        names.setdefault( key.replace( '[..]', '' ), o )
+
+        for h in o.HelperFields:
+            self._add_field( names, o.HelperFields[ h ], name + '.' )
+        if ( type( o ) is Field ):
+            for item in o._items:
+                self._add_field( names, o._items[ item ], name + '[..].' )
+        elif ( type( o ) is Class ):
+            for item in o._items:
+                self._add_field( names, o._items[ item ], name + '.' )
@@ -1,9 +1,12 @@
-import logging
+import logging, sys
 from collections import OrderedDict
 
 class Properties:
+    __slots__ = ( '_items', )
+
     def __init__( self ):
-        self._items = []
+        # Shared empty tuple until the first property is read, most objects have none
+        self._items = ()
 
     def __getitem__( self, key ):
         return self._items[ key ]
@@ -13,6 +16,7 @@ class Properties:
 
     def _from_dict( self, d ):
         if ( "property" in d ):
+            self._items = list( self._items )
             if ( type( d[ "property" ] ) == list ):
                 for o in d[ "property" ]:
                     if ( '@type' in o and '@value' in o ):
@@ -27,9 +31,11 @@ class Properties:
                     self._items.append( p )
 
 class Property:
+    __slots__ = ( 'Context', 'Name', 'Type', 'Value', 'Properties' )
+
     def __init__( self, context, name, t, value ):
-        self.Context = context
-        self.Name = name
+        self.Context = sys.intern( context )
+        self.Name = sys.intern( name )
         self.Type = t
         self.Value = value
         self.Properties = Properties()
\ No newline at end of file
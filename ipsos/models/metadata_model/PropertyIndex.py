@@ -0,0 +1,78 @@
+import logging
+from collections import namedtuple
+
+
+# Kind is 'variable' or 'category', Id is the definition id of the variable/category, Parent is the
+#   name of the shared list or variable a category belongs to
+PropertyEntry = namedtuple( 'PropertyEntry', [ 'Kind', 'Id', 'Name', 'Parent', 'Property', 'Value', 'Context' ] )
+
+# One category of a shared list with its first label text and its ( name, value ) properties
+ListCategory = namedtuple( 'ListCategory', [ 'Name', 'Label', 'Properties' ] )
+
+
+def _as_list( o ):
+    if ( o is None ):
+        return [ ]
+    if ( type( o ) is list ):
+        return o
+    return [ o ]
+
+
+class PropertyIndex:
+    """ Inverted index of the custom properties in the definition node, built once when the mdd is loaded.
+
+    Find( name, value = None ) returns the PropertyEntry of every variable/category carrying the property
+    ( name is not case sensitive ), Lists[ name ] holds the categories of the shared lists with that name.
+    Only the top level properties of a node are indexed, the same ones Properties._from_dict reads.
+    """
+    def __init__( self, definition_index ):
+        logging.debug( "Indexing MDD properties" )
+        self._items = { }
+        self.Lists = { }
+        self._parse( definition_index )
+
+    def __contains__( self, name ):
+        return name.lower() in self._items
+
+    def _parse( self, index ):
+        for variable in index.Definitions:
+            self._add( 'variable', variable, None )
+            self._add_categories( variable.get( 'categories' ), variable[ '@name' ] )
+
+        for categories in index.Categories.values():
+            self._add_categories( categories, categories[ '@name' ] )
+            self.Lists.setdefault( categories[ '@name' ], [ ] ).append( [
+                ListCategory( category[ '@name' ], self._label( category ), [ ( p[ '@name' ], p.get( '@value' ) ) for p in self._properties( category ) ] )
+                for category in _as_list( categories.get( 'category' ) ) ] )
+
+    def _add_categories( self, categories, parent ):
+        for node in _as_list( categories ):
+            for category in _as_list( node.get( 'category' ) ):
+                self._add( 'category', category, parent )
+
+    def _properties( self, node ):
+        if ( type( node.get( 'properties' ) ) is not list and node.get( 'properties' ) ):
+            return _as_list( node[ 'properties' ].get( 'property' ) )
+        return [ ]
+
+    def _add( self, kind, node, parent ):
+        for p in self._properties( node ):
+            if ( '@type' in p and '@value' in p ):
+                entry = PropertyEntry( kind, node[ '@id' ], node[ '@name' ], parent, p[ '@name' ], p[ '@value' ], p.get( '@context' ) )
+                self._items.setdefault( p[ '@name' ].lower(), [ ] ).append( entry )
+
+    def _label( self, node ):
+        texts = _as_list( ( node.get( 'labels' ) or { } ).get( 'text' ) )
+        return texts[ 0 ].get( '#text' ) if len( texts ) > 0 else None
+
+    def Find( self, name, value = None ):
+        """ The entries carrying property name, only those whose value matches ( not case sensitive ) when value is given. """
+        entries = self._items.get( name.lower(), [ ] )
+        if ( value is None ):
+            return list( entries )
+        value = str( value ).lower()
+        return [ entry for entry in entries if str( entry.Value ).lower() == value ]
+
+    def Ids( self, name, kind = 'variable' ):
+        """ The set of variable/category ids carrying property name. """
+        return set( entry.Id for entry in self._items.get( name.lower(), [ ] ) if entry.Kind == kind )
@@ -4,8 +4,8 @@ class ScreeningTableList:
 
 
     # constructor
-    def __init__(self,mdm_dict):
-        self._document = mdm_dict
+    def __init__(self,property_index):
+        self._property_index = property_index
 
 
     
@@ -28,34 +28,24 @@ class ScreeningTableList:
         """
         try:
 
-            json_obj = self._document ['xml']['mdm:metadata']['definition']['categories'] 
-            
             precodes= []
             name_of_variables = []
             custom_property_ = []
             custom_property_value = []
 
-            for values in json_obj:
-                if values['@name'] == "ScreeningTableList":
-                    try:
-                        first_category = values['category'][0]
-                        if first_category['properties']:
-                            all_the_values = values['category']
-                            break
-                    except Exception as e:
-                        pass
+            for values in self._property_index.Lists.get("ScreeningTableList", []):
+                if len(values) > 0 and values[0].Properties:
+                    all_the_values = values
+                    break
 
 
             for category in all_the_values:
-                precode = category['@name']
-                name = self.slice_string(category.get('labels', {}).get('text', [{}])[0].get('#text',{}))
+                precode = category.Name
+                name = self.slice_string(category.Label)
                 property = None
                 value = None
-                try:
-                    property = category['properties']['property']['@name']
-                    value = category['properties']['property']['@value']    
-                except Exception as e:
-                    pass
+                if len(category.Properties) == 1:
+                    property, value = category.Properties[0]
 
                 precodes.append(precode)
                 name_of_variables.append(name)
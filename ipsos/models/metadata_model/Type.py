@@ -1,4 +1,4 @@
 from ipsos.models.metadata_model.Elements import Elements
 
 class Type( Elements ):
-    pass
\ No newline at end of file
+    __slots__ = ()
@@ -1,12 +1,17 @@
+import sys
 from ipsos.models.metadata_model.Label import Label
 from ipsos.models.metadata_model.Properties import Properties
-from collections import OrderedDict
+from ipsos.models.metadata_model.Empty import EMPTY_ITEMS
 
 
 class Variable:
+    __slots__ = ( 'Name', 'FullName', 'Label', 'UUID', 'DataType', 'ObjectTypeValue', 'MinValue', 'MaxValue', 'UsageType', 'HasCaseData',
+                  'DefaultAnswer', 'Expression', 'AxisExpression', 'Namespace', 'IsSystem', 'Elements', 'Categories', 'VariableInstances',
+                  'Labels', 'Properties', 'OtherCategories', 'HelperFields' )
+
     def __init__( self, name, uuid, datatype, minvalue, maxvalue, objecttypevalue, usagetype, language, context ):
-        self.Name = name
-        self.FullName = name
+        self.Name = sys.intern( name )
+        self.FullName = self.Name
         self.Label = ''
         self.UUID = uuid
         self.DataType = datatype
@@ -20,10 +25,10 @@ class Variable:
         self.AxisExpression = None
         self.Namespace = None
         self.IsSystem = False
-        self.Elements = OrderedDict()
-        self.Categories = OrderedDict()
-        self.VariableInstances = OrderedDict()
+        self.Elements = EMPTY_ITEMS
+        self.Categories = EMPTY_ITEMS
+        self.VariableInstances = EMPTY_ITEMS
         self.Labels = Label( language, context )
         self.Properties = Properties()
-        self.OtherCategories = OrderedDict()
-        self.HelperFields = OrderedDict()
\ No newline at end of file
+        self.OtherCategories = EMPTY_ITEMS
+        self.HelperFields = EMPTY_ITEMS
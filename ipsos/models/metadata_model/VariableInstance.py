@@ -1,11 +1,15 @@
+import sys
 from ipsos.models.metadata_model.Label import Label
-from collections import OrderedDict
+from ipsos.models.metadata_model.Empty import EMPTY_ITEMS
 
 
 class VariableInstance:
+    __slots__ = ( 'Name', 'FullName', 'Label', 'Indexes', 'UUID', 'DataType', 'ObjectTypeValue', 'MinValue', 'MaxValue', 'HasCaseData',
+                  'UsageType', 'Expression', 'IsSystem', 'Elements', 'Categories', 'Labels', 'Indices' )
+
     def __init__( self, name, uuid, datatype, minvalue, maxvalue, objecttypevalue, usagetype ):
-        self.Name = name
-        self.FullName = name
+        self.Name = sys.intern( name )
+        self.FullName = self.Name
         self.Label = ''
         self.Indexes = None
         self.UUID = uuid
@@ -17,7 +21,7 @@ class VariableInstance:
         self.UsageType = usagetype
         self.Expression = None
         self.IsSystem = False
-        self.Elements = OrderedDict()
-        self.Categories = OrderedDict()
-        self.Labels = OrderedDict()
-        self.Indices = list()
+        self.Elements = EMPTY_ITEMS
+        self.Categories = EMPTY_ITEMS
+        self.Labels = EMPTY_ITEMS
+        self.Indices = ()
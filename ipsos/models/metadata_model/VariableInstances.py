@@ -9,23 +9,70 @@ from ipsos.models.metadata_model.Element import Element
 from ipsos.models.metadata_model.Elements import Elements
 from ipsos.models.metadata_model.Categories import Categories
 from ipsos.models.metadata_model.Types import Types
+from ipsos.models.metadata_model.Empty import set_item
 
 
 class VariableInstances:
-    def __init__( self, fields ):
-        self._items = OrderedDict()
+    """ Every variable instance of the mdd, keyed on full name ( Q1[{a}].Slice ).
+
+    With lazy = True the instances of a top level question, including all grid iterations, are only
+    generated the first time one of them is requested with [ ] or reached while iterating, a name that
+    is not found only generates the question it belongs to. Accessing _items generates everything that is left.
+    """
+    def __init__( self, fields, lazy = False ):
+        self._groups = OrderedDict()
+        self._merged = None
         self._Fields = fields
-        self._create_variableinstances()
+        self._pending = OrderedDict.fromkeys( fields._names() )
+        if ( not lazy ): self._items
+
+    @property
+    def _items( self ):
+        if ( self._merged is None ):
+            self._create_variableinstances()
+            self._merged = OrderedDict()
+            for group in self._groups.values():
+                self._merged.update( group )
+        return self._merged
 
     def __getitem__( self, key ):
-        return self._items[ key ]
+        if ( self._merged is not None ):
+            return self._merged[ key ]
+        # Only the question the name belongs to is generated, a miss does not generate the others
+        group = self._group( self._top_level_name( key ) )
+        if ( group is None ):
+            raise KeyError( key )
+        return group[ key ]
 
     def __iter__( self ):
-        return iter( [ self._items[ item ] for item in self._items ] )
-
-    def _create_variableinstances( self ):
-        for item in self._Fields._items:
-            o = self._Fields._items[ item ]
+        if ( self._merged is not None ):
+            return iter( [ self._merged[ item ] for item in self._merged ] )
+        return self._iter_lazy()
+
+    def __getstate__( self ):
+        # Snapshots always hold every variable instance
+        self._items
+        return self.__dict__
+
+    def _iter_lazy( self ):
+        for name in ( self._Fields._names() if '_Fields' in self.__dict__ else list( self._groups ) ):
+            group = self._group( name )
+            if ( group is not None ):
+                for item in list( group ):
+                    yield group[ item ]
+
+    def _top_level_name( self, key ):
+        for i, c in enumerate( key ):
+            if ( c in '[.' ):
+                return key[ :i ]
+        return key
+
+    def _group( self, name ):
+        if ( name in self._pending ):
+            del self._pending[ name ]
+            self._groups[ name ] = OrderedDict()
+            self._target = self._groups[ name ]
+            o = self._Fields[ name ]
             if ( type( o ) is Variable ):
                 self._get_variableinstance( o, o.Name, None, None )
             elif ( type( o ) is Class ):
@@ -38,9 +85,19 @@ class VariableInstances:
                 quest_list = []
                 iter = 1
                 self._build_grid_variableinstances( name_dict, elem_dict, quest_list, o, iter )
+            del self._target
+        return self._groups.get( name )
+
+    def _create_variableinstances( self ):
+        for name in list( self._pending ):
+            self._group( name )
+
+        if ( '_Fields' in self.__dict__ ):
+            # Keep the mdd order, questions may have been generated in any order
+            order = self._Fields._names()
+            self._groups = OrderedDict( ( name, self._groups[ name ] ) for name in order if name in self._groups )
+            del self._Fields
 
-        del self._Fields
-        
     def _get_variableinstance( self, f, fullname, el, quest_list ):
         if ( f.DataType != 0 ):
             # No variable instances for info items
@@ -50,6 +107,7 @@ class VariableInstances:
             if ( el is not None ):
                 elems = el.split( '|' )
                 indexes = ''
+                indices = [ ]
                 for i in range( 0, len( elems ) - 1 ):
                     o = quest_list[ i ]
                     if ( o.IteratorType == '3' ):
@@ -58,17 +116,18 @@ class VariableInstances:
                         indexes += '{' + elems[ i ] + '},'
                     index = {}
                     index[ elems[ i ] ]  = o.Categories[ elems[ i ] ]
-                    var_inst.Indices.append( index )
+                    indices.append( index )
                 var_inst.Indexes = indexes[:-1]
+                var_inst.Indices = indices
                 o = quest_list[ 0 ]
-                o.VariableInstances[ var_inst.FullName ] = var_inst
-                self._items[ var_inst.FullName ] = var_inst
+                set_item( o, 'VariableInstances', var_inst.FullName, var_inst )
+                self._target[ var_inst.FullName ] = var_inst
 
                 if ( len( f.HelperFields ) > 0 ):
                     self._get_helperfield_variableinstances( o, f, fullname, var_inst )
             else:
-                f.VariableInstances[ var_inst.FullName ] = var_inst
-                self._items[ var_inst.FullName ] = var_inst
+                set_item( f, 'VariableInstances', var_inst.FullName, var_inst )
+                self._target[ var_inst.FullName ] = var_inst
                 if ( len( f.HelperFields ) > 0 ):
                     self._get_helperfield_variableinstances( f, f, fullname, None )
 
@@ -86,12 +145,12 @@ class VariableInstances:
                 hvar_inst.Indices = None
             
             help_var.FullName = fullname + '.' + hvar_inst.Name
-            f.VariableInstances[ hvar_inst.FullName ] = hvar_inst
+            set_item( f, 'VariableInstances', hvar_inst.FullName, hvar_inst )
 
             if ( o is not f ):
-                o.VariableInstances[ hvar_inst.FullName ] = hvar_inst
+                set_item( o, 'VariableInstances', hvar_inst.FullName, hvar_inst )
 
-            self._items[ hvar_inst.FullName ] = hvar_inst
+            self._target[ hvar_inst.FullName ] = hvar_inst
 
     def _add_variableinstance( self, f, fullname ):
 
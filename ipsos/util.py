@@ -1,4 +1,5 @@
 import datetime
+from collections import OrderedDict
 
 class Logging:
 
@@ -7,4 +8,84 @@ class Logging:
     LOGLEVEL_WARN = "WARNING"
 
     def log( self, msg, loglevel = LOGLEVEL_ERROR ):
-        print( datetime.datetime.now().isoformat( " " ) + "  " + loglevel + "  " + msg )
\ No newline at end of file
+        print( datetime.datetime.now().isoformat( " " ) + "  " + loglevel + "  " + msg )
+
+class memoized:
+    """
+    Memoise a method per instance.
+
+    Results are stored in the instance's own __dict__ ( _memo ), so they are freed together with the
+    object and never shared between two objects of the same class, unlike functools.lru_cache on a
+    method which holds on to every self it has seen. Methods keyed by their arguments can be given a
+    maxsize, the least recently used results are then dropped once a method holds that many.
+
+    Usage:
+        class DDF:
+            @memoized
+            def _list_of_all_var_names( self ): ...
+
+            @memoized( maxsize = 256 )
+            def _get_value_part_dict( self, variable_fullname ): ...
+
+            @property
+            @memoized
+            def RoutingData( self ): ...
+
+        ddf._list_of_all_var_names.cache_clear()    # this instance only
+        memoized.clear( ddf )                       # every memoised method of this instance
+    """
+    def __new__( cls, func = None, maxsize = None ):
+        # @memoized( maxsize = n ) returns the decorator that is then applied to the method
+        if ( func is None ):
+            return lambda func: cls( func, maxsize )
+        return super().__new__( cls )
+
+    def __init__( self, func, maxsize = None ):
+        self._func = func
+        self.maxsize = maxsize
+        self.__name__ = func.__name__
+        self.__doc__ = func.__doc__
+
+    def __get__( self, instance, owner = None ):
+        if ( instance is None ):
+            return self
+        return _BoundMemoized( self, instance )
+
+    def __call__( self, instance, *args, **kwargs ):
+        memo = instance.__dict__.setdefault( '_memo', {} ).setdefault( self.__name__, OrderedDict() )
+        key = ( args, tuple( sorted( kwargs.items() ) ) )
+        try:
+            result = memo[ key ]
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable arguments, nothing to cache on
+            return self._func( instance, *args, **kwargs )
+        else:
+            if ( self.maxsize is not None ): memo.move_to_end( key )
+            return result
+        result = memo[ key ] = self._func( instance, *args, **kwargs )
+        if ( self.maxsize is not None and len( memo ) > self.maxsize ):
+            memo.popitem( last = False )
+        return result
+
+    @staticmethod
+    def clear( instance ):
+        instance.__dict__.pop( '_memo', None )
+
+
+class _BoundMemoized:
+    def __init__( self, memo, instance ):
+        self._memo = memo
+        self._instance = instance
+        self.__name__ = memo.__name__
+        self.__doc__ = memo.__doc__
+
+    def __call__( self, *args, **kwargs ):
+        return self._memo( self._instance, *args, **kwargs )
+
+    def cache_info( self ):
+        return len( self._instance.__dict__.get( '_memo', {} ).get( self.__name__, () ) )
+
+    def cache_clear( self ):
+        self._instance.__dict__.get( '_memo', {} ).pop( self.__name__, None )
@@ -0,0 +1,124 @@
+import os, random, sqlite3, sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# A small mdd / ddf pair: single and multi-punch questions, a text and a date, a class, a loop ( Q9 ) and a
+#   nested loop ( Q10 -> Q10b ), N respondents with seeded random answers
+N_RESPONDENTS = 50
+
+COUNTRIES = ['uk', 'fr', 'de']
+Q2_CATEGORIES = ['a', 'b', 'c']
+BRANDS = ['brand_a', 'brand_b', 'brand_c']
+ATTRIBUTES = ['attr_x', 'attr_y']
+YES_NO = ['yes', 'no']
+
+
+def _label(text):
+    return '<labels context="LABEL"><text context="QUESTION" xml:lang="en-US">%s</text></labels>' % text
+
+
+def write_fixture(folder, n=N_RESPONDENTS):
+    """ Write fixture.mdd and fixture.ddf to folder, returns their paths. """
+    category_map = {}
+
+    def category(id_, name, label):
+        category_map.setdefault(name.lower(), len(category_map) + 1)
+        return '<category id="%s" name="%s">%s</category>' % (id_, name, _label(label))
+
+    definition = ''.join([
+        '<variable id="v_serial" name="Serial" type="1" min="0" max="999999">%s</variable>' % _label('Serial'),
+        '<variable id="v_finish" name="FinishTime" type="5">%s</variable>' % _label('Finish'),
+        '<variable id="v_d1a" name="D1a" type="3" min="1" max="1">%s<categories id="c_d1a" name="@" global-name-space="-1">%s</categories>'
+        '<properties><property name="ShowMe" value="yes" type="8" context="Analysis"/></properties></variable>'
+        % (_label('Country'), ''.join(category('e_d1a_' + c, c, c.upper()) for c in COUNTRIES)),
+        '<variable id="v_q2" name="Q2" type="3" min="0">%s<categories id="c_q2" name="@" global-name-space="-1">%s</categories></variable>'
+        % (_label('Multi Q2'), ''.join(category('e_q2_' + c, c, 'Cat ' + c) for c in Q2_CATEGORIES)),
+        '<variable id="v_age" name="Age" type="1" min="18" max="99">%s</variable>' % _label('Age'),
+        '<variable id="v_comment" name="Comment" type="2" min="0" max="4000">%s</variable>' % _label('Comment'),
+        '<variable id="v_excl" name="Excl" type="1">%s<properties><property name="IIS_ExcludeFromDataExport" value="-1" type="3" context="Analysis"/></properties></variable>' % _label('Excluded'),
+        '<variable id="v_b1" name="B1" type="2">%s<properties><property name="idatagenerator" value="gen1" type="8" context="Analysis"/></properties></variable>' % _label('Block text'),
+        '<variable id="v_inn1" name="inn1" type="3" min="1" max="1">%s<categories id="c_inn1" name="@" global-name-space="-1">%s</categories></variable>'
+        % (_label('Inner'), ''.join(category('e_inn1_' + c, c, c.title()) for c in YES_NO)),
+        '<variable id="v_rating" name="Rating" type="1" min="0" max="10">%s</variable>' % _label('Rating'),
+        '<variable id="v_val" name="val" type="3" min="1" max="1">%s<categories id="c_val" name="@" global-name-space="-1">%s</categories></variable>'
+        % (_label('Value'), ''.join(category('e_val_' + c, c, c.title()) for c in YES_NO)),
+        '<categories id="sl_brands" name="Brands">%s</categories>' % ''.join(category('e_br_' + b, b, b.title()) for b in BRANDS),
+        '<categories id="sl_attrs" name="Attrs">%s</categories>' % ''.join(category('e_at_' + a, a, a.title()) for a in ATTRIBUTES),
+    ])
+
+    system = ('<system name="@system" global-name-space="-1">'
+              '<class id="cls_resp" name="Respondent" global-name-space="-1">%s<fields name="@fields" global-name-space="-1"><variable id="_v_serial" name="Serial" ref="v_serial"/></fields></class>'
+              '<class id="cls_dc" name="DataCollection" global-name-space="-1">%s<fields name="@fields" global-name-space="-1"><variable id="_v_finish" name="FinishTime" ref="v_finish"/></fields></class>'
+              '</system>') % (_label('Respondent'), _label('DataCollection'))
+
+    design = ('<design><fields name="@fields" global-name-space="-1">'
+              '<variable id="_v_d1a" name="D1a" ref="v_d1a"/>'
+              '<variable id="_v_q2" name="Q2" ref="v_q2"/>'
+              '<variable id="_v_age" name="Age" ref="v_age"/>'
+              '<variable id="_v_comment" name="Comment" ref="v_comment"/>'
+              '<variable id="_v_excl" name="Excl" ref="v_excl"/>'
+              '<loop id="l_q9" name="Q9" type="1" iteratortype="2">%s<categories id="c_q9" name="@" categoriesref="sl_brands"/>'
+              '<class name="@class" global-name-space="-1"><fields name="@fields" global-name-space="-1">'
+              '<variable id="_v_inn1" name="inn1" ref="v_inn1"/><variable id="_v_rating" name="Rating" ref="v_rating"/></fields></class></loop>'
+              '<loop id="l_q10" name="Q10" type="1" iteratortype="2">%s<categories id="c_q10" name="@" categoriesref="sl_brands"/>'
+              '<class name="@class" global-name-space="-1"><fields name="@fields" global-name-space="-1">'
+              '<loop id="l_q10b" name="Q10b" type="1" iteratortype="2">%s<categories id="c_q10b" name="@" categoriesref="sl_attrs"/>'
+              '<class name="@class" global-name-space="-1"><fields name="@fields" global-name-space="-1">'
+              '<variable id="_v_val" name="val" ref="v_val"/></fields></class></loop>'
+              '</fields></class></loop>'
+              '<class id="cls_block" name="Block" global-name-space="-1">%s<fields name="@fields" global-name-space="-1"><variable id="_v_b1" name="B1" ref="v_b1"/></fields></class>'
+              '</fields>'
+              '<types name="@types" global-name-space="-1"><categories id="t_brands" name="Brands" ref="sl_brands"/><categories id="t_attrs" name="Attrs" ref="sl_attrs"/></types>'
+              '</design>') % (_label('Grid Q9'), _label('Grid Q10'), _label('Grid Q10b'), _label('Block'))
+
+    mdd = ('<?xml version="1.0" encoding="utf-8"?><xml><mdm:metadata mdm_createversion="7.0.1.0" xmlns:mdm="http://www.spss.com/mr/dm/metadatamodel/Arc 3/2000-02-04">'
+           '<datasources default="mrDataFileDsc"><connection name="mrDataFileDsc" dblocation="fixture.ddf" cdscname="mrDataFileDsc" project="fixture"/></datasources>'
+           '<definition>' + definition + '</definition>' + system + design +
+           '<categorymap>' + ''.join('<categoryid name="%s" value="%d"/>' % item for item in category_map.items()) + '</categorymap>'
+           '<languages base="EN-US"><language name="EN-US" id="0409"/><language name="FR-FR" id="040c"/></languages>'
+           '<contexts base="QUESTION"><context name="QUESTION"/><context name="ANALYSIS"><alternatives><alternative name="QUESTION"/></alternatives></context></contexts>'
+           '</mdm:metadata></xml>')
+    mdd_path = os.path.join(folder, 'fixture.mdd')
+    with open(mdd_path, 'w', encoding='utf-8') as f:
+        f.write(mdd)
+
+    ddf_path = os.path.join(folder, 'fixture.ddf')
+    conn = sqlite3.connect(ddf_path)
+    c = conn.cursor()
+    c.execute('CREATE TABLE DataVersion (Version INTEGER)')
+    c.execute('CREATE TABLE SchemaVersion (Version INTEGER)')
+    c.execute('CREATE TABLE Levels (TableName TEXT, ParentName TEXT, DSCTableName TEXT)')
+    c.executemany('INSERT INTO Levels VALUES (?,?,?)', [('L1', '', 'HDATA'), ('L2', 'L1', 'Q9'), ('L3', 'L1', 'Q10'), ('L4', 'L3', 'Q10b')])
+    c.execute('CREATE TABLE L1 ([:P0] INTEGER PRIMARY KEY, [Respondent.Serial:L] INTEGER, [DataCollection.FinishTime:T] REAL, [D1a:C1] INTEGER, [Q2:S] TEXT, [Age:L] INTEGER, [Comment:X] TEXT, [Excl:L] INTEGER, [Block.B1:X] TEXT)')
+    c.execute('CREATE TABLE L2 ([:P1] INTEGER, [:P0] INTEGER, [LevelId:C1] INTEGER, [inn1:C1] INTEGER, [Rating:L] INTEGER)')
+    c.execute('CREATE TABLE L3 ([:P1] INTEGER, [:P0] INTEGER, [LevelId:C1] INTEGER)')
+    c.execute('CREATE TABLE L4 ([:P2] INTEGER, [:P1] INTEGER, [:P0] INTEGER, [LevelId:C1] INTEGER, [val:C1] INTEGER)')
+    rnd = random.Random(7)
+    for r in range(1, n + 1):
+        q2 = ''.join('%d;' % category_map[x] for x in Q2_CATEGORIES if rnd.random() < 0.5) or None
+        comment = rnd.choice([None, "plain", "it's quoted", 'say "hi"', 'multi\nline'])
+        c.execute('INSERT INTO L1 VALUES (?,?,?,?,?,?,?,?,?)', (r, 1000 + r, 45000.25 + r, category_map[rnd.choice(COUNTRIES)], q2, rnd.randint(18, 99), comment, 1, 'b%d' % r))
+        for b in BRANDS:
+            c.execute('INSERT INTO L2 VALUES (?,?,?,?,?)', (r, category_map[b], category_map[b], category_map[rnd.choice(YES_NO)], rnd.randint(0, 10)))
+            c.execute('INSERT INTO L3 VALUES (?,?,?)', (r, category_map[b], category_map[b]))
+            for a in ATTRIBUTES:
+                c.execute('INSERT INTO L4 VALUES (?,?,?,?,?)', (r, category_map[b], category_map[a], category_map[a], category_map[rnd.choice(YES_NO)]))
+    conn.commit()
+    conn.close()
+    return mdd_path, ddf_path
+
+
+@pytest.fixture(scope='session')
+def fixture_files(tmp_path_factory):
+    return write_fixture(str(tmp_path_factory.mktemp('fixture')))
+
+
+@pytest.fixture
+def ddf(fixture_files, tmp_path, monkeypatch):
+    from ipsos.dimensions.ddf import DDF
+
+    monkeypatch.chdir(tmp_path)
+    return DDF(*fixture_files)
@@ -0,0 +1,114 @@
+import pandas
+import pytest
+
+from ipsos.dimensions.ddf import DDF
+
+
+@pytest.fixture
+def expected(ddf):
+    return ddf.to_df(1)
+
+
+def test_to_df(ddf, expected):
+    assert expected.shape == (50, 19)
+    assert list(expected.index[:3]) == [1, 2, 3]
+    assert 'excl' not in expected.columns
+    assert expected['d1a'].value_counts().to_dict() == {'fr': 20, 'de': 15, 'uk': 15}
+    assert (expected['q9[{brand_a}].inn1'] == 'yes').sum() == 22
+    assert expected.loc[1, 'q10[{brand_a}].q10b[{attr_x}].val'] == 'yes'
+    assert expected.loc[1, 'q2'] == 'a;b;'
+
+    codes = ddf.to_df(0)
+    assert codes.loc[1, 'd1a'] == 3
+    assert codes.loc[1, 'q2'] == '4;5;'
+
+
+def test_small_fetches_match(ddf, expected, monkeypatch):
+    monkeypatch.setattr(DDF, '_FETCH_SIZE', 3)
+    assert ddf.to_df(1).equals(expected)
+
+
+def test_workers_match_serial(ddf, expected):
+    assert ddf.to_df(1, workers=2).equals(expected)
+    assert ddf.to_df(1, workers=2, where={'d1a': 'fr'}).equals(expected[expected['d1a'] == 'fr'])
+
+
+def test_streaming_and_lazy_match_eager(fixture_files, expected):
+    for kwargs in ({'streaming': True}, {'lazy': True}, {'lazy': True, 'streaming': True}):
+        assert DDF(*fixture_files, **kwargs).to_df(1).equals(expected), kwargs
+
+
+def test_columns(ddf, expected):
+    df = ddf.to_df(1, columns=['q9[..].inn1', 'Q10[{brand_a}].q10b[..].val', 'nosuch'])
+
+    assert list(df.columns) == ['q9[{brand_a}].inn1', 'q9[{brand_b}].inn1', 'q9[{brand_c}].inn1',
+                                'q10[{brand_a}].q10b[{attr_x}].val', 'q10[{brand_a}].q10b[{attr_y}].val', 'nosuch']
+    assert df['nosuch'].isna().all()
+    assert df.drop(columns='nosuch').equals(expected[df.columns[:-1]])
+
+
+@pytest.mark.parametrize('where, count', [
+    ('[D1a:C1] = 2', 20),
+    ([1001, 1003, 1010, 99999], 3),
+    ({'d1a': ['uk', 'de']}, 30),
+    ({'q2': 'a', 'd1a': 'fr'}, 11),
+    ({'q9[{brand_a}].inn1': 'yes'}, 22),
+])
+def test_where(ddf, expected, where, count):
+    df = ddf.to_df(1, where=where)
+
+    assert len(df) == count
+    assert df.equals(expected.loc[df.index])
+
+
+def test_where_rejects_unknown_filters(ddf):
+    with pytest.raises(ValueError):
+        ddf.to_df(1, where={'d1a': 'nosuch'})
+    with pytest.raises(ValueError):
+        ddf.to_df(1, where=42)
+
+
+def test_count(ddf):
+    assert ddf.count() == 50
+    assert ddf.count('[D1a:C1] = 2') == 20
+
+
+def test_iter_batches(ddf, expected):
+    batches = list(ddf.iter_batches(7))
+
+    assert [len(b) for b in batches] == [7] * 7 + [1]
+    assert pandas.concat(batches).equals(expected)
+
+
+def test_iter_batches_records(ddf):
+    kwargs = dict(columns=['q9[..].inn1', 'q2'], where={'d1a': 'fr'}, multi_punch='list')
+    records = [r for batch in ddf.iter_batches(6, use_category_names=0, records=True, **kwargs) for r in batch]
+
+    assert len(records) == 20
+    assert records == ddf.to_df(0, **kwargs).to_dict('records')
+    assert list(ddf.iter_batches(5, where=[0])) == []
+
+
+def test_to_level_dfs(ddf, expected):
+    dfs = ddf.to_level_dfs()
+
+    assert {name: df.shape for name, df in dfs.items()} == {'HDATA': (50, 8), 'Q9': (150, 5), 'Q10[..].Q10b': (300, 6)}
+    for _, row in dfs['Q9'].iterrows():
+        assert expected.loc[row[':P1'], 'q9[{%s}].inn1' % row['q9']] == row['inn1']
+
+
+@pytest.mark.skipif(int(pandas.__version__.split('.')[0]) >= 2, reason='to_csv passes line_terminator, removed in pandas 2')
+def test_to_csv_chunks(ddf, tmp_path):
+    ddf.to_csv(str(tmp_path / 'all.csv'))
+    ddf.to_csv(str(tmp_path / 'chunks.csv'), chunksize=7)
+
+    assert (tmp_path / 'chunks.csv').read_text() == (tmp_path / 'all.csv').read_text()
+
+
+def test_decode_errors_propagate(ddf, monkeypatch):
+    def fail(*args, **kwargs):
+        raise ValueError('broken')
+    monkeypatch.setattr(DDF, '_write_case_values', staticmethod(fail))
+
+    with pytest.raises(ValueError, match='broken'):
+        ddf.to_df(1)
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+
+def test_to_parquet(ddf, tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'vdata.parquet')
+    ddf.to_parquet(path, batch_size=16)
+
+    f = pq.ParquetFile(path)
+    assert f.metadata.num_rows == 50
+    assert f.metadata.num_row_groups == 4
+
+    mdd = json.loads(f.schema_arrow.metadata[b'mdd'])
+    assert mdd['d1a'] == {'name': 'D1a', 'label': 'Country', 'datatype': '3', 'categories': [
+        {'name': 'uk', 'label': 'UK', 'value': 1}, {'name': 'fr', 'label': 'FR', 'value': 2}, {'name': 'de', 'label': 'DE', 'value': 3}]}
+
+    expected = ddf.to_df(1).reset_index(drop=True)
+    table = f.read().to_pandas()
+    assert list(table.columns) == list(expected.columns)
+    labels = {'uk': 'UK', 'fr': 'FR', 'de': 'DE'}
+    assert table['d1a'].astype(object).tolist() == [labels[v] for v in expected['d1a']]
+
+
+def test_to_parquet_filtered_codes(ddf, tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'fr.parquet')
+    ddf.to_parquet(path, columns=['q9[..].inn1'], where={'d1a': 'fr'}, use_category_labels=False)
+
+    table = pq.read_table(path).to_pandas()
+    expected = ddf.to_df(1, columns=['q9[..].inn1'], where={'d1a': 'fr'}).reset_index(drop=True)
+    assert len(table) == 20
+    assert table['q9[{brand_a}].inn1'].astype(object).tolist() == expected['q9[{brand_a}].inn1'].tolist()
+
+
+def test_unknown_category_values_raise(ddf):
+    assert ddf._category_positions('d1a', [1, None, 3], {1: 0, 3: 2}) == [0, None, 2]
+    with pytest.raises(KeyError):
+        ddf._category_positions('d1a', [1, 99], {1: 0})
+
+
+def test_to_sav(ddf, tmp_path):
+    pyreadstat = pytest.importorskip('pyreadstat')
+    path = str(tmp_path / 'vdata.sav')
+    ddf.to_sav(path, batch_size=9)
+
+    df, meta = pyreadstat.read_sav(path)
+    expected = ddf.to_df(0).reset_index(drop=True)
+    assert df.shape[0] == 50
+    assert (df['d1a'].values == expected['d1a'].astype(float).values).all()
+    assert (df['q9_brand_a_inn1'].values == expected['q9[{brand_a}].inn1'].astype(float).values).all()
+    assert meta.variable_value_labels['d1a'] == {1.0: 'UK', 2.0: 'FR', 3.0: 'DE'}
+
+    # Multi-punch questions become one dichotomy per category
+    q2 = [set(v.split(';')[:-1]) if v else None for v in expected['q2']]
+    assert [None if v != v else v for v in df['q2_a']] == [None if q is None else float('4' in q) for q in q2]
+
+
+def test_to_excel_constant_memory(ddf, tmp_path):
+    pytest.importorskip('xlsxwriter')
+    openpyxl = pytest.importorskip('openpyxl')
+    path = str(tmp_path / 'vdata.xlsx')
+    ddf.to_excel(path, constant_memory=True, batch_size=7, labels_sheet='Labels')
+
+    wb = openpyxl.load_workbook(path, read_only=True)
+    rows = [list(r) for r in wb['VDATA'].iter_rows(values_only=True)]
+    expected = ddf.to_df(1)
+    assert rows[0] == list(expected.columns)
+    assert rows[1:] == [list(r) for r in expected.itertuples(index=False, name=None)]
+    assert 'Labels' in wb.sheetnames
+
+
+def test_to_excel_splits_sheets(ddf, tmp_path):
+    pytest.importorskip('xlsxwriter')
+    openpyxl = pytest.importorskip('openpyxl')
+    path = str(tmp_path / 'split.xlsx')
+    ddf._EXCEL_MAX_ROWS = 21
+    ddf._EXCEL_MAX_COLUMNS = 8
+    ddf.to_excel(path, constant_memory=True, batch_size=7, header=False, where='[D1a:C1] <> 1')
+
+    wb = openpyxl.load_workbook(path, read_only=True)
+    sheets = {ws.title: [list(r) for r in ws.iter_rows(values_only=True)] for ws in wb.worksheets}
+    got = [sheets['VDATA'][i] + sheets['VDATA_2'][i] + sheets['VDATA_3'][i] for i in range(21)]
+    got += [sheets['VDATA_4'][i] + sheets['VDATA_5'][i] + sheets['VDATA_6'][i] for i in range(14)]
+    assert got == [list(r) for r in ddf.to_df(1, where='[D1a:C1] <> 1').itertuples(index=False, name=None)]
+
+
+def test_to_level_parquet(ddf, tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    files = ddf.to_level_parquet(str(tmp_path))
+
+    assert [pq.read_metadata(f).num_rows for f in files] == [50, 150, 300]
@@ -0,0 +1,67 @@
+import jsonpickle
+import pytest
+
+from ipsos.models.Document import Document
+
+
+def _open(path, **kwargs):
+    mdm = Document()
+    mdm.Open(path, **kwargs)
+    return mdm
+
+
+@pytest.fixture(scope='module')
+def eager(fixture_files):
+    return _open(fixture_files[0])
+
+
+def _encode(o):
+    return jsonpickle.encode(o, make_refs=False)
+
+
+def test_streaming_builds_the_same_model(fixture_files, eager):
+    streamed = _open(fixture_files[0], streaming=True)
+
+    assert _encode(streamed.Fields) == _encode(eager.Fields)
+    assert _encode(streamed.Types) == _encode(eager.Types)
+    assert [v.FullName for v in streamed.VariableInstances] == [v.FullName for v in eager.VariableInstances]
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_lazy_model_matches_eager(fixture_files, eager, streaming):
+    lazy = _open(fixture_files[0], lazy=True, streaming=streaming)
+
+    assert [v.FullName for v in lazy.VariableInstances] == [v.FullName for v in eager.VariableInstances]
+    assert list(lazy.Fields._items) == list(eager.Fields._items)
+
+
+def test_lazy_lookup_only_builds_its_question(fixture_files):
+    lazy = _open(fixture_files[0], lazy=True)
+    instances = lazy.VariableInstances
+    fields = len(lazy.Fields._pending)
+    groups = len(instances._pending)
+
+    assert instances['Q9[{brand_b}].Rating'].FullName == 'Q9[{brand_b}].Rating'
+    assert len(lazy.Fields._pending) == fields - 1
+    assert len(instances._pending) == groups - 1
+    assert instances._merged is None
+
+    # A miss only generates the question the name belongs to
+    with pytest.raises(KeyError):
+        instances['Q10[{brand_a}].Q10b[{nosuch}].val']
+    assert len(instances._pending) == groups - 2
+    with pytest.raises(KeyError):
+        instances['NoSuchQuestion']
+    assert len(instances._pending) == groups - 2
+    assert instances._merged is None
+
+
+def test_name_index(eager):
+    index = eager.NameIndex
+
+    assert index.VariableInstance('q9[{BRAND_A}].Inn1').FullName == 'Q9[{brand_a}].inn1'
+    assert index.FullName('q10[{brand_b}].q10b[{attr_y}].VAL') == 'Q10[{brand_b}].Q10b[{attr_y}].val'
+    assert index.Field('Q9.inn1') is index.Field('q9[..].INN1')
+    assert index.Field('Q9[{brand_c}].inn1').Name == 'inn1'
+    assert index.Find('nosuch') is None
+    assert 'nosuch.inn1' not in index
@@ -0,0 +1,52 @@
+import gzip, os, stat
+
+from ipsos.dimensions.ddf import DDF
+from ipsos.models.MetadataCache import MetadataCache
+
+
+def test_store_and_load(tmp_path):
+    cache = MetadataCache(str(tmp_path / 'cache'))
+    assert cache.load('k') is None
+
+    cache.store('k', {'a': [1, 2]})
+    assert cache.load('k') == {'a': [1, 2]}
+    assert stat.S_IMODE(os.stat(cache.path).st_mode) == 0o700
+    assert os.listdir(cache.path) == ['k.v' + str(MetadataCache.VERSION) + '.mdm.gz']
+
+    cache.clear()
+    assert cache.load('k') is None
+
+
+def test_unreadable_snapshot_is_discarded(tmp_path):
+    cache = MetadataCache(str(tmp_path))
+    cache.store('k', 'snapshot')
+    with gzip.open(cache._file('k'), 'wb') as f:
+        f.write(b'not a pickle')
+
+    assert cache.load('k') is None
+    assert not os.path.exists(cache._file('k'))
+
+
+def test_least_recently_used_snapshots_are_evicted(tmp_path):
+    cache = MetadataCache(str(tmp_path), max_size=0)
+    cache.store('a', 'x' * 1000)
+    os.utime(cache._file('a'), (1, 1))
+    cache.store('b', 'y' * 1000)
+
+    # The snapshot just stored is always kept
+    assert cache.load('a') is None
+    assert cache.load('b') == 'y' * 1000
+
+
+def test_ddf_with_cache_matches_ddf_without(fixture_files, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    expected = DDF(*fixture_files).to_df()
+
+    cache_dir = str(tmp_path / 'cache')
+    stored = DDF(*fixture_files, use_cache=True, cache_dir=cache_dir)
+    assert len(os.listdir(cache_dir)) == 1
+    restored = DDF(*fixture_files, use_cache=True, cache_dir=cache_dir)
+
+    assert stored.to_df().equals(expected)
+    assert restored.to_df().equals(expected)
+    assert [v.FullName for v in restored.mdm.VariableInstances] == [v.FullName for v in stored.mdm.VariableInstances]
@@ -0,0 +1,42 @@
+import shutil, sqlite3
+
+from ipsos.dimensions.schema import Column, DDFSchema
+
+
+def test_levels(fixture_files):
+    schema = DDFSchema.load(fixture_files[1])
+
+    assert list(schema.Levels) == ['L1', 'L2', 'L3', 'L4']
+    assert [t.DSCName for t in schema.Levels.values()] == ['HDATA', 'Q9', 'Q10', 'Q10b']
+    assert [t.Name for t in schema.chain('L4')] == ['L3', 'L4']
+    assert schema.chain('L1') == []
+    assert schema.Levels['L4'].Parent == 'L3'
+    assert schema.Levels['L4'].Keys == [':P0', ':P1', ':P2']
+    assert schema.pk_dict() == {'L1': ':P0', 'L2': ':P1', 'L3': ':P1', 'L4': ':P2'}
+    assert schema.CaseDataTables == ['L1', 'L2', 'L3', 'L4']
+
+
+def test_column_kinds():
+    assert DDFSchema.column('Q2:S') == Column('Q2:S', 'Q2', 'S', 'multi')
+    assert DDFSchema.column('D1a:C1').Kind == 'single'
+    assert DDFSchema.column('Respondent.Serial:L').Variable == 'Respondent.Serial'
+    assert DDFSchema.column(':P1').Kind == 'key'
+    assert DDFSchema.column('LevelId:C1').Kind == 'levelid'
+    assert DDFSchema.column('Comment:X').Kind == 'text'
+
+
+def test_load_is_cached_until_the_file_changes(fixture_files, tmp_path):
+    path = str(tmp_path / 'copy.ddf')
+    shutil.copy(fixture_files[1], path)
+    schema = DDFSchema.load(path)
+    assert DDFSchema.load(path) is schema
+
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE L5 ([:P0] INTEGER, [Extra:L] INTEGER)')
+    conn.commit()
+    conn.close()
+    DDFSchema.invalidate(path)
+
+    changed = DDFSchema.load(path)
+    assert changed is not schema
+    assert changed.columns('L5') == [':P0', 'Extra:L']
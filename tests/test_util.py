@@ -0,0 +1,63 @@
+from ipsos.util import memoized
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    @memoized
+    def names(self):
+        self.calls += 1
+        return ['a', 'b']
+
+    @memoized(maxsize=2)
+    def double(self, x):
+        self.calls += 1
+        return x * 2
+
+
+def test_memoized_caches_per_instance():
+    a, b = Counter(), Counter()
+    assert a.names() is a.names()
+    assert a.calls == 1
+    b.names()
+    assert b.calls == 1
+
+
+def test_memoized_maxsize_evicts_least_recently_used():
+    c = Counter()
+    c.double(1)
+    c.double(2)
+    c.double(1)
+    c.double(3)
+    assert c.calls == 3
+    assert c.double.cache_info() == 2
+
+    # 1 was used after 2, so 2 was evicted and 1 is still cached
+    c.double(1)
+    assert c.calls == 3
+    c.double(2)
+    assert c.calls == 4
+    assert c.double.cache_info() == 2
+
+
+def test_memoized_unhashable_arguments_bypass_the_cache():
+    c = Counter()
+    assert c.double([1]) == [1, 1]
+    assert c.double([1]) == [1, 1]
+    assert c.calls == 2
+    assert c.double.cache_info() == 0
+
+
+def test_memoized_clear():
+    c = Counter()
+    c.names()
+    c.double(1)
+    c.names.cache_clear()
+    assert c.names.cache_info() == 0
+    assert c.double.cache_info() == 1
+
+    memoized.clear(c)
+    assert c.double.cache_info() == 0
+    c.names()
+    assert c.calls == 3